@@ -0,0 +1,3 @@
+"""
+Benchmarks for the stretch5 pipeline, run from the repository root with `python -m benchmarks.<name>`.
+"""
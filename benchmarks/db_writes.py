@@ -0,0 +1,185 @@
+"""
+Compare the database write strategies on generated data against a disposable local Postgres.
+
+    python -m benchmarks.db_writes                          # starts and removes its own Postgres
+    python -m benchmarks.db_writes --scales 1 5 --output writes.json
+    python -m benchmarks.db_writes --database-url postgresql://localhost/scratch
+
+The throwaway server comes from initdb/pg_ctl when the Postgres binaries are installed
+(PG_BIN or PATH), otherwise from a postgres:16 docker container. Never point
+--database-url at the production database: the bench_* tables are dropped and reloaded.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import psycopg2
+
+import stretch5.db
+from stretch5.game_logs import insert_euroleague_game_logs_to_db, prepare_game_logs
+from stretch5.shots import COURT_PARAMS, classify_shots_py, classify_zones_py, insert_shot_data_to_db
+from stretch5.team_stats import calculate_advanced_team_stats, insert_team_advanced_stats_to_db
+
+from . import generators
+
+# name -> write options passed through to the insert functions
+STRATEGIES = {
+    'values_page100': {'write_strategy': 'values', 'page_size': 100},
+    'values_page1000': {'write_strategy': 'values', 'page_size': 1000},
+    'values_page5000': {'write_strategy': 'values', 'page_size': 5000},
+    'batched_1000': {'write_strategy': 'batched', 'page_size': 1000, 'batch_size': 1000},
+    'batched_10000': {'write_strategy': 'batched', 'page_size': 1000, 'batch_size': 10000},
+    'copy_merge': {'write_strategy': 'copy'},
+}
+
+TABLES = {
+    'game_logs': ('bench_game_logs', lambda df, options: insert_euroleague_game_logs_to_db(df, 'bench_game_logs', **options)),
+    'shot_data': ('shot_data_bench', lambda df, options: insert_shot_data_to_db(df, 'bench', **options)),
+    'team_advanced_stats': ('team_advanced_stats_bench', lambda df, options: insert_team_advanced_stats_to_db(df, 'bench', **options)),
+}
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _wait_for(url, timeout=60):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            psycopg2.connect(url).close()
+            return
+        except psycopg2.OperationalError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.5)
+
+def _pg_bin():
+    candidates = [os.environ.get('PG_BIN')] + [os.path.dirname(shutil.which('initdb') or '')]
+    candidates += sorted(glob.glob('/usr/lib/postgresql/*/bin'), reverse=True)
+    for candidate in candidates:
+        if candidate and os.path.exists(os.path.join(candidate, 'pg_ctl')):
+            return candidate
+    return None
+
+@contextlib.contextmanager
+def local_postgres():
+    """
+    Start a throwaway Postgres server and yield its URL; the server and its data are removed on exit
+    """
+    port = _free_port()
+    bin_dir = _pg_bin()
+
+    if bin_dir:
+        data_dir = tempfile.mkdtemp(prefix='stretch5-pg-')
+        pg_ctl = os.path.join(bin_dir, 'pg_ctl')
+        subprocess.run([os.path.join(bin_dir, 'initdb'), '-D', data_dir, '-U', 'postgres', '--auth=trust'],
+                       check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([pg_ctl, '-D', data_dir, '-l', os.path.join(data_dir, 'server.log'), '-w',
+                        '-o', f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1", 'start'],
+                       check=True, stdout=subprocess.DEVNULL)
+        try:
+            yield f"postgresql://postgres@127.0.0.1:{port}/postgres"
+        finally:
+            subprocess.run([pg_ctl, '-D', data_dir, '-m', 'fast', 'stop'], stdout=subprocess.DEVNULL)
+            shutil.rmtree(data_dir, ignore_errors=True)
+        return
+
+    if shutil.which('docker'):
+        name = f"stretch5-bench-{port}"
+        subprocess.run(['docker', 'run', '--rm', '-d', '--name', name, '-e', 'POSTGRES_HOST_AUTH_METHOD=trust',
+                        '-p', f"127.0.0.1:{port}:5432", 'postgres:16'], check=True, stdout=subprocess.DEVNULL)
+        url = f"postgresql://postgres@127.0.0.1:{port}/postgres"
+        try:
+            _wait_for(url)
+            yield url
+        finally:
+            subprocess.run(['docker', 'stop', name], stdout=subprocess.DEVNULL)
+        return
+
+    raise RuntimeError("No Postgres binaries (set PG_BIN) or docker found; pass --database-url instead")
+
+def build_frames(scale):
+    """
+    Generated frames in the shape each insert function receives from the pipeline
+    """
+    boxscores = generators.boxscores(scale)
+    game_logs = prepare_game_logs(boxscores)
+
+    shot_data = classify_shots_py(generators.shots(scale))
+    shot_data['Bin'] = shot_data.apply(lambda row: classify_zones_py(row, COURT_PARAMS), axis=1)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        team_stats = calculate_advanced_team_stats(boxscores, 'euroleague', generators.team_logos(boxscores))
+
+    return {'game_logs': game_logs, 'shot_data': shot_data, 'team_advanced_stats': team_stats}
+
+def _drop_table(table_name):
+    conn = stretch5.db.get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+    finally:
+        conn.close()
+
+def run(scales, tables, strategies):
+    results = []
+    for scale in scales:
+        print(f"\n=== SCALE {scale}x ===")
+        frames = build_frames(scale)
+        for table in tables:
+            table_name, insert = TABLES[table]
+            for strategy in strategies:
+                _drop_table(table_name)
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                    stats = insert(frames[table], dict(STRATEGIES[strategy]))
+                wall = time.perf_counter() - start
+                result = {
+                    'scale': scale,
+                    'table': table,
+                    'strategy': strategy,
+                    'rows': stats['rows'],
+                    'wall_s': round(wall, 3),
+                    'transactions': stats['transactions'],
+                    'transaction_s': round(stats['transaction_s'], 3),
+                    'lock_hold_s': round(stats['lock_hold_s'], 3),
+                    'rows_per_s': round(stats['rows'] / stats['transaction_s']) if stats['transaction_s'] else None,
+                }
+                results.append(result)
+                print(f"  {table:<20} {strategy:<16} {result['rows']:>9} rows {result['rows_per_s'] or 0:>9} rows/s "
+                      f"txn {result['transaction_s']:>7.2f}s ({result['transactions']}) "
+                      f"lock {result['lock_hold_s']:>7.2f}s wall {result['wall_s']:>7.2f}s", flush=True)
+            _drop_table(table_name)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline write strategies against a local Postgres.')
+    parser.add_argument('--scales', nargs='+', type=int, default=[1], help='number of synthetic seasons (default: 1)')
+    parser.add_argument('--tables', nargs='+', choices=list(TABLES), default=list(TABLES))
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--database-url', help='use this scratch database instead of starting one')
+    parser.add_argument('--output', help='write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    with (contextlib.nullcontext(args.database_url) if args.database_url else local_postgres()) as url:
+        stretch5.db.DATABASE_URL = url
+        results = run(args.scales, args.tables, args.strategies)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Synthetic API frames shaped like the euroleague_api responses the pipeline reads.
+A scale of 1 is one EuroLeague season; larger scales add further seasons, which is
+how real backfills grow.
+"""
+import numpy as np
+import pandas as pd
+
+TEAMS_PER_SEASON = 20
+PLAYERS_PER_TEAM = 12
+SHOTS_PER_TEAM_GAME = 70
+FREE_THROWS_PER_TEAM_GAME = 20
+PLAYOFF_GAMES = 20
+FIRST_SEASON = 2025
+
+COMPETITION_PHASES = {
+    'euroleague': ('RS', ['PO', 'FF']),
+    'eurocup': ('RS', ['8F', '4F']),
+}
+
+def _teams(season):
+    return [f"T{season % 100:02d}{i:02d}" for i in range(TEAMS_PER_SEASON)]
+
+def season_schedule(season, competition='euroleague', rng=None):
+    """
+    Double round-robin regular season plus a block of playoff games for one season
+    """
+    rng = rng or np.random.default_rng(season)
+    teams = _teams(season)
+    rs_phase, playoff_phases = COMPETITION_PHASES[competition]
+
+    # Circle method: every team plays every other team once per half
+    rotation = list(range(TEAMS_PER_SEASON))
+    games = []
+    n_rounds = TEAMS_PER_SEASON - 1
+    for round_index in range(n_rounds):
+        for i in range(TEAMS_PER_SEASON // 2):
+            home, away = rotation[i], rotation[-1 - i]
+            games.append((round_index + 1, home, away))
+            games.append((round_index + 1 + n_rounds, away, home))
+        rotation = [rotation[0]] + [rotation[-1]] + rotation[1:-1]
+    games.sort()
+
+    schedule = pd.DataFrame(games, columns=['Round', 'home', 'away'])
+    schedule['Phase'] = rs_phase
+
+    playoffs = pd.DataFrame({
+        'Round': 2 * n_rounds + 1 + np.arange(PLAYOFF_GAMES) // 4,
+        'home': rng.integers(0, 8, PLAYOFF_GAMES),
+        'away': rng.integers(8, 16, PLAYOFF_GAMES),
+        'Phase': np.where(np.arange(PLAYOFF_GAMES) < PLAYOFF_GAMES - 4, playoff_phases[0], playoff_phases[-1]),
+    })
+    schedule = pd.concat([schedule, playoffs], ignore_index=True)
+    schedule['Season'] = season
+    schedule['Gamecode'] = np.arange(1, len(schedule) + 1)
+    schedule['home'] = [teams[i] for i in schedule['home']]
+    schedule['away'] = [teams[i] for i in schedule['away']]
+    schedule['localDate'] = pd.Timestamp(f"{season}-10-01") + pd.to_timedelta((schedule['Round'] - 1) * 7, unit='D')
+    return schedule
+
+def _seasons(scale):
+    return [FIRST_SEASON - i for i in range(scale)]
+
+def game_reports(scale=1, competition='euroleague', seed=0):
+    """
+    Frame shaped like GameStats.get_game_reports_range_seasons
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for season in _seasons(scale):
+        schedule = season_schedule(season, competition, rng)
+        home_score = rng.normal(82, 10, len(schedule)).round().astype(int)
+        road_score = rng.normal(79, 10, len(schedule)).round().astype(int)
+        road_score = np.where(road_score == home_score, road_score + 1, road_score)
+        frames.append(pd.DataFrame({
+            'Season': season,
+            'Phase': schedule['Phase'],
+            'Round': schedule['Round'],
+            'Gamecode': schedule['Gamecode'],
+            'localDate': schedule['localDate'].dt.strftime('%Y-%m-%dT20:45:00'),
+            'local.club.code': schedule['home'],
+            'local.club.name': schedule['home'] + ' BASKET',
+            'local.club.images.crest': 'https://img.example/' + schedule['home'] + '.png',
+            'local.score': home_score,
+            'road.club.code': schedule['away'],
+            'road.club.name': schedule['away'] + ' BASKET',
+            'road.club.images.crest': 'https://img.example/' + schedule['away'] + '.png',
+            'road.score': road_score,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+PLAYER_STAT_RANGES = {
+    'FieldGoalsMade2': (0, 5),
+    'FieldGoalsMade3': (0, 3),
+    'FreeThrowsMade': (0, 4),
+    'OffensiveRebounds': (0, 3),
+    'DefensiveRebounds': (0, 5),
+    'Assistances': (0, 5),
+    'Steals': (0, 2),
+    'Turnovers': (0, 3),
+    'BlocksFavour': (0, 2),
+    'BlocksAgainst': (0, 2),
+    'FoulsCommited': (0, 5),
+    'FoulsReceived': (0, 5),
+}
+
+def boxscores(scale=1, competition='euroleague', seed=0):
+    """
+    Frame shaped like BoxScoreData.get_player_boxscore_stats_multiple_seasons: twelve
+    player rows per team and game followed by the 'Team' and 'Total' rows
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for season in _seasons(scale):
+        schedule = season_schedule(season, competition, rng)
+        team_games = pd.concat([
+            schedule.assign(Team=schedule['home'], Home=1),
+            schedule.assign(Team=schedule['away'], Home=0),
+        ], ignore_index=True).sort_values(['Gamecode', 'Home'], ascending=[True, False])
+
+        players = team_games.loc[team_games.index.repeat(PLAYERS_PER_TEAM)].reset_index(drop=True)
+        slot = np.tile(np.arange(PLAYERS_PER_TEAM), len(team_games))
+        n = len(players)
+        stats = {col: rng.integers(low, high + 1, n) for col, (low, high) in PLAYER_STAT_RANGES.items()}
+        stats['FieldGoalsAttempted2'] = stats['FieldGoalsMade2'] + rng.integers(0, 5, n)
+        stats['FieldGoalsAttempted3'] = stats['FieldGoalsMade3'] + rng.integers(0, 4, n)
+        stats['FreeThrowsAttempted'] = stats['FreeThrowsMade'] + rng.integers(0, 2, n)
+        stats['TotalRebounds'] = stats['OffensiveRebounds'] + stats['DefensiveRebounds']
+        stats['Points'] = 2 * stats['FieldGoalsMade2'] + 3 * stats['FieldGoalsMade3'] + stats['FreeThrowsMade']
+        stats['Valuation'] = stats['Points'] + stats['TotalRebounds'] + stats['Assistances'] - stats['Turnovers']
+        seconds = rng.integers(0, 32 * 60, n)
+        players = players.assign(
+            Player_ID=[f"P{team}{i:02d}" for team, i in zip(players['Team'], slot)],
+            Player=[f"{team} PLAYER {i}" for team, i in zip(players['Team'], slot)],
+            Dorsal=slot,
+            IsStarter=(slot < 5).astype(float),
+            IsPlaying=1.0,
+            Minutes=[f"{s // 60}:{s % 60:02d}" if s else 'DNP' for s in seconds],
+            Plusminus=rng.integers(-15, 16, n).astype(float),
+            **stats,
+        )
+
+        stat_cols = list(stats)
+        totals = players.groupby(['Gamecode', 'Team'], sort=False)[stat_cols].sum().reset_index()
+        totals = team_games.merge(totals, on=['Gamecode', 'Team'])
+        team_rows = totals.assign(Player_ID='Team', Player='Team', Dorsal=None, IsStarter=0.0, IsPlaying=0.0,
+                                  Minutes=None, Plusminus=0.0, **{col: 0 for col in stat_cols})
+        total_rows = totals.assign(Player_ID='Total', Player='Total', Dorsal=None, IsStarter=0.0, IsPlaying=0.0,
+                                   Minutes='200:00', Plusminus=0.0)
+        frame = pd.concat([players, team_rows, total_rows], ignore_index=True)
+        frame = frame.sort_values(['Gamecode', 'Home'], ascending=[True, False], kind='stable')
+        frames.append(frame.drop(columns=['home', 'away', 'localDate']))
+    return pd.concat(frames, ignore_index=True)
+
+def shots(scale=1, competition='euroleague', seed=0):
+    """
+    Frame shaped like ShotData.get_game_shot_data_multiple_seasons, with coordinates
+    spread over the half court and free throws mixed in
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    per_game = SHOTS_PER_TEAM_GAME + FREE_THROWS_PER_TEAM_GAME
+    for season in _seasons(scale):
+        schedule = season_schedule(season, competition, rng)
+        team_games = pd.concat([
+            schedule.assign(TEAM=schedule['home']),
+            schedule.assign(TEAM=schedule['away']),
+        ], ignore_index=True)
+        frame = team_games.loc[team_games.index.repeat(per_game), ['Season', 'Phase', 'Round', 'Gamecode', 'TEAM']]
+        frame = frame.reset_index(drop=True)
+        n = len(frame)
+
+        is_free_throw = np.tile(np.arange(per_game) >= SHOTS_PER_TEAM_GAME, len(team_games))
+        distance = np.abs(rng.normal(0, 450, n)).clip(0, 900)
+        angle = rng.uniform(-np.pi / 2, np.pi / 2, n)
+        coord_x = (distance * np.sin(angle)).round()
+        coord_y = (distance * np.cos(angle)).round().clip(-100, 850)
+        is_three = (np.hypot(coord_x, coord_y) >= 675) | ((np.abs(coord_x) >= 660) & (coord_y <= 157.5))
+        made = rng.random(n) < np.where(is_three, 0.36, 0.54)
+
+        kind = np.where(is_free_throw, 'FT', np.where(is_three, '3FG', '2FG'))
+        id_action = np.char.add(kind.astype(str), np.where(made, 'M', 'A'))
+        action = np.select(
+            [is_free_throw, is_three],
+            [np.where(made, 'Free Throw In', 'Free Throw Out'), np.where(made, 'Three Pointer', 'Missed Three Pointer')],
+            np.where(made, 'Two Pointer', 'Missed Two Pointer'),
+        )
+        points = np.where(made, np.where(is_free_throw, 1, np.where(is_three, 3, 2)), 0)
+        player = rng.integers(0, PLAYERS_PER_TEAM, n)
+
+        frames.append(frame.assign(
+            NUM_ANOT=np.tile(np.arange(per_game), len(team_games)),
+            ID_PLAYER=[f"P{team}{i:02d}" for team, i in zip(frame['TEAM'], player)],
+            PLAYER=[f"{team} PLAYER {i}" for team, i in zip(frame['TEAM'], player)],
+            ID_ACTION=id_action,
+            ACTION=action,
+            POINTS=points,
+            COORD_X=np.where(is_free_throw, np.nan, coord_x),
+            COORD_Y=np.where(is_free_throw, np.nan, coord_y),
+            ZONE=None,
+            FASTBREAK=(rng.random(n) < 0.1).astype(int).astype(str),
+            SECOND_CHANCE=(rng.random(n) < 0.1).astype(int).astype(str),
+            POINTS_OFF_TURNOVER=(rng.random(n) < 0.15).astype(int).astype(str),
+            MINUTE=rng.integers(1, 41, n),
+            CONSOLE=None,
+            POINTS_A=0,
+            POINTS_B=0,
+            UTC=None,
+        ))
+    return pd.concat(frames, ignore_index=True)
+
+def team_logos(boxscores_df):
+    """
+    Logo lookup in the shape returned by get_team_logos_from_schedule
+    """
+    pairs = boxscores_df[['Season', 'Team']].drop_duplicates()
+    return {
+        (season, team): {'teamname': f"{team} BASKET", 'teamlogo': f"https://img.example/{team}.png"}
+        for season, team in pairs.itertuples(index=False)
+    }
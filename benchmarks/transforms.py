@@ -0,0 +1,189 @@
+"""
+Time and memory benchmarks for the pipeline's DataFrame transforms on synthetic data.
+
+    python -m benchmarks.transforms                     # compare against baseline.json
+    python -m benchmarks.transforms --scales 1 10       # smaller run
+    python -m benchmarks.transforms --save-baseline     # record a new baseline
+    python -m benchmarks.transforms --lean-dtypes       # inputs as the pipeline ingests them
+
+Exits 1 when a transform is slower or uses more memory than the baseline allows, by more
+than the tolerance and by more than 20 ms or 1 MB.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from stretch5.dtypes import frame_memory_mb, optimize_dtypes
+from stretch5.schedule import (
+    create_cumulative_standings,
+    create_team_records_dataset_eurocup,
+    create_team_records_dataset_euroleague,
+)
+from stretch5.shots import COURT_PARAMS, classify_shots_py, classify_zones_py
+from stretch5.team_stats import calculate_advanced_team_stats, calculate_team_game_stats, match_opponents
+
+from . import generators
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def _classify_zones(shot_data):
+    return shot_data.apply(lambda row: classify_zones_py(row, COURT_PARAMS), axis=1)
+
+# name -> (inputs needed, function called with those inputs)
+TRANSFORMS = {
+    'create_team_records_dataset_euroleague': (
+        ['game_reports'], create_team_records_dataset_euroleague),
+    'create_team_records_dataset_eurocup': (
+        ['game_reports_eurocup'], create_team_records_dataset_eurocup),
+    'create_cumulative_standings': (
+        ['team_records'], create_cumulative_standings),
+    # Logos are generated rather than read from schedule_results
+    'calculate_advanced_team_stats': (
+        ['boxscores', 'competition', 'team_logos'], calculate_advanced_team_stats),
+    'match_opponents': (
+        ['boxscores'], match_opponents),
+    'calculate_team_game_stats': (
+        ['team_games', 'competition', 'team_logos'], calculate_team_game_stats),
+    'classify_shots_py': (
+        ['shots'], classify_shots_py),
+    'classify_zones_py': (
+        ['classified_shots'], _classify_zones),
+}
+
+# Changes smaller than these never count as regressions: a relative gate alone turns the
+# timer noise of transforms that take a few milliseconds into failures
+MIN_REGRESSION = {'seconds': 0.02, 'peak_mb': 1.0}
+
+def build_inputs(scale, lean_dtypes=False):
+    """
+    Generate every input frame for one scale (not timed)
+    """
+    inputs = {'competition': 'euroleague'}
+    inputs['game_reports'] = generators.game_reports(scale)
+    inputs['game_reports_eurocup'] = generators.game_reports(scale, competition='eurocup')
+    inputs['team_records'] = create_team_records_dataset_euroleague(inputs['game_reports'])
+    inputs['boxscores'] = generators.boxscores(scale)
+    inputs['team_logos'] = generators.team_logos(inputs['boxscores'])
+    inputs['team_games'] = _quiet(match_opponents, inputs['boxscores'])
+    inputs['shots'] = generators.shots(scale)
+    if lean_dtypes:
+        inputs['boxscores'] = optimize_dtypes(inputs['boxscores'], 'boxscores')
+        inputs['shots'] = optimize_dtypes(inputs['shots'], 'shots')
+    inputs['classified_shots'] = classify_shots_py(inputs['shots'])
+    return inputs
+
+def _quiet(func, *args):
+    # The transforms print progress per team; keep the benchmark output readable
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return func(*args)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+def measure(func, args, repeat):
+    """
+    Best wall time over `repeat` runs, then one run under tracemalloc for peak allocation
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        _quiet(func, *args)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _quiet(func, *args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': round(min(timings), 4), 'peak_mb': round(peak / (1024 * 1024), 2)}
+
+def run(scales, transforms, repeat, lean_dtypes=False):
+    results = {}
+    # Lean results are kept under their own keys so they never gate against raw baselines
+    suffix = '+lean' if lean_dtypes else ''
+    for scale in scales:
+        print(f"\n=== SCALE {scale}x{suffix} ===")
+        inputs = build_inputs(scale, lean_dtypes)
+        print(f"{len(inputs['game_reports'])} games, {len(inputs['boxscores'])} boxscore rows "
+              f"({frame_memory_mb(inputs['boxscores']):.1f} MB), {len(inputs['shots'])} shots "
+              f"({frame_memory_mb(inputs['shots']):.1f} MB)", flush=True)
+        for name in transforms:
+            needs, func = TRANSFORMS[name]
+            result = measure(func, [inputs[need] for need in needs], repeat)
+            results[f"{name}@{scale}x{suffix}"] = result
+            print(f"  {name:<42} {result['seconds']:>9.3f}s {result['peak_mb']:>9.1f} MB", flush=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Return the benchmarks that regressed beyond `tolerance` (a fraction) of the baseline
+    and by more than MIN_REGRESSION
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            before = baseline[key][metric]
+            after = result[metric]
+            if before > 0 and after > before * (1 + tolerance) and after - before > MIN_REGRESSION[metric]:
+                regressions.append(f"{key} {metric}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline transforms on synthetic seasons.')
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10, 50],
+                        help='number of synthetic seasons per run (default: 1 10 50)')
+    parser.add_argument('--transforms', nargs='+', choices=list(TRANSFORMS), default=list(TRANSFORMS))
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per transform, best is kept (default: 3)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown or memory growth over the baseline (default: 0.25)')
+    parser.add_argument('--lean-dtypes', action='store_true',
+                        help='optimise the boxscore and shot inputs with stretch5.dtypes first, as the pipeline does')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, args.transforms, args.repeat, args.lean_dtypes)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': dict(sorted(baseline.items())),
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\n✓ No regressions against the baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -261,7 +261,7 @@ function StatisticsTab({
         // Convert phase selection to database phase format
         let dbPhase = "Regular Season" // Default to Regular Season
         if (selectedPhase === "All") {
-          dbPhase = "Regular Season"
+          dbPhase = "All"
         } else if (selectedPhase === "Regular") {
           dbPhase = "Regular Season"
         } else if (selectedPhase === "Playoffs") {
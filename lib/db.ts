@@ -1151,7 +1151,7 @@ export async function getTeamPlayers(
       const playersNoPhase = await executeWithRetry(async () => {
         return (await sql.query(
           `SELECT * FROM ${tableName} 
-           WHERE player_team_code = $1 AND season = $2
+           WHERE player_team_code = $1 AND season = $2 AND phase <> 'All'
            ORDER BY points_scored DESC`,
           [teamCode, season],
         )) as EuroleaguePlayerStats[]
@@ -1992,7 +1992,7 @@ export async function getAllPlayersAcrossSeasons(league = "euroleague"): Promise
         `SELECT DISTINCT ON (player_id, season, phase) 
          player_id, player_name, season, phase, player_team_code, player_team_name, teamlogo, games_played
          FROM ${tableName} 
-         WHERE games_played > 0
+         WHERE games_played > 0 AND phase <> 'All'
          ORDER BY player_id, season DESC, phase, player_name`,
       )) as PlayerStatsFromGameLogs[]
     })
@@ -0,0 +1,5 @@
+"""
+Stretch 5 data pipeline: scrapes EuroLeague and EuroCup data and refreshes the
+tables behind the web app. Importing the package does not fetch or write anything;
+run `python -m stretch5 --help` for the stage CLI.
+"""
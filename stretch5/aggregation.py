@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+def factorize_groups(key_columns):
+    """
+    Map every row to a dense group number for the combination of its key columns.
+    Returns the group number per row and the number of groups.
+    """
+    combined = np.zeros(len(key_columns[0]), dtype=np.int64)
+    for column in key_columns:
+        # Missing keys get a code of their own; the -1 sentinel would collide with another group
+        codes, uniques = pd.factorize(np.asarray(column), use_na_sentinel=False)
+        combined = combined * len(uniques) + codes
+    _, group_index = np.unique(combined, return_inverse=True)
+    return group_index.ravel(), int(group_index.max()) + 1 if len(group_index) else 0
+
+def grouped_reduce(group_index, values, ufunc=np.add):
+    """
+    Reduce the rows of values per group number in one sorted pass.
+    Returns the reduced rows in group order and the first row position of every group.
+    """
+    order = np.argsort(group_index, kind='stable')
+    starts = np.flatnonzero(np.diff(group_index[order], prepend=-1))
+    if len(order) == 0:
+        return np.zeros((0,) + values.shape[1:], dtype=values.dtype), order
+    return ufunc.reduceat(values[order], starts, axis=0), order[starts]
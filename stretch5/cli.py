@@ -0,0 +1,177 @@
+import argparse
+
+from .db import require_database_url
+from .instrumentation import insert_run_report_to_db, start_run, write_run_report
+from .profiling import PROFILE_ENV, profile_targets_from_env
+from .scheduler import build_stage_graph, run_stage_graph
+from .simulation import SEASON_SIMULATIONS
+from .stages import COMPETITION_CODES, STAGE_TABLES, STAGES, RunContext
+from .streaming import CHUNK_BY
+from .writes import WRITE_STRATEGIES
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='stretch5',
+        description='Scrape EuroLeague and EuroCup data and refresh the Stretch 5 tables.'
+    )
+    parser.add_argument(
+        '--stages', nargs='+', choices=list(STAGES), default=list(STAGES),
+        help='stages to run (default: all)'
+    )
+    parser.add_argument(
+        '--competitions', nargs='+', choices=list(COMPETITION_CODES), default=list(COMPETITION_CODES),
+        help='competitions to process (default: all)'
+    )
+    parser.add_argument(
+        '--seasons', nargs='+', type=int, default=[2025],
+        help='season start years to process (default: 2025)'
+    )
+    parser.add_argument(
+        '--player-stats-mode', choices=['incremental', 'rebuild'], default='incremental',
+        help="'incremental' applies only newly ingested games to the running player totals, form "
+             "and Elo ratings (player totals also pick up corrected box scores), 'rebuild' resets them "
+             "for the selected seasons and replays every game (default: incremental)"
+    )
+    parser.add_argument(
+        '--write-strategy', choices=WRITE_STRATEGIES,
+        help='how game logs, shot data and team advanced stats are upserted: execute_values in one '
+             'transaction, batched commits, or COPY into a staging table and merge (default: per table)'
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, metavar='N',
+        help='run the boxscore and shot stages one season at a time, writing game logs and shot data in '
+             'committed chunks of N games (or rows), so backfills of many seasons run in bounded memory '
+             '(default: off)'
+    )
+    parser.add_argument(
+        '--chunk-by', choices=CHUNK_BY, default='game',
+        help="what --chunk-size counts: whole 'game's or 'rows' (default: game)"
+    )
+    parser.add_argument(
+        '--raw-dtypes', action='store_true',
+        help='keep the boxscore and shot frames in the dtypes the API returns instead of '
+             'categoricals and downcast integers'
+    )
+    parser.add_argument(
+        '--simulations', type=int, default=SEASON_SIMULATIONS, metavar='N',
+        help=f'seasons played out by the season_simulation stage (default: {SEASON_SIMULATIONS})'
+    )
+    parser.add_argument(
+        '--simulation-workers', type=int, default=1, metavar='N',
+        help='processes the season simulations are split over, 1 runs them in-process (default: 1)'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='maximum number of stages and fetches running at once, 1 runs serially (default: 4)'
+    )
+    parser.add_argument(
+        '--report-dir', default='run_reports',
+        help='directory the JSON run report is written to (default: run_reports)'
+    )
+    parser.add_argument(
+        '--profile', nargs='+', metavar='SPAN', default=profile_targets_from_env(),
+        help='run these spans (stages or steps such as match_opponents or classify_zones_py, or "all") '
+             f'under cProfile and tracemalloc, writing profiles next to the run report (default: ${PROFILE_ENV})'
+    )
+    parser.add_argument(
+        '--profile-top', type=int, default=20,
+        help='functions and allocation sites listed in each profile summary (default: 20)'
+    )
+    parser.add_argument(
+        '--trace-sql', action='store_true',
+        help='log every SQL statement (fingerprint, duration, rows, bytes) to a JSON-lines file next to the run report'
+    )
+    parser.add_argument(
+        '--explain-over', type=float, metavar='SECONDS',
+        help='capture EXPLAIN (ANALYZE, BUFFERS) once per statement fingerprint slower than this, '
+             'rolled back inside a savepoint'
+    )
+    parser.add_argument(
+        '--record-history', action='store_true',
+        help='also append the run report to the pipeline_run_history table'
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    require_database_url()
+    stages = [stage for stage in STAGES if stage in args.stages]
+    contexts = {
+        competition: RunContext(competition, args.seasons, args.player_stats_mode, args.write_strategy,
+                                not args.raw_dtypes, args.chunk_size, args.chunk_by,
+                                args.simulations, args.simulation_workers)
+        for competition in args.competitions
+    }
+
+    print(f"=== RUNNING {', '.join(stages)} FOR {', '.join(args.competitions)} SEASONS {args.seasons} "
+          f"WITH {args.workers} WORKERS ===")
+
+    recorder = start_run({
+        'stages': stages,
+        'competitions': args.competitions,
+        'seasons': args.seasons,
+        'workers': args.workers,
+        'player_stats_mode': args.player_stats_mode,
+        'write_strategy': args.write_strategy,
+        'lean_dtypes': not args.raw_dtypes,
+        'chunk_size': args.chunk_size,
+        'chunk_by': args.chunk_by if args.chunk_size else None,
+        'simulations': args.simulations if 'season_simulation' in stages else None,
+    }, report_dir=args.report_dir, profile_targets=args.profile, profile_top=args.profile_top,
+       trace_sql=args.trace_sql, explain_over=args.explain_over)
+    graph = build_stage_graph(stages, args.competitions)
+    runs, path = run_stage_graph(graph, contexts, workers=args.workers)
+
+    print("\n" + "=" * 80)
+    print("Tables updated:")
+    updated_tables = [
+        table.format(competition=competition)
+        for (competition, stage), run in runs.items()
+        if run['status'] == 'ok' and stage in STAGE_TABLES
+        for table in STAGE_TABLES[stage]
+    ]
+    for i, table in enumerate(updated_tables, 1):
+        print(f"{i}. {table}")
+
+    if path:
+        print(f"\nCritical path ({runs[path[-1]]['end']:.1f}s):")
+        for competition, name in path:
+            run = runs[(competition, name)]
+            print(f"  {name} [{competition}] {run['start']:.1f}s → {run['end']:.1f}s ({run['end'] - run['start']:.1f}s)")
+
+    failures = [f"{name} ({competition})" for (competition, name), run in runs.items() if run['status'] != 'ok']
+
+    report = recorder.report(
+        status='failed' if failures else 'ok',
+        nodes=[
+            {'competition': competition, 'name': name, **run}
+            for (competition, name), run in runs.items()
+        ],
+        critical_path=[f"{competition}/{name}" for competition, name in path],
+    )
+    print(f"\nRun report written to {write_run_report(report, args.report_dir)}")
+    recorder.sql_trace.close()
+    if report['sql_statements']:
+        print("\nTop SQL statements by total time:")
+        for statement in report['sql_statements'][:10]:
+            print(f"  {statement['total_s']:>8.2f}s {statement['calls']:>6} calls {statement['rows']:>9} rows "
+                  f"{statement['bytes_sent'] / 1024:>9.0f} KB  {statement['fingerprint'][:90]}")
+    profiled = [record for record in report['spans'] if 'profile' in record]
+    if profiled:
+        print(f"Profiles for {len(profiled)} spans written to {recorder.profile_dir}")
+        for record in profiled:
+            hottest = record['profile']['hot_functions'][:1]
+            if hottest:
+                print(f"  {record['path']} [{record['competition']}]: hottest {hottest[0]['function']} "
+                      f"({hottest[0]['self_s']:.2f}s self)")
+    if args.record_history:
+        try:
+            insert_run_report_to_db(report)
+        except Exception:
+            failures.append('run history')
+
+    if failures:
+        print(f"✗ Failed or skipped: {', '.join(failures)}")
+        return 1
+    print("✓ ALL SELECTED STAGES COMPLETED")
+    return 0
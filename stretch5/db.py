@@ -0,0 +1,45 @@
+import os
+import time
+
+import psycopg2
+
+from .instrumentation import InstrumentedCursor
+
+# Connection string of the pipeline database, exported by the scrape workflow from its secrets
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+def require_database_url():
+    """
+    The configured connection string, failing before any work is done when there is none
+    """
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL is not set; export the pipeline database's connection string first")
+    return DATABASE_URL
+
+def get_connection(max_retries=1, retry_delay=5, **connect_kwargs):
+    """
+    Open a connection to the pipeline database, retrying failed attempts. Cursors count
+    their round trips against the active instrumentation spans.
+    """
+    database_url = require_database_url()
+    connect_kwargs.setdefault('cursor_factory', InstrumentedCursor)
+    for attempt in range(max_retries):
+        try:
+            return psycopg2.connect(database_url, **connect_kwargs)
+        except Exception as e:
+            if max_retries == 1:
+                raise
+            print(f"Connection attempt {attempt + 1} failed: {e}")
+            if attempt < max_retries - 1:
+                print(f"Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+            else:
+                raise Exception(f"Failed to connect after {max_retries} attempts")
+
+def dataframe_to_tuples(df, columns):
+    """
+    Convert DataFrame rows into plain Python tuples with None for missing values
+    """
+    values = df[columns].astype(object)
+    values = values.where(df[columns].notna(), None)
+    return list(values.itertuples(index=False, name=None))
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+BOXSCORE_COUNTERS = [
+    'Points', 'FieldGoalsMade2', 'FieldGoalsAttempted2', 'FieldGoalsMade3', 'FieldGoalsAttempted3',
+    'FreeThrowsMade', 'FreeThrowsAttempted', 'OffensiveRebounds', 'DefensiveRebounds', 'TotalRebounds',
+    'Assistances', 'Steals', 'Turnovers', 'BlocksFavour', 'BlocksAgainst', 'FoulsCommited',
+    'FoulsReceived', 'Valuation',
+]
+
+# Column dtypes per raw API frame. Counters never go below int16: the transforms add
+# them together row by row (team totals, possessions), which would wrap in int8.
+FRAME_DTYPES = {
+    'boxscores': {
+        'category': ['Phase', 'Player_ID', 'Team', 'Player', 'Minutes'],
+        'integer': ['Season', 'Round', 'Gamecode', 'Home'] + BOXSCORE_COUNTERS,
+        'float32': ['IsStarter', 'IsPlaying', 'Dorsal', 'Plusminus'],
+    },
+    'shots': {
+        'category': [
+            'Phase', 'TEAM', 'ID_PLAYER', 'PLAYER', 'ID_ACTION', 'ACTION', 'ZONE',
+            'FASTBREAK', 'SECOND_CHANCE', 'POINTS_OFF_TURNOVER', 'CONSOLE',
+        ],
+        'integer': ['Season', 'Round', 'Gamecode', 'NUM_ANOT', 'POINTS', 'MINUTE', 'POINTS_A', 'POINTS_B'],
+        # Court coordinates are centimetres within +-1500, free throws have none
+        'Int16': ['COORD_X', 'COORD_Y'],
+    },
+}
+
+INTEGER_FLOORS = {col: np.int16 for col in BOXSCORE_COUNTERS + ['POINTS', 'POINTS_A', 'POINTS_B']}
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def _downcast_integer(series, floor=np.int8):
+    numeric = pd.to_numeric(series, errors='coerce')
+    # Leave columns with gaps or fractions alone rather than change their values
+    if numeric.isna().any() or not np.array_equal(numeric, numeric.round()):
+        return series
+    downcast = pd.to_numeric(numeric.astype(np.int64), downcast='integer')
+    return downcast.astype(np.promote_types(downcast.dtype, floor))
+
+def optimize_dtypes(df, kind):
+    """
+    Return a copy of a raw API frame with repeated strings as categoricals, integer columns
+    downcast and coordinates as nullable int16. Columns that do not fit are left unchanged.
+    """
+    if df.empty:
+        return df
+    spec = FRAME_DTYPES[kind]
+    df = df.copy()
+
+    for col in spec.get('category', []):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    for col in spec.get('integer', []):
+        if col in df.columns:
+            df[col] = _downcast_integer(df[col], INTEGER_FLOORS.get(col, np.int8))
+
+    for col in spec.get('float32', []):
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce')
+            if values.isna().sum() == df[col].isna().sum():
+                df[col] = values.astype(np.float32)
+
+    for col in spec.get('Int16', []):
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce').round()
+            if values.isna().sum() == df[col].isna().sum() and values.abs().max() < np.iinfo(np.int16).max:
+                df[col] = values.astype('Int16')
+
+    return df
@@ -0,0 +1,317 @@
+import pandas as pd
+from .db import get_connection
+from .streaming import iter_chunks, stream_upsert
+from .writes import upsert_rows
+
+# Handle GameSequence differently for Team and Total rows
+def calculate_game_sequence(df):
+    # For regular players, calculate sequence as before
+    player_mask = ~df['Player_ID'].isin(['Team', 'Total'])
+    df.loc[player_mask, 'GameSequence'] = df[player_mask].groupby('Player_ID', observed=True).cumcount() + 1
+
+    # For Team and Total rows, set GameSequence to None or 0
+    df.loc[~player_mask, 'GameSequence'] = None
+
+    return df
+
+def prepare_game_logs(boxscore_data, sequence_offsets=None):
+    """
+    Build the game logs frame from boxscore data, keeping Team and Total rows.
+    When seasons are prepared one at a time, newest first, pass the same sequence_offsets
+    dict each time: it carries every player's game count from the newer seasons so
+    GameSequence matches preparing all seasons together.
+    """
+    game_logs = boxscore_data.sort_values(['Player', 'Season', 'Round'], ascending=[True, False, False])
+    game_logs = calculate_game_sequence(game_logs)
+
+    if sequence_offsets is not None:
+        player_mask = game_logs['GameSequence'].notna()
+        players = game_logs.loc[player_mask, 'Player_ID'].astype(str)
+        game_logs.loc[player_mask, 'GameSequence'] += players.map(sequence_offsets).fillna(0).to_numpy()
+        for player, games in players.value_counts().items():
+            sequence_offsets[player] = sequence_offsets.get(player, 0) + games
+
+    # Create a season-round identifier for easier reference
+    game_logs['SeasonRound'] = game_logs['Season'].astype(str) + '-' + game_logs['Round'].astype(str)
+
+    return game_logs
+
+GAME_LOG_COLUMNS = [
+    'season', 'phase', 'round', 'gamecode', 'home', 'player_id', 'is_starter', 'is_playing',
+    'team', 'dorsal', 'player', 'minutes', 'points', 'field_goals_made_2', 'field_goals_attempted_2',
+    'field_goals_made_3', 'field_goals_attempted_3', 'free_throws_made', 'free_throws_attempted',
+    'offensive_rebounds', 'defensive_rebounds', 'total_rebounds', 'assistances', 'steals',
+    'turnovers', 'blocks_favour', 'blocks_against', 'fouls_commited', 'fouls_received',
+    'valuation', 'plusminus', 'game_sequence', 'season_round', 'row_type', 'row_number',
+]
+
+def add_row_numbers(game_logs_df):
+    """
+    Copy of the game logs with a row_number telling apart multiple Team/Total entries per game
+    """
+    game_logs_df = game_logs_df.copy()
+    game_logs_df['row_number'] = game_logs_df.groupby(['Player_ID', 'Gamecode', 'Season', 'Team'], observed=True).cumcount() + 1
+    return game_logs_df
+
+def create_game_logs_table(cursor, table_name):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        id SERIAL PRIMARY KEY,
+        season INTEGER,
+        phase TEXT,
+        round INTEGER,
+        gamecode TEXT,
+        home INTEGER,
+        player_id TEXT,
+        is_starter REAL,
+        is_playing REAL,
+        team TEXT,
+        dorsal INTEGER,
+        player TEXT,
+        minutes TEXT,
+        points INTEGER,
+        field_goals_made_2 INTEGER,
+        field_goals_attempted_2 INTEGER,
+        field_goals_made_3 INTEGER,
+        field_goals_attempted_3 INTEGER,
+        free_throws_made INTEGER,
+        free_throws_attempted INTEGER,
+        offensive_rebounds INTEGER,
+        defensive_rebounds INTEGER,
+        total_rebounds INTEGER,
+        assistances INTEGER,
+        steals INTEGER,
+        turnovers INTEGER,
+        blocks_favour INTEGER,
+        blocks_against INTEGER,
+        fouls_commited INTEGER,
+        fouls_received INTEGER,
+        valuation INTEGER,
+        plusminus REAL,
+        game_sequence INTEGER,
+        season_round TEXT,
+        row_type TEXT DEFAULT 'player',
+        row_number INTEGER DEFAULT 1,
+        UNIQUE(player_id, gamecode, season, team, row_number)
+    );
+    """)
+
+def game_log_rows(game_logs_df):
+    """
+    Database tuples (in GAME_LOG_COLUMNS order) for game logs with row numbers
+    """
+    # Helper functions with better handling for Team/Total rows
+    def safe_int(val):
+        if pd.isna(val) or val == 'DNP' or val == 'None':
+            return None
+        try:
+            return int(float(val))  # Convert to float first to handle string numbers
+        except (ValueError, TypeError):
+            return None
+
+    def safe_float(val):
+        if pd.isna(val) or val == 'None':
+            return None
+        try:
+            return float(val)
+        except (ValueError, TypeError):
+            return None
+
+    def safe_str(val):
+        if pd.isna(val) or val == 'None':
+            return None
+        return str(val)
+
+    # Build the data tuples from the DataFrame with better error handling
+    data_tuples = []
+    for idx, row in game_logs_df.iterrows():
+        try:
+            # Determine row type
+            if row["Player_ID"] == 'Team':
+                row_type = 'team'
+            elif row["Player_ID"] == 'Total':
+                row_type = 'total'
+            else:
+                row_type = 'player'
+
+            data_tuples.append((
+                safe_int(row["Season"]),
+                safe_str(row["Phase"]),
+                safe_int(row["Round"]),
+                safe_str(row["Gamecode"]),
+                safe_int(row["Home"]),
+                safe_str(row["Player_ID"]),
+                safe_float(row["IsStarter"]),
+                safe_float(row["IsPlaying"]),
+                safe_str(row["Team"]),
+                safe_int(row["Dorsal"]),
+                safe_str(row["Player"]),
+                safe_str(row["Minutes"]),
+                safe_int(row["Points"]),
+                safe_int(row["FieldGoalsMade2"]),
+                safe_int(row["FieldGoalsAttempted2"]),
+                safe_int(row["FieldGoalsMade3"]),
+                safe_int(row["FieldGoalsAttempted3"]),
+                safe_int(row["FreeThrowsMade"]),
+                safe_int(row["FreeThrowsAttempted"]),
+                safe_int(row["OffensiveRebounds"]),
+                safe_int(row["DefensiveRebounds"]),
+                safe_int(row["TotalRebounds"]),
+                safe_int(row["Assistances"]),
+                safe_int(row["Steals"]),
+                safe_int(row["Turnovers"]),
+                safe_int(row["BlocksFavour"]),
+                safe_int(row["BlocksAgainst"]),
+                safe_int(row["FoulsCommited"]),
+                safe_int(row["FoulsReceived"]),
+                safe_int(row["Valuation"]),
+                safe_float(row["Plusminus"]),
+                safe_int(row["GameSequence"]),
+                safe_str(row["SeasonRound"]),
+                row_type,
+                safe_int(row["row_number"])
+            ))
+        except Exception as e:
+            print(f"Error processing row {idx}: {e}")
+            print(f"Row data: {row.to_dict()}")
+            continue
+    return data_tuples
+
+def insert_euroleague_game_logs_to_db(game_logs_df, table_name='eurocup_game_logs', write_strategy='values', **write_options):
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # 1. Print local DataFrame info
+        print(f"Local DataFrame has {len(game_logs_df)} rows")
+
+        # Check distribution of Player_ID types
+        team_count = (game_logs_df['Player_ID'] == 'Team').sum()
+        total_count = (game_logs_df['Player_ID'] == 'Total').sum()
+        regular_count = len(game_logs_df) - team_count - total_count
+
+        print(f"Regular players: {regular_count}, Team rows: {team_count}, Total rows: {total_count}")
+
+        # 2. Check for duplicates and create a unique identifier
+        # Add a row number to handle multiple Team/Total entries per game
+        game_logs_df = add_row_numbers(game_logs_df)
+
+        duplicates = game_logs_df.groupby(['Player_ID', 'Gamecode', 'Season', 'Team', 'row_number'], observed=True).size()
+        duplicates = duplicates[duplicates > 1]
+        if len(duplicates) > 0:
+            print(f"Warning: Found {len(duplicates)} duplicate combinations after adding row_number")
+
+        create_game_logs_table(cursor, table_name)
+        conn.commit()
+
+        seasons_to_process = list(game_logs_df['Season'].unique())
+        if seasons_to_process:
+            seasons_str = ','.join(map(str, seasons_to_process))
+            cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+            deleted_count = cursor.rowcount
+            conn.commit()
+            print(f"Deleted {deleted_count} existing records for seasons: {seasons_to_process}")
+
+        # 4. Check current row count
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        before_count = cursor.fetchone()[0]
+        print(f"Rows in database before insert: {before_count}")
+
+        # 5. Build the data tuples
+        data_tuples = game_log_rows(game_logs_df)
+
+        print(f"Prepared {len(data_tuples)} tuples for insertion")
+
+        # 7. Upsert with the selected write strategy
+        write_stats = upsert_rows(
+            conn, cursor, table_name, GAME_LOG_COLUMNS, data_tuples,
+            ['player_id', 'gamecode', 'season', 'team', 'row_number'],
+            strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} rows in {write_stats['transactions']} transactions "
+              f"({write_stats['transaction_s']:.2f}s)")
+
+        # 8. Check final row count
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        after_count = cursor.fetchone()[0]
+        print(f"Rows in database after insert: {after_count}")
+
+        # 9. Verify data integrity by row type
+        cursor.execute(f"SELECT row_type, COUNT(*) FROM {table_name} GROUP BY row_type;")
+        row_type_counts = cursor.fetchall()
+        print("Row counts by type:")
+        for row_type, count in row_type_counts:
+            print(f"  {row_type}: {count}")
+
+        # 10. Show some sample data including Team and Total rows
+        cursor.execute(f"""
+            SELECT player_id, player, team, season, round, points, total_rebounds, assistances, row_type, row_number
+            FROM {table_name}
+            WHERE row_type IN ('team', 'total')
+            ORDER BY season DESC, round DESC, team, row_type
+            LIMIT 10;
+        """)
+        sample_team_total = cursor.fetchall()
+        print("\nSample Team/Total data:")
+        for row in sample_team_total:
+            print(f"ID: {row[0]}, Player: {row[1]}, Team: {row[2]}, Season: {row[3]}, Round: {row[4]}, Points: {row[5]}, Rebounds: {row[6]}, Assists: {row[7]}, Type: {row[8]}, Row#: {row[9]}")
+
+        cursor.execute(f"""
+            SELECT player_id, player, team, season, round, points, total_rebounds, assistances, row_type 
+            FROM {table_name}
+            WHERE row_type = 'player'
+            ORDER BY season DESC, round DESC 
+            LIMIT 3;
+        """)
+        sample_players = cursor.fetchall()
+        print("\nSample Player data:")
+        for row in sample_players:
+            print(f"ID: {row[0]}, Player: {row[1]}, Team: {row[2]}, Season: {row[3]}, Round: {row[4]}, Points: {row[5]}, Rebounds: {row[6]}, Assists: {row[7]}, Type: {row[8]}")
+
+        print(f"\nGame logs data (including Team and Total rows) inserted successfully!")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during database operation: {e}")
+        conn.rollback()
+        raise
+    finally:
+        # Close connections
+        cursor.close()
+        conn.close()
+
+def stream_game_logs_to_db(frames, table_name='eurocup_game_logs', chunk_size=50, chunk_by='game',
+                           max_pending=2, write_strategy='values', **write_options):
+    """
+    Write game logs from an iterable of frames (e.g. one season at a time) in chunks of
+    chunk_size games or rows, each chunk committed on its own. Only the frame being read
+    and max_pending prepared chunks are held in memory.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        create_game_logs_table(cursor, table_name)
+        conn.commit()
+
+        # Row numbers only depend on the rows of one game, so each frame is numbered on its own
+        chunks = iter_chunks((add_row_numbers(df) for df in frames), chunk_size, chunk_by)
+        write_stats = stream_upsert(
+            conn, cursor, table_name, GAME_LOG_COLUMNS,
+            ['player_id', 'gamecode', 'season', 'team', 'row_number'],
+            chunks, game_log_rows, max_pending=max_pending, strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} rows in {write_stats['chunks']} chunks and "
+              f"{write_stats['transactions']} transactions ({write_stats['transaction_s']:.2f}s)")
+
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        print(f"Rows in database after insert: {cursor.fetchone()[0]}")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during streamed write to {table_name}: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
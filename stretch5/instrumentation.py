@@ -0,0 +1,317 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+import psycopg2.extensions
+
+from .profiling import StageProfiler
+from .sql_trace import SqlTrace
+
+_local = threading.local()
+_runs_lock = threading.Lock()
+_active_run = None
+
+def _peak_rss_mb():
+    # Process high-water mark; ru_maxrss is reported in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _current_rss_mb():
+    # Resident set size right now, None where /proc is not available
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+# How often resident memory is read while spans are open
+RSS_SAMPLE_INTERVAL_S = 0.01
+
+class _RssSampler:
+    """
+    Reads resident memory on a background thread while any span is open and keeps the
+    highest reading of each open span. The thread runs only while spans are open.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.spans = set()
+        self.stop = None
+
+    def add(self, span, rss):
+        span.peak_rss_mb = rss
+        if rss is None:
+            return
+        with self.lock:
+            self.spans.add(span)
+            if self.stop is None:
+                self.stop = threading.Event()
+                threading.Thread(target=self._run, args=(self.stop,), name='rss-sampler', daemon=True).start()
+
+    def remove(self, span, rss):
+        with self.lock:
+            self.spans.discard(span)
+            if not self.spans and self.stop is not None:
+                self.stop.set()
+                self.stop = None
+            if span.peak_rss_mb is not None and rss is not None:
+                span.peak_rss_mb = max(span.peak_rss_mb, rss)
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            rss = _current_rss_mb()
+            if rss is None:
+                continue
+            with self.lock:
+                for span in self.spans:
+                    span.peak_rss_mb = max(span.peak_rss_mb, rss)
+
+_rss_sampler = _RssSampler()
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+def _active_spans():
+    if not hasattr(_local, 'spans'):
+        _local.spans = []
+    return _local.spans
+
+class Span:
+    """
+    Measurements for one instrumented step. DB counters are filled in by
+    InstrumentedCursor for every span open on the calling thread.
+    """
+
+    def __init__(self, name, competition=None, rows_in=None):
+        parent = _active_spans()[-1] if _active_spans() else None
+        self.name = name
+        self.competition = competition or (parent.competition if parent else None)
+        self.path = f"{parent.path}/{name}" if parent else name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.db_round_trips = 0
+        self.db_bytes_sent = 0
+        self.db_rows = 0
+        self.status = 'ok'
+        self.profile = None
+        # Step-specific measurements, such as frame memory, added to the record as they are
+        self.extra = {}
+
+    def record(self):
+        return {
+            'name': self.name,
+            'path': self.path,
+            'competition': self.competition,
+            'status': self.status,
+            'start_s': round(self.start, 3),
+            'wall_s': round(self.wall, 3),
+            'cpu_s': round(self.cpu, 3),
+            'rss_mb': _round(self.rss_mb, 1),
+            'peak_rss_mb': _round(self.peak_rss_mb, 1),
+            'peak_growth_mb': _round(self.peak_growth_mb, 1),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'db_round_trips': self.db_round_trips,
+            'db_bytes_sent': self.db_bytes_sent,
+            'db_rows': self.db_rows,
+            **self.extra,
+            **({'profile': self.profile} if self.profile else {}),
+        }
+
+class RunRecorder:
+    """
+    Collects finished spans for one pipeline run
+    """
+
+    def __init__(self, metadata=None, report_dir='run_reports', profile_targets=(), profile_top=20,
+                 trace_sql=False, explain_over=None):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc)
+        self.name = f"run_{self.started_at:%Y-%m-%dT%H%M%S}_{self.run_id}"
+        self.metadata = metadata or {}
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.profile_dir = os.path.join(report_dir, f"{self.name}_profiles")
+        self.profile_targets = set(profile_targets)
+        self.profile_top = profile_top
+        if trace_sql:
+            os.makedirs(report_dir, exist_ok=True)
+        self.sql_trace = SqlTrace(
+            os.path.join(report_dir, f"{self.name}_sql.jsonl") if trace_sql else None,
+            explain_over
+        )
+
+    def profiles(self, name):
+        return 'all' in self.profile_targets or name in self.profile_targets
+
+    def add(self, span):
+        with _runs_lock:
+            self.spans.append(span.record())
+
+    def report(self, **extra):
+        return {
+            'run_id': self.run_id,
+            'run_name': self.name,
+            'started_at': self.started_at.isoformat(),
+            'wall_s': round(time.perf_counter() - self.origin, 3),
+            'peak_rss_mb': round(_peak_rss_mb(), 1),
+            **self.metadata,
+            **extra,
+            'sql_statements': self.sql_trace.top(),
+            'spans': sorted(self.spans, key=lambda record: record['start_s']),
+        }
+
+def start_run(metadata=None, **options):
+    """
+    Start recording spans for a new run and return its recorder
+    """
+    global _active_run
+    _active_run = RunRecorder(metadata, **options)
+    return _active_run
+
+@contextmanager
+def span(name, competition=None, rows_in=None):
+    """
+    Measure wall time, thread CPU time, resident memory and DB traffic of a block. Memory is
+    the RSS at the end of the block and the highest RSS sampled while it ran, also as growth
+    over the RSS at its start, so memory allocated and freed inside the block still shows.
+    RSS is process-wide, so with parallel workers it includes concurrent stages.
+    Spans selected for profiling also run under cProfile and tracemalloc.
+    """
+    current = Span(name, competition, rows_in)
+    origin = _active_run.origin if _active_run else time.perf_counter()
+    profiler = None
+    if _active_run and _active_run.profiles(name):
+        profiler = StageProfiler(_active_run.profile_top)
+        if not profiler.start():
+            profiler = None
+    current.start = time.perf_counter() - origin
+    rss_before = _current_rss_mb()
+    _rss_sampler.add(current, rss_before)
+    cpu_before = time.thread_time()
+    _active_spans().append(current)
+    try:
+        yield current
+    except BaseException:
+        current.status = 'failed'
+        raise
+    finally:
+        _active_spans().pop()
+        current.cpu = time.thread_time() - cpu_before
+        current.wall = time.perf_counter() - origin - current.start
+        current.rss_mb = _current_rss_mb()
+        _rss_sampler.remove(current, current.rss_mb)
+        if profiler:
+            stem = '.'.join(filter(None, [current.competition, *current.path.split('/')]))
+            current.profile = profiler.stop(_active_run.profile_dir, stem)
+        current.peak_growth_mb = None if rss_before is None else current.peak_rss_mb - rss_before
+        if current.rows_out is None:
+            current.rows_out = current.db_rows or None
+        if _active_run:
+            _active_run.add(current)
+
+def measured(func, *args, **kwargs):
+    """
+    Call func inside a span named after it. Rows in is the length of the first DataFrame
+    argument, rows out the length of a returned DataFrame (or the rows written to the DB).
+    """
+    frames = [arg for arg in args if isinstance(arg, pd.DataFrame)]
+    with span(func.__name__, rows_in=len(frames[0]) if frames else None) as current:
+        result = func(*args, **kwargs)
+        if isinstance(result, pd.DataFrame):
+            current.rows_out = len(result)
+        return result
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """
+    Cursor that times every statement, counts round trips, bytes sent and rows affected
+    against the spans open on the current thread, and feeds the run's SQL trace
+    """
+
+    def _count(self, sql, started, sent):
+        duration = time.perf_counter() - started
+        rows = max(self.rowcount, 0)
+        spans = _active_spans()
+        for open_span in spans:
+            open_span.db_round_trips += 1
+            open_span.db_bytes_sent += sent
+            open_span.db_rows += rows
+        if _active_run and sql:
+            _active_run.sql_trace.record(self, sql, duration, rows, sent, spans[-1].path if spans else None)
+
+    # Only statements that succeeded are counted and traced: after a failure the transaction
+    # is aborted, and an EXPLAIN issued on it would replace the real error with its own
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        self._count(self.query, started, len(self.query or b''))
+        return result
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        result = super().executemany(query, vars_list)
+        self._count(self.query, started, len(self.query or b''))
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        result = super().copy_expert(sql, file, size)
+        sent = file.tell() if hasattr(file, 'tell') else 0
+        self._count(sql, started, len(sql) + sent)
+        return result
+
+def write_run_report(report, report_dir):
+    """
+    Write the run report as JSON and return its path
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"{report['run_name']}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
+def insert_run_report_to_db(report):
+    """
+    Append the run report to the pipeline_run_history table
+    """
+    from .db import get_connection
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_run_history (
+            run_id TEXT PRIMARY KEY,
+            started_at TIMESTAMPTZ NOT NULL,
+            wall_seconds FLOAT,
+            peak_rss_mb FLOAT,
+            status TEXT,
+            report JSONB
+        )
+        """)
+        cursor.execute("""
+        INSERT INTO pipeline_run_history (run_id, started_at, wall_seconds, peak_rss_mb, status, report)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            report['run_id'], report['started_at'], report['wall_s'], report['peak_rss_mb'],
+            report['status'], json.dumps(report, default=str)
+        ))
+        conn.commit()
+        print(f"Recorded run {report['run_id']} in pipeline_run_history")
+    except Exception as e:
+        print(f"Error recording run history: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+from .aggregation import factorize_groups, grouped_reduce
+from .db import dataframe_to_tuples, get_connection
+from .player_stats import filter_player_game_logs
+from .team_stats import ratings_from_totals, team_counting_stats
+from .writes import upsert_rows
+
+PLAYER_ADVANCED_COLUMNS = [
+    'season', 'phase', 'player_id', 'player_name', 'player_team_code', 'games_played', 'total_minutes',
+    'usage_rate', 'true_shooting_percentage', 'effective_fg_percentage', 'assist_percentage',
+    'offensive_rebound_percentage', 'defensive_rebound_percentage', 'total_rebound_percentage',
+    'steal_percentage', 'block_percentage',
+]
+
+# Summed per player group; every metric is a ratio of two of these. The team_* terms are the
+# team's (or opponent's) game totals scaled by the player's share of the minutes on court.
+ADVANCED_SUMS = [
+    'games', 'minutes', 'points', 'fgm', 'fga', 'fgm3', 'fta', 'to', 'ast', 'oreb', 'dreb', 'treb', 'stl', 'blk',
+    'team_plays', 'team_fgm', 'team_oreb_chances', 'team_dreb_chances', 'team_treb_chances',
+    'opp_possessions', 'opp_fga2',
+]
+
+# The on-court share metrics divide by team totals scaled to the player's minutes, so a
+# player with a few seconds gets rates in the thousands. They are left empty below this
+# many minutes per player group.
+PLAYER_ADVANCED_MIN_MINUTES = 10
+
+# Metrics measured against the team totals scaled by the player's minutes
+PLAYER_SHARE_COLUMNS = [
+    'usage_rate', 'assist_percentage', 'offensive_rebound_percentage', 'defensive_rebound_percentage',
+    'total_rebound_percentage', 'steal_percentage', 'block_percentage',
+]
+
+def decimal_minutes(minutes):
+    """
+    Decimal minutes from 'MM:SS' strings, NaN where there are none
+    """
+    parts = minutes.astype(str).str.split(':', n=1, expand=True).reindex(columns=[0, 1])
+    return pd.to_numeric(parts[0], errors='coerce') + pd.to_numeric(parts[1], errors='coerce').fillna(0) / 60
+
+def team_game_totals(df_with_opponents):
+    """
+    Per team game totals the player shares are measured against, keyed by season, gamecode and team
+    """
+    counting = team_counting_stats(df_with_opponents)
+    value = lambda col: pd.to_numeric(df_with_opponents[col], errors='coerce').fillna(0).to_numpy(dtype=float)
+    return pd.DataFrame({
+        'Season': df_with_opponents['Season'].astype(int),
+        'Gamecode': df_with_opponents['Gamecode'].astype(str),
+        'Team': df_with_opponents['Team'].astype(str),
+        'team_minutes': decimal_minutes(df_with_opponents['Minutes']),
+        'team_fgm': counting['fgm'],
+        'team_plays': counting['fga'] + 0.44 * counting['fta'] + counting['to'],
+        'team_oreb_chances': counting['oreb'] + counting['opp_dreb'],
+        'team_dreb_chances': counting['dreb'] + counting['opp_oreb'],
+        'team_treb_chances': value('TotalRebounds') + value('opp_treb'),
+        'opp_possessions': ratings_from_totals(counting, 1)['opp_possessions'],
+        'opp_fga2': counting['opp_fga'] - value('opp_3pa'),
+    })
+
+def calculate_player_advanced_stats(game_logs_df, df_with_opponents):
+    """
+    Usage, shooting efficiency and on-court shares of every player per season and phase,
+    plus the 'All' rollup. Each game log row is joined to its team's game totals in one
+    merge, weighted by the player's share of the team minutes, and summed per group.
+    The share metrics are NaN for groups under PLAYER_ADVANCED_MIN_MINUTES.
+    """
+    logs = filter_player_game_logs(game_logs_df)
+    if logs.empty or len(df_with_opponents) == 0:
+        return pd.DataFrame(columns=PLAYER_ADVANCED_COLUMNS)
+
+    logs = pd.DataFrame({
+        'Season': logs['Season'].astype(int),
+        'Gamecode': logs['Gamecode'].astype(str),
+        'Team': logs['Team'].astype(str),
+        'Phase': logs['Phase'].astype(str),
+        'Player_ID': logs['Player_ID'].astype(str),
+        'Player': logs['Player'].astype(str),
+        'minutes': decimal_minutes(logs['Minutes']),
+        **{col: logs[col] for col in [
+            'Points', 'FieldGoalsMade2', 'FieldGoalsAttempted2', 'FieldGoalsMade3', 'FieldGoalsAttempted3',
+            'FreeThrowsAttempted', 'Turnovers', 'Assistances', 'OffensiveRebounds', 'DefensiveRebounds',
+            'TotalRebounds', 'Steals', 'BlocksFavour',
+        ]},
+    }).merge(team_game_totals(df_with_opponents), on=['Season', 'Gamecode', 'Team'], how='inner', validate='many_to_one')
+
+    value = lambda col: pd.to_numeric(logs[col], errors='coerce').fillna(0).to_numpy(dtype=float)
+    minutes = value('minutes')
+    team_minutes = value('team_minutes')
+    # Fraction of the team's five on-court slots the player filled
+    share = np.divide(minutes * 5, team_minutes, out=np.zeros(len(logs)), where=team_minutes > 0)
+    fgm = value('FieldGoalsMade2') + value('FieldGoalsMade3')
+    fga = value('FieldGoalsAttempted2') + value('FieldGoalsAttempted3')
+    sums = {
+        'games': np.ones(len(logs)),
+        'minutes': minutes,
+        'points': value('Points'),
+        'fgm': fgm,
+        'fga': fga,
+        'fgm3': value('FieldGoalsMade3'),
+        'fta': value('FreeThrowsAttempted'),
+        'to': value('Turnovers'),
+        'ast': value('Assistances'),
+        'oreb': value('OffensiveRebounds'),
+        'dreb': value('DefensiveRebounds'),
+        'treb': value('TotalRebounds'),
+        'stl': value('Steals'),
+        'blk': value('BlocksFavour'),
+        # Assists can only go to teammates' field goals
+        'team_fgm': share * value('team_fgm') - fgm,
+        **{col: share * value(col) for col in [
+            'team_plays', 'team_oreb_chances', 'team_dreb_chances', 'team_treb_chances', 'opp_possessions', 'opp_fga2',
+        ]},
+    }
+    values = np.column_stack([sums[col] for col in ADVANCED_SUMS])
+
+    season = logs['Season'].to_numpy()
+    phase = np.where(logs['Phase'].isin(['RS', 'TS']), 'Regular Season', 'Playoffs')
+    player_id = logs['Player_ID'].to_numpy()
+    team = logs['Team'].to_numpy()
+    name_codes, name_values = pd.factorize(logs['Player'], sort=True)
+
+    group_index, _ = factorize_groups([season, phase, player_id, team])
+    group_sums, first_rows = grouped_reduce(group_index, values)
+    max_names, _ = grouped_reduce(group_index, name_codes, np.maximum)
+
+    # The 'All' rollup adds up the phase sums, the ratios are taken afterwards
+    rollup_index, _ = factorize_groups([season[first_rows], player_id[first_rows], team[first_rows]])
+    rollup_sums, rollup_first = grouped_reduce(rollup_index, group_sums)
+    rollup_names, _ = grouped_reduce(rollup_index, max_names, np.maximum)
+    rollup_rows = first_rows[rollup_first]
+
+    t = dict(zip(ADVANCED_SUMS, np.vstack([group_sums, rollup_sums]).T))
+
+    def ratio(numerator, denominator):
+        return np.divide(numerator * 100, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+    stats = pd.DataFrame({
+        'season': np.concatenate([season[first_rows], season[rollup_rows]]),
+        'phase': np.concatenate([phase[first_rows], np.full(len(rollup_rows), 'All')]),
+        'player_id': np.concatenate([player_id[first_rows], player_id[rollup_rows]]),
+        'player_name': np.asarray(name_values)[np.concatenate([max_names, rollup_names])],
+        'player_team_code': np.concatenate([team[first_rows], team[rollup_rows]]),
+        'games_played': t['games'].astype(np.int64),
+        # Decimal minutes from MM:SS, unlike the per game minutes_played of the season stats
+        'total_minutes': t['minutes'],
+        'usage_rate': ratio(t['fga'] + 0.44 * t['fta'] + t['to'], t['team_plays']),
+        'true_shooting_percentage': ratio(t['points'], 2 * (t['fga'] + 0.44 * t['fta'])),
+        'effective_fg_percentage': ratio(t['fgm'] + 0.5 * t['fgm3'], t['fga']),
+        'assist_percentage': ratio(t['ast'], t['team_fgm']),
+        'offensive_rebound_percentage': ratio(t['oreb'], t['team_oreb_chances']),
+        'defensive_rebound_percentage': ratio(t['dreb'], t['team_dreb_chances']),
+        'total_rebound_percentage': ratio(t['treb'], t['team_treb_chances']),
+        'steal_percentage': ratio(t['stl'], t['opp_possessions']),
+        'block_percentage': ratio(t['blk'], t['opp_fga2']),
+    })
+    stats.loc[stats['total_minutes'] < PLAYER_ADVANCED_MIN_MINUTES, PLAYER_SHARE_COLUMNS] = np.nan
+    return stats[PLAYER_ADVANCED_COLUMNS].sort_values(['season', 'phase', 'player_id'], ignore_index=True)
+
+def insert_player_advanced_stats_to_db(stats_df, competition, write_strategy='values', **write_options):
+    """
+    Insert player advanced metrics for a competition, replacing the seasons present in the data
+    """
+    if stats_df.empty:
+        print(f"No player advanced stats to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"player_advanced_stats_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            player_name TEXT,
+            player_team_code TEXT NOT NULL,
+            games_played INTEGER,
+            total_minutes DECIMAL(8,2),
+            usage_rate DOUBLE PRECISION,
+            true_shooting_percentage DOUBLE PRECISION,
+            effective_fg_percentage DOUBLE PRECISION,
+            assist_percentage DOUBLE PRECISION,
+            offensive_rebound_percentage DOUBLE PRECISION,
+            defensive_rebound_percentage DOUBLE PRECISION,
+            total_rebound_percentage DOUBLE PRECISION,
+            steal_percentage DOUBLE PRECISION,
+            block_percentage DOUBLE PRECISION,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(season, phase, player_id, player_team_code)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(stats_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        rows = dataframe_to_tuples(stats_df.round(2), PLAYER_ADVANCED_COLUMNS)
+        write_stats = upsert_rows(
+            conn, cursor, table_name, PLAYER_ADVANCED_COLUMNS, rows,
+            ['season', 'phase', 'player_id', 'player_team_code'],
+            strategy=write_strategy, extra_updates=['updated_at = CURRENT_TIMESTAMP'], **write_options
+        )
+        print(f"Upserted {write_stats['rows']} player/team/phase rows into {table_name}")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error inserting player advanced stats: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from .aggregation import factorize_groups
+from .db import dataframe_to_tuples, get_connection
+from .player_stats import filter_player_game_logs, season_game_keys
+from .writes import upsert_rows
+
+FORM_WINDOWS = (5, 10)
+
+# Game log columns averaged over each window, keyed by their form column
+FORM_STAT_COLUMNS = {
+    'points_scored': 'Points',
+    'total_rebounds': 'TotalRebounds',
+    'assists': 'Assistances',
+    'steals': 'Steals',
+    'turnovers': 'Turnovers',
+    'blocks': 'BlocksFavour',
+    'three_pointers_made': 'FieldGoalsMade3',
+    'pir': 'Valuation',
+}
+
+FORM_WINDOW_COLUMNS = [
+    col
+    for window in FORM_WINDOWS
+    for col in (
+        [f'games_l{window}', f'minutes_l{window}']
+        + [f'{stat}_l{window}' for stat in FORM_STAT_COLUMNS]
+        + [f'{stat}_per_40_l{window}' for stat in FORM_STAT_COLUMNS]
+    )
+]
+
+PLAYER_FORM_HISTORY_COLUMNS = [
+    'season', 'phase', 'round', 'gamecode', 'player_id', 'player_name', 'team', 'game_sequence', 'minutes',
+] + FORM_WINDOW_COLUMNS
+
+PLAYER_FORM_CURRENT_COLUMNS = [
+    'season', 'player_id', 'player_name', 'team', 'last_round', 'last_gamecode', 'games_played',
+] + FORM_WINDOW_COLUMNS
+
+def rolling_group_sums(group_index, values, window):
+    """
+    Sum of each row and the window - 1 rows before it within its group, for rows already
+    sorted by group and then in order. One cumulative sum for every group at once.
+    Returns the sums and the number of rows each one covers.
+    """
+    positions = np.arange(len(group_index))
+    group_starts = np.flatnonzero(np.diff(group_index, prepend=-1))
+    starts = group_starts[np.searchsorted(group_starts, positions, side='right') - 1]
+    first = np.maximum(positions + 1 - window, starts)
+
+    cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    return cumulative[positions + 1] - cumulative[first], positions + 1 - first
+
+def calculate_player_form(game_logs_df, windows=FORM_WINDOWS):
+    """
+    Last-N-games averages and per 40 minute rates after every game a player got on the
+    court, within each season. Games are put in order by GameSequence (1 is a player's
+    latest game), so a window spans both phases.
+    """
+    logs = filter_player_game_logs(game_logs_df)
+    logs = logs[logs['GameSequence'].notna()]
+    if logs.empty:
+        return pd.DataFrame(columns=PLAYER_FORM_HISTORY_COLUMNS)
+
+    season = logs['Season'].astype(int).to_numpy()
+    player_id = logs['Player_ID'].astype(str).to_numpy()
+    sequence = pd.to_numeric(logs['GameSequence']).to_numpy(dtype=np.int64)
+    group_index, _ = factorize_groups([season, player_id])
+    # Oldest game first within each player-season
+    order = np.lexsort((-sequence, group_index))
+
+    # Same conversion as the season aggregates, so form and season per 40 rates compare
+    minutes = pd.to_numeric(logs['Minutes'].astype(str).str.replace(':', '.', regex=False), errors='coerce')
+    values = np.column_stack(
+        [minutes.to_numpy(dtype=np.float64, na_value=np.nan)]
+        + [pd.to_numeric(logs[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+           for col in FORM_STAT_COLUMNS.values()]
+    )
+    values = np.nan_to_num(values, nan=0.0)[order]
+
+    form = pd.DataFrame({
+        'season': season[order],
+        'phase': logs['Phase'].astype(str).to_numpy()[order],
+        'round': logs['Round'].astype(int).to_numpy()[order],
+        'gamecode': logs['Gamecode'].astype(str).to_numpy()[order],
+        'player_id': player_id[order],
+        'player_name': logs['Player'].astype(str).to_numpy()[order],
+        'team': logs['Team'].astype(str).to_numpy()[order],
+        'game_sequence': sequence[order],
+        'minutes': values[:, 0],
+    })
+    for window in windows:
+        sums, games = rolling_group_sums(group_index[order], values, window)
+        minutes_sum = np.where(sums[:, 0] > 0, sums[:, 0], np.nan)
+        form[f'games_l{window}'] = games
+        form[f'minutes_l{window}'] = sums[:, 0] / games
+        for i, stat in enumerate(FORM_STAT_COLUMNS, 1):
+            form[f'{stat}_l{window}'] = sums[:, i] / games
+            form[f'{stat}_per_40_l{window}'] = sums[:, i] * 40 / minutes_sum
+
+    return form[PLAYER_FORM_HISTORY_COLUMNS]
+
+def current_player_form(form_df):
+    """
+    Each player's form after their latest game of every season
+    """
+    if form_df.empty:
+        return pd.DataFrame(columns=PLAYER_FORM_CURRENT_COLUMNS)
+    keys = ['season', 'player_id']
+    current = form_df.assign(games_played=form_df.groupby(keys)['gamecode'].transform('size'))
+    current = current.sort_values(keys + ['game_sequence']).drop_duplicates(keys)
+    current = current.rename(columns={'round': 'last_round', 'gamecode': 'last_gamecode'})
+    return current[PLAYER_FORM_CURRENT_COLUMNS].reset_index(drop=True)
+
+def update_player_form(game_logs_df, competition, rebuild=False, write_strategy='values', **write_options):
+    """
+    Refresh player_form_history_{competition} and player_form_current_{competition} for
+    the players who have games missing from the history table. With rebuild=True every
+    player of the seasons in game_logs_df is recomputed.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    history_table = f"player_form_history_{competition}"
+    current_table = f"player_form_current_{competition}"
+
+    try:
+        window_columns_sql = ",\n            ".join(
+            f"{col} {'INTEGER' if col.startswith('games_') else 'DECIMAL(8,2)'}" for col in FORM_WINDOW_COLUMNS
+        )
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {history_table} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            phase VARCHAR(10),
+            round INTEGER,
+            gamecode TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            player_name TEXT,
+            team TEXT,
+            game_sequence INTEGER,
+            minutes DECIMAL(6,2),
+            {window_columns_sql},
+            UNIQUE(season, gamecode, player_id)
+        );
+        """)
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{history_table}_player ON {history_table}(season, player_id, round)"
+        )
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {current_table} (
+            season INTEGER NOT NULL,
+            player_id TEXT NOT NULL,
+            player_name TEXT,
+            team TEXT,
+            last_round INTEGER,
+            last_gamecode TEXT,
+            games_played INTEGER,
+            {window_columns_sql},
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (season, player_id)
+        );
+        """)
+        conn.commit()
+
+        logs = filter_player_game_logs(game_logs_df)
+        seasons_to_process = sorted(int(season) for season in logs['Season'].unique())
+        if not seasons_to_process:
+            print("No player game logs to build form from")
+            return
+        seasons_str = ','.join(map(str, seasons_to_process))
+
+        player_keys = pd.Series(list(zip(logs['Season'].astype(int), logs['Player_ID'].astype(str))), index=logs.index)
+        if rebuild:
+            cursor.execute(f"DELETE FROM {history_table} WHERE season IN ({seasons_str})")
+            cursor.execute(f"DELETE FROM {current_table} WHERE season IN ({seasons_str})")
+            print(f"Reset player form for seasons: {seasons_to_process}")
+            affected = set(player_keys)
+        else:
+            cursor.execute(f"SELECT season, gamecode, player_id FROM {history_table} WHERE season IN ({seasons_str})")
+            stored = set(cursor.fetchall())
+            row_keys = pd.Series(
+                [(season, gamecode, player) for (season, gamecode), (_, player) in zip(season_game_keys(logs), player_keys)],
+                index=logs.index
+            )
+            affected = set(player_keys[~row_keys.isin(stored)])
+
+        if not affected:
+            conn.commit()
+            print(f"{current_table} is already up to date")
+            return
+
+        # A new game shifts every later window of the player, so their whole season is recomputed
+        history = calculate_player_form(logs[player_keys.isin(affected)])
+        current = current_player_form(history)
+        print(f"Computed form after {len(history)} games for {len(current)} player-seasons")
+
+        if not rebuild:
+            affected_keys = dataframe_to_tuples(current, ['season', 'player_id'])
+            for table_name in (history_table, current_table):
+                execute_values(
+                    cursor,
+                    f"""
+                    DELETE FROM {table_name} t
+                    USING (VALUES %s) AS k(season, player_id)
+                    WHERE t.season = k.season AND t.player_id = k.player_id
+                    """,
+                    affected_keys
+                )
+
+        write_stats = upsert_rows(
+            conn, cursor, history_table, PLAYER_FORM_HISTORY_COLUMNS,
+            dataframe_to_tuples(history.round(2), PLAYER_FORM_HISTORY_COLUMNS), ['season', 'gamecode', 'player_id'],
+            strategy=write_strategy, commit=False, **write_options
+        )
+        upsert_rows(
+            conn, cursor, current_table, PLAYER_FORM_CURRENT_COLUMNS,
+            dataframe_to_tuples(current.round(2), PLAYER_FORM_CURRENT_COLUMNS), ['season', 'player_id'],
+            strategy=write_strategy, extra_updates=['updated_at = CURRENT_TIMESTAMP'], commit=False, **write_options
+        )
+        # History and current form are committed together, batched write strategy or not
+        conn.commit()
+        print(f"Upserted {write_stats['rows']} rows into {history_table} and {len(current)} into {current_table}")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error updating player form for {competition}: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,541 @@
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from .aggregation import factorize_groups, grouped_reduce
+from .db import dataframe_to_tuples, get_connection
+from .team_stats import get_team_logos_from_schedule
+
+def create_player_stats_table(cursor, table_name):
+    """
+    Create the aggregated player statistics table if it does not exist
+    """
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        season INTEGER,
+        phase TEXT,
+        player_id TEXT,
+        player_name TEXT,
+        player_team_code TEXT,
+        player_team_name TEXT,
+        teamlogo TEXT,
+        games_played BIGINT,
+        games_started BIGINT,
+        minutes_played NUMERIC,
+        points_scored NUMERIC,
+        points_scored_per_40 NUMERIC,
+        two_pointers_made NUMERIC,
+        two_pointers_attempted NUMERIC,
+        two_pointers_percentage NUMERIC,
+        two_pointers_made_per_40 NUMERIC,
+        two_pointers_attempted_per_40 NUMERIC,
+        three_pointers_made NUMERIC,
+        three_pointers_attempted NUMERIC,
+        three_pointers_percentage NUMERIC,
+        three_pointers_made_per_40 NUMERIC,
+        three_pointers_attempted_per_40 NUMERIC,
+        free_throws_made NUMERIC,
+        free_throws_attempted NUMERIC,
+        free_throws_percentage NUMERIC,
+        free_throws_made_per_40 NUMERIC,
+        free_throws_attempted_per_40 NUMERIC,
+        offensive_rebounds NUMERIC,
+        defensive_rebounds NUMERIC,
+        total_rebounds NUMERIC,
+        offensive_rebounds_per_40 NUMERIC,
+        defensive_rebounds_per_40 NUMERIC,
+        total_rebounds_per_40 NUMERIC,
+        assists NUMERIC,
+        steals NUMERIC,
+        turnovers NUMERIC,
+        blocks NUMERIC,
+        blocks_against NUMERIC,
+        fouls_commited NUMERIC,
+        fouls_drawn NUMERIC,
+        pir NUMERIC,
+        assists_per_40 NUMERIC,
+        steals_per_40 NUMERIC,
+        turnovers_per_40 NUMERIC,
+        blocks_per_40 NUMERIC,
+        blocks_against_per_40 NUMERIC,
+        fouls_commited_per_40 NUMERIC,
+        fouls_drawn_per_40 NUMERIC,
+        pir_per_40 NUMERIC,
+        total_points BIGINT,
+        total_minutes NUMERIC,
+        total_two_pointers_made BIGINT,
+        total_two_pointers_attempted BIGINT,
+        total_three_pointers_made BIGINT,
+        total_three_pointers_attempted BIGINT,
+        total_free_throws_made BIGINT,
+        total_free_throws_attempted BIGINT,
+        total_offensive_rebounds BIGINT,
+        total_defensive_rebounds BIGINT,
+        total_total_rebounds BIGINT,
+        total_assists BIGINT,
+        total_steals BIGINT,
+        total_turnovers BIGINT,
+        total_blocks BIGINT,
+        total_blocks_against BIGINT,
+        total_fouls_commited BIGINT,
+        total_fouls_drawn BIGINT,
+        total_pir BIGINT
+    );
+    """)
+
+# Game log columns summed into the running totals, keyed by their totals column
+PLAYER_TOTAL_COLUMNS = {
+    'Points': 'total_points',
+    'FieldGoalsMade2': 'total_two_pointers_made',
+    'FieldGoalsAttempted2': 'total_two_pointers_attempted',
+    'FieldGoalsMade3': 'total_three_pointers_made',
+    'FieldGoalsAttempted3': 'total_three_pointers_attempted',
+    'FreeThrowsMade': 'total_free_throws_made',
+    'FreeThrowsAttempted': 'total_free_throws_attempted',
+    'OffensiveRebounds': 'total_offensive_rebounds',
+    'DefensiveRebounds': 'total_defensive_rebounds',
+    'TotalRebounds': 'total_total_rebounds',
+    'Assistances': 'total_assists',
+    'Steals': 'total_steals',
+    'Turnovers': 'total_turnovers',
+    'BlocksFavour': 'total_blocks',
+    'BlocksAgainst': 'total_blocks_against',
+    'FoulsCommited': 'total_fouls_commited',
+    'FoulsReceived': 'total_fouls_drawn',
+    'Valuation': 'total_pir',
+}
+
+# Per game averages and their source totals, each also gets a _per_40 column
+PLAYER_AVERAGE_COLUMNS = {
+    'points_scored': 'total_points',
+    'two_pointers_made': 'total_two_pointers_made',
+    'two_pointers_attempted': 'total_two_pointers_attempted',
+    'three_pointers_made': 'total_three_pointers_made',
+    'three_pointers_attempted': 'total_three_pointers_attempted',
+    'free_throws_made': 'total_free_throws_made',
+    'free_throws_attempted': 'total_free_throws_attempted',
+    'offensive_rebounds': 'total_offensive_rebounds',
+    'defensive_rebounds': 'total_defensive_rebounds',
+    'total_rebounds': 'total_total_rebounds',
+    'assists': 'total_assists',
+    'steals': 'total_steals',
+    'turnovers': 'total_turnovers',
+    'blocks': 'total_blocks',
+    'blocks_against': 'total_blocks_against',
+    'fouls_commited': 'total_fouls_commited',
+    'fouls_drawn': 'total_fouls_drawn',
+    'pir': 'total_pir',
+}
+
+PLAYER_PERCENTAGE_COLUMNS = {
+    'two_pointers_percentage': ('total_two_pointers_made', 'total_two_pointers_attempted'),
+    'three_pointers_percentage': ('total_three_pointers_made', 'total_three_pointers_attempted'),
+    'free_throws_percentage': ('total_free_throws_made', 'total_free_throws_attempted'),
+}
+
+PLAYER_KEY_COLUMNS = ['season', 'phase', 'player_id', 'player_team_code']
+
+# Additive columns of the running totals table
+PLAYER_ADDITIVE_COLUMNS = ['games_played', 'games_started', 'total_minutes'] + list(PLAYER_TOTAL_COLUMNS.values())
+
+PLAYER_TOTALS_TABLE_COLUMNS = [
+    'season', 'phase', 'player_id', 'player_name', 'player_team_code', 'player_team_name', 'teamlogo'
+] + PLAYER_ADDITIVE_COLUMNS
+
+# Column order of the player_stats_from_gamelogs_* tables
+PLAYER_STATS_COLUMNS = [
+    'season', 'phase', 'player_id', 'player_name', 'player_team_code', 'player_team_name', 'teamlogo',
+    'games_played', 'games_started', 'minutes_played',
+    'points_scored', 'points_scored_per_40',
+    'two_pointers_made', 'two_pointers_attempted', 'two_pointers_percentage',
+    'two_pointers_made_per_40', 'two_pointers_attempted_per_40',
+    'three_pointers_made', 'three_pointers_attempted', 'three_pointers_percentage',
+    'three_pointers_made_per_40', 'three_pointers_attempted_per_40',
+    'free_throws_made', 'free_throws_attempted', 'free_throws_percentage',
+    'free_throws_made_per_40', 'free_throws_attempted_per_40',
+    'offensive_rebounds', 'defensive_rebounds', 'total_rebounds',
+    'offensive_rebounds_per_40', 'defensive_rebounds_per_40', 'total_rebounds_per_40',
+    'assists', 'steals', 'turnovers', 'blocks', 'blocks_against', 'fouls_commited', 'fouls_drawn', 'pir',
+    'assists_per_40', 'steals_per_40', 'turnovers_per_40', 'blocks_per_40', 'blocks_against_per_40',
+    'fouls_commited_per_40', 'fouls_drawn_per_40', 'pir_per_40',
+    'total_points', 'total_minutes',
+] + [col for col in PLAYER_TOTAL_COLUMNS.values() if col != 'total_points']
+
+def filter_player_game_logs(game_logs_df):
+    """
+    Keep the rows the player aggregates are built from: real players who got on the court
+    """
+    player = game_logs_df['Player']
+    minutes = game_logs_df['Minutes']
+    mask = (
+        player.notna()
+        & (player != '')
+        & ~player.astype(str).str.lower().isin(['total', 'team'])
+        & minutes.notna()
+        & ~minutes.isin(['DNP', ''])
+    )
+    return game_logs_df[mask]
+
+def compute_player_totals(game_logs_df, team_logos, seasons=None):
+    """
+    Sum game logs into additive totals per (season, phase, player, team) in one grouped NumPy pass,
+    together with the 'All' rollup of both phases.
+    Rows for teams without a schedule_results entry are dropped, matching the old SQL join.
+    """
+    logs = filter_player_game_logs(game_logs_df)
+    if seasons is not None:
+        logs = logs[logs['Season'].isin(seasons)]
+
+    season = logs['Season'].astype(int).to_numpy()
+    phase = np.where(logs['Phase'].isin(['RS', 'TS']), 'Regular Season', 'Playoffs')
+    player_id = logs['Player_ID'].to_numpy()
+    team = logs['Team'].to_numpy()
+
+    # Same conversion as CAST(REPLACE(minutes, ':', '.') AS DECIMAL) in the SQL version
+    minutes = pd.to_numeric(logs['Minutes'].astype(str).str.replace(':', '.', regex=False), errors='coerce')
+    is_started = (pd.to_numeric(logs['IsStarter'], errors='coerce') == 1).astype(np.float64)
+
+    values = np.column_stack(
+        [np.ones(len(logs)), is_started.to_numpy(), minutes.to_numpy(dtype=np.float64, na_value=np.nan)]
+        + [pd.to_numeric(logs[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan) for col in PLAYER_TOTAL_COLUMNS]
+    )
+    # SUM() ignores NULLs
+    values = np.nan_to_num(values, nan=0.0)
+
+    # MAX(player) per group, using codes that sort like the names
+    name_codes, name_values = pd.factorize(logs['Player'].astype(str), sort=True)
+
+    group_index, _ = factorize_groups([season, phase, player_id, team])
+    sums, first_rows = grouped_reduce(group_index, values)
+    max_names, _ = grouped_reduce(group_index, name_codes, np.maximum)
+
+    # The 'All' rollup reuses the phase level sums instead of rescanning the logs
+    rollup_index, _ = factorize_groups([season[first_rows], player_id[first_rows], team[first_rows]])
+    rollup_sums, rollup_first = grouped_reduce(rollup_index, sums)
+    rollup_names, _ = grouped_reduce(rollup_index, max_names, np.maximum)
+    rollup_rows = first_rows[rollup_first]
+
+    totals = pd.DataFrame({
+        'season': np.concatenate([season[first_rows], season[rollup_rows]]),
+        'phase': np.concatenate([phase[first_rows], np.full(len(rollup_rows), 'All')]),
+        'player_id': np.concatenate([player_id[first_rows], player_id[rollup_rows]]),
+        'player_name': np.asarray(name_values)[np.concatenate([max_names, rollup_names])],
+        'player_team_code': np.concatenate([team[first_rows], team[rollup_rows]]),
+    })
+    all_sums = np.vstack([sums, rollup_sums])
+    for i, col in enumerate(['games_played', 'games_started', 'total_minutes'] + list(PLAYER_TOTAL_COLUMNS.values())):
+        totals[col] = all_sums[:, i] if col == 'total_minutes' else all_sums[:, i].astype(np.int64)
+
+    logos_df = pd.DataFrame(
+        [(season, teamcode, info['teamname'], info['teamlogo']) for (season, teamcode), info in team_logos.items()],
+        columns=['season', 'player_team_code', 'player_team_name', 'teamlogo']
+    )
+    totals = totals.merge(logos_df, on=['season', 'player_team_code'], how='inner')
+
+    return totals[PLAYER_TOTALS_TABLE_COLUMNS]
+
+def derive_player_stats(totals_df):
+    """
+    Derive per game averages, per 40 minute rates and shooting percentages from player totals
+    """
+    stats = totals_df.copy()
+    totals = {col: pd.to_numeric(stats[col], errors='coerce').astype(float) for col in PLAYER_ADDITIVE_COLUMNS}
+    stats['total_minutes'] = totals['total_minutes']
+
+    games = totals['games_played'].replace(0, np.nan)
+    minutes = totals['total_minutes'].replace(0, np.nan)
+
+    stats['minutes_played'] = totals['total_minutes'] / games
+    for col, total_col in PLAYER_AVERAGE_COLUMNS.items():
+        stats[col] = totals[total_col] / games
+        stats[f'{col}_per_40'] = totals[total_col] * 40 / minutes
+
+    for col, (made_col, attempted_col) in PLAYER_PERCENTAGE_COLUMNS.items():
+        attempted = totals[attempted_col]
+        stats[col] = np.where(attempted > 0, totals[made_col] / attempted.where(attempted > 0) * 100, 0.0)
+
+    return stats[PLAYER_STATS_COLUMNS]
+
+def aggregate_player_stats(game_logs_df, team_logos, seasons=None):
+    """
+    Compute every player_stats_from_gamelogs column from an in-memory game log frame
+    """
+    return derive_player_stats(compute_player_totals(game_logs_df, team_logos, seasons))
+
+def create_player_stats_from_gamelogs(game_logs_df, competition, seasons=None):
+    """
+    Rebuild player_stats_from_gamelogs_{competition} for the given seasons (default: every
+    season in game_logs_df) from the in-memory game logs and bulk load the result.
+    The running totals are left alone, so the pipeline rebuilds through
+    update_player_stats_incremental(..., rebuild=True) instead.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"player_stats_from_gamelogs_{competition}"
+
+    try:
+        print(f"Creating {table_name} table...")
+
+        create_player_stats_table(cursor, table_name)
+        conn.commit()
+
+        if seasons is None:
+            seasons = [int(season) for season in game_logs_df['Season'].unique()]
+
+        team_logos = get_team_logos_from_schedule(competition)
+        player_stats = aggregate_player_stats(game_logs_df, team_logos, seasons)
+        print(f"Aggregated {len(player_stats)} player/team/phase rows from {len(game_logs_df)} game log rows")
+
+        if seasons:
+            seasons_str = ','.join(map(str, seasons))
+            cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+            deleted_count = cursor.rowcount
+            print(f"Deleted {deleted_count} existing records for seasons: {seasons}")
+
+        execute_values(
+            cursor,
+            f"INSERT INTO {table_name} ({', '.join(PLAYER_STATS_COLUMNS)}) VALUES %s",
+            dataframe_to_tuples(player_stats, PLAYER_STATS_COLUMNS)
+        )
+        conn.commit()
+        print(f"Inserted {len(player_stats)} rows for seasons {seasons} into {table_name}")
+
+        print(f"\nTop 5 scorers in {competition}:")
+        for _, row in player_stats.nlargest(5, 'points_scored').iterrows():
+            print(f"{row['player_name']} ({row['player_team_name']}) - {row['season']} {row['phase']}: {row['games_played']} games, "
+                  f"{row['points_scored']:.2f} PPG, {row['total_rebounds']:.2f} RPG, {row['assists']:.2f} APG")
+
+        print(f"\n{competition} player statistics table updated successfully!")
+
+    except Exception as e:
+        print(f"Error creating {competition} player stats: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def season_game_keys(df):
+    """
+    (season, gamecode) key of every row, with gamecode as text like in the game logs tables
+    """
+    return pd.Series(list(zip(df['Season'].astype(int), df['Gamecode'].astype(str))), index=df.index)
+
+# Game log columns a game's contribution to the running totals is built from
+PLAYER_CHECKSUM_COLUMNS = ['Phase', 'Player_ID', 'Player', 'Team', 'Minutes', 'IsStarter'] + list(PLAYER_TOTAL_COLUMNS)
+
+def player_game_checksums(game_logs_df):
+    """
+    Checksum of every game's player rows, indexed by (season, gamecode). It changes when a
+    box score is corrected and does not depend on row order or on lean dtypes.
+    """
+    logs = filter_player_game_logs(game_logs_df)
+    values = pd.DataFrame({
+        col: pd.to_numeric(logs[col], errors='coerce').astype(float) if col in PLAYER_TOTAL_COLUMNS or col == 'IsStarter'
+        else logs[col].astype(str)
+        for col in PLAYER_CHECKSUM_COLUMNS
+    })
+    # Summing the row hashes (wrapping at 2**64) keeps the checksum independent of row order
+    row_hashes = pd.util.hash_pandas_object(values, index=False)
+    checksums = row_hashes.groupby(season_game_keys(logs)).sum()
+    # Stored in a BIGINT column
+    return pd.Series(checksums.to_numpy(dtype=np.uint64).view(np.int64), index=checksums.index)
+
+def plan_player_totals_update(game_logs_df, applied_games, team_logos):
+    """
+    Work out how the running totals move to the game logs of whole seasons, given the
+    {(season, gamecode): checksum} of the games already applied. New games are added to the
+    totals. A game applied with another checksum (or none) had its box score corrected: the
+    season totals of both its teams are recomputed from every applied game, which also drops
+    players no longer in it. Games with a team missing from team_logos are left for a later run.
+    Returns a dict of the new, corrected and skipped games, the corrected (season, team)
+    pairs, the totals to add and the recomputed totals that replace the corrected teams' rows,
+    and the checksums to store.
+    """
+    game_keys = season_game_keys(game_logs_df)
+    checksums = player_game_checksums(game_logs_df)
+    new_games = set(game_keys) - set(applied_games)
+    corrected_games = {
+        key for key, checksum in applied_games.items() if key in checksums.index and checksums[key] != checksum
+    }
+
+    player_logs = filter_player_game_logs(game_logs_df)
+    player_teams = pd.Series(list(zip(player_logs['Season'].astype(int), player_logs['Team'])), index=player_logs.index)
+    skipped_games = set(season_game_keys(player_logs[~player_teams.isin(set(team_logos))])) & (new_games | corrected_games)
+    new_games -= skipped_games
+    corrected_games -= skipped_games
+
+    teams = pd.Series(list(zip(game_logs_df['Season'].astype(int), game_logs_df['Team'])), index=game_logs_df.index)
+    corrected_teams = set(teams[game_keys.isin(corrected_games) & game_logs_df['Team'].notna()])
+    in_corrected_team = teams.isin(corrected_teams)
+    applied = game_keys.isin(set(applied_games) | new_games)
+
+    return {
+        'new_games': new_games,
+        'corrected_games': corrected_games,
+        'skipped_games': skipped_games,
+        'corrected_teams': corrected_teams,
+        'totals_delta': compute_player_totals(game_logs_df[game_keys.isin(new_games) & ~in_corrected_team], team_logos),
+        'recomputed_totals': compute_player_totals(game_logs_df[applied & in_corrected_team], team_logos),
+        'checksums': {key: int(checksums[key]) for key in new_games | corrected_games if key in checksums.index},
+    }
+
+def update_player_stats_incremental(game_logs_df, competition, rebuild=False):
+    """
+    Apply games that are not yet part of the running player totals and refresh only the
+    player_stats_from_gamelogs rows of the players who appeared in them. game_logs_df holds
+    whole seasons, as every run fetches them. Box scores corrected after they were applied
+    are picked up through a per game checksum and their teams' season totals recomputed.
+    With rebuild=True the totals for the seasons in game_logs_df are reset first, which is
+    still needed when a game is removed from the source altogether.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    totals_table = f"player_totals_from_gamelogs_{competition}"
+    games_table = f"player_totals_games_{competition}"
+    stats_table = f"player_stats_from_gamelogs_{competition}"
+
+    try:
+        print(f"Updating {stats_table} incrementally...")
+
+        totals_columns_sql = ",\n            ".join(
+            f"{col} {'NUMERIC' if col == 'total_minutes' else 'BIGINT'} DEFAULT 0" for col in PLAYER_ADDITIVE_COLUMNS
+        )
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {totals_table} (
+            season INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            player_name TEXT,
+            player_team_code TEXT NOT NULL,
+            player_team_name TEXT,
+            teamlogo TEXT,
+            {totals_columns_sql},
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (season, phase, player_id, player_team_code)
+        );
+        """)
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {games_table} (
+            season INTEGER NOT NULL,
+            gamecode TEXT NOT NULL,
+            checksum BIGINT,
+            ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (season, gamecode)
+        );
+        """)
+        # Tables created before corrections were tracked; their games count as corrected once
+        cursor.execute(f"ALTER TABLE {games_table} ADD COLUMN IF NOT EXISTS checksum BIGINT")
+        create_player_stats_table(cursor, stats_table)
+        conn.commit()
+
+        seasons_to_process = [int(season) for season in game_logs_df['Season'].unique()]
+        if not seasons_to_process:
+            print("No game logs to aggregate")
+            return
+        seasons_str = ','.join(map(str, seasons_to_process))
+
+        if rebuild:
+            cursor.execute(f"DELETE FROM {totals_table} WHERE season IN ({seasons_str})")
+            cursor.execute(f"DELETE FROM {games_table} WHERE season IN ({seasons_str})")
+            cursor.execute(f"DELETE FROM {stats_table} WHERE season IN ({seasons_str})")
+            print(f"Reset running totals for seasons: {seasons_to_process}")
+
+        cursor.execute(f"SELECT season, gamecode, checksum FROM {games_table} WHERE season IN ({seasons_str})")
+        applied_games = {(season, gamecode): checksum for season, gamecode, checksum in cursor.fetchall()}
+
+        team_logos = get_team_logos_from_schedule(competition)
+        plan = plan_player_totals_update(game_logs_df, applied_games, team_logos)
+        new_games, corrected_games = plan['new_games'], plan['corrected_games']
+        print(f"{len(new_games)} new and {len(corrected_games)} corrected games out of "
+              f"{season_game_keys(game_logs_df).nunique()} in the game logs")
+
+        # Games with players whose team has no schedule entry yet are left for a later run
+        if plan['skipped_games']:
+            print(f"Warning: skipping {len(plan['skipped_games'])} games with teams missing from schedule_results_{competition}")
+
+        if not new_games and not corrected_games:
+            conn.commit()
+            print(f"{stats_table} is already up to date")
+            return
+
+        if plan['corrected_teams']:
+            corrected_teams = sorted(plan['corrected_teams'])
+            for table_name in (totals_table, stats_table):
+                execute_values(
+                    cursor,
+                    f"""
+                    DELETE FROM {table_name} t
+                    USING (VALUES %s) AS k(season, player_team_code)
+                    WHERE t.season = k.season AND t.player_team_code = k.player_team_code
+                    """,
+                    corrected_teams
+                )
+            print(f"Recomputing the totals of {len(corrected_teams)} teams with corrected box scores")
+
+        update_sql = ",\n            ".join(
+            f"{col} = {totals_table}.{col} + EXCLUDED.{col}" for col in PLAYER_ADDITIVE_COLUMNS
+        )
+        upsert_query = f"""
+        INSERT INTO {totals_table} ({', '.join(PLAYER_TOTALS_TABLE_COLUMNS)})
+        VALUES %s
+        ON CONFLICT (season, phase, player_id, player_team_code) DO UPDATE SET
+            player_name = GREATEST({totals_table}.player_name, EXCLUDED.player_name),
+            player_team_name = EXCLUDED.player_team_name,
+            teamlogo = EXCLUDED.teamlogo,
+            {update_sql},
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING {', '.join(PLAYER_TOTALS_TABLE_COLUMNS)};
+        """
+        # The corrected teams' rows were deleted above, so their recomputed totals go in as they are
+        totals_delta = pd.concat([plan['totals_delta'], plan['recomputed_totals']], ignore_index=True)
+        updated_rows = execute_values(
+            cursor, upsert_query, dataframe_to_tuples(totals_delta, PLAYER_TOTALS_TABLE_COLUMNS), fetch=True
+        )
+        print(f"Updated running totals for {len(updated_rows)} player/team/phase combinations")
+
+        execute_values(
+            cursor,
+            f"""
+            INSERT INTO {games_table} (season, gamecode, checksum) VALUES %s
+            ON CONFLICT (season, gamecode) DO UPDATE SET
+                checksum = EXCLUDED.checksum,
+                ingested_at = CURRENT_TIMESTAMP
+            """,
+            [(season, gamecode, plan['checksums'].get((season, gamecode)))
+             for season, gamecode in sorted(new_games | corrected_games)]
+        )
+
+        updated_totals = pd.DataFrame(updated_rows, columns=PLAYER_TOTALS_TABLE_COLUMNS)
+        player_stats = derive_player_stats(updated_totals)
+
+        execute_values(
+            cursor,
+            f"""
+            DELETE FROM {stats_table} t
+            USING (VALUES %s) AS k(season, phase, player_id, player_team_code)
+            WHERE t.season = k.season AND t.phase = k.phase
+                AND t.player_id = k.player_id AND t.player_team_code = k.player_team_code
+            """,
+            dataframe_to_tuples(player_stats, PLAYER_KEY_COLUMNS)
+        )
+        execute_values(
+            cursor,
+            f"INSERT INTO {stats_table} ({', '.join(PLAYER_STATS_COLUMNS)}) VALUES %s",
+            dataframe_to_tuples(player_stats, PLAYER_STATS_COLUMNS)
+        )
+
+        # Totals, ingested games and derived rows are committed together
+        conn.commit()
+        print(f"Refreshed {len(player_stats)} rows in {stats_table} from {len(new_games)} new and "
+              f"{len(corrected_games)} corrected games")
+
+    except Exception as e:
+        print(f"Error updating {stats_table} incrementally: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
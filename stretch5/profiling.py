@@ -0,0 +1,98 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+
+# Comma-separated span names to profile, or 'all'; the --profile CLI flag takes precedence
+PROFILE_ENV = 'STRETCH5_PROFILE'
+
+_local = threading.local()
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+def profile_targets_from_env():
+    value = os.environ.get(PROFILE_ENV, '')
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        _tracing_users += 1
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+
+class StageProfiler:
+    """
+    cProfile plus tracemalloc snapshots around one span. Only the outermost profiled span
+    on a thread is captured; tracemalloc is process-wide, so allocations from stages
+    running in parallel show up in each other's snapshots.
+    """
+
+    def __init__(self, top_n=20):
+        self.top_n = top_n
+        self.profile = None
+
+    def start(self):
+        if getattr(_local, 'profiling', False):
+            return False
+        _local.profiling = True
+        _start_tracing()
+        self.snapshot_before = tracemalloc.take_snapshot()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        return True
+
+    def stop(self, output_dir, stem):
+        """
+        Write the .prof file and a text summary, returning the top hot functions and allocations
+        """
+        self.profile.disable()
+        _local.profiling = False
+        snapshot_after = tracemalloc.take_snapshot()
+        _stop_tracing()
+
+        os.makedirs(output_dir, exist_ok=True)
+        profile_path = os.path.join(output_dir, f"{stem}.prof")
+        summary_path = os.path.join(output_dir, f"{stem}.txt")
+        self.profile.dump_stats(profile_path)
+
+        stats = pstats.Stats(self.profile)
+        hot_functions = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top_n]
+        hot_functions = [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': calls,
+                'self_s': round(self_time, 4),
+                'cumulative_s': round(cumulative_time, 4),
+            }
+            for (filename, line, function), (_, calls, self_time, cumulative_time, _) in hot_functions
+        ]
+        allocations = [
+            {'location': str(diff.traceback[0]), 'size_mb': round(diff.size_diff / (1024 * 1024), 2), 'count': diff.count_diff}
+            for diff in snapshot_after.compare_to(self.snapshot_before, 'lineno')[:self.top_n]
+        ]
+
+        text = io.StringIO()
+        text.write(f"=== {stem}: top {self.top_n} functions by cumulative time ===\n")
+        pstats.Stats(self.profile, stream=text).sort_stats('cumulative').print_stats(self.top_n)
+        text.write(f"=== {stem}: top {self.top_n} allocation growth by line ===\n")
+        for allocation in allocations:
+            text.write(f"{allocation['size_mb']:>10.2f} MB {allocation['count']:>10} blocks  {allocation['location']}\n")
+        with open(summary_path, 'w') as f:
+            f.write(text.getvalue())
+
+        return {
+            'profile': profile_path,
+            'summary': summary_path,
+            'hot_functions': hot_functions,
+            'top_allocations': allocations,
+        }
@@ -0,0 +1,406 @@
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from .db import dataframe_to_tuples, get_connection
+from .team_stats import ratings_from_totals, team_counting_stats
+from .writes import upsert_rows
+
+# Ridge penalty on every team term, in games' worth of possessions. Keeps teams with few
+# games (or groups that never meet) close to average instead of fitting their noise.
+ADJUSTED_RATING_RIDGE = 2.0
+
+ADJUSTED_RATINGS_COLUMNS = [
+    'season', 'teamcode', 'games_played', 'efficiency_o', 'efficiency_d', 'net_rating',
+    'adj_efficiency_o', 'adj_efficiency_d', 'adj_net_rating', 'strength_of_schedule',
+    'home_advantage', 'rank_adj_net_rating',
+]
+
+def solve_adjusted_efficiencies(team_index, opp_index, home, efficiency, weights, n_teams, ridge=ADJUSTED_RATING_RIDGE):
+    """
+    Weighted ridge fit of efficiency = league + offense[team] + defense[opp] + home_advantage * home
+    over every team-game row, home being +1 at home and -1 away. The design matrix has four
+    non-zeros per row, so the normal equations are accumulated with bincount and solved
+    densely (2 * n_teams + 2 unknowns). Returns league, home_advantage, offense, defense.
+    """
+    n_rows = len(efficiency)
+    n_params = 2 + 2 * n_teams
+    columns = np.column_stack([
+        np.zeros(n_rows, dtype=np.int64), np.ones(n_rows, dtype=np.int64), 2 + team_index, 2 + n_teams + opp_index,
+    ])
+    values = np.column_stack([np.ones(n_rows), home, np.ones(n_rows), np.ones(n_rows)])
+
+    pairs = (columns[:, :, None] * n_params + columns[:, None, :]).ravel()
+    pair_weights = (weights[:, None, None] * values[:, :, None] * values[:, None, :]).ravel()
+    normal = np.bincount(pairs, weights=pair_weights, minlength=n_params * n_params).reshape(n_params, n_params)
+    rhs = np.bincount(columns.ravel(), weights=((weights * efficiency)[:, None] * values).ravel(), minlength=n_params)
+
+    # League average and home advantage are not shrunk
+    penalty = np.full(n_params, ridge * weights.mean())
+    penalty[:2] = 0
+    solution = np.linalg.solve(normal + np.diag(penalty), rhs)
+    return solution[0], solution[1], solution[2:2 + n_teams], solution[2 + n_teams:]
+
+def calculate_adjusted_team_ratings(df_with_opponents, ridge=ADJUSTED_RATING_RIDGE):
+    """
+    Offensive, defensive and net ratings per team and season adjusted for the opponents
+    faced and home court, next to the raw season ratings they correct
+    """
+    if len(df_with_opponents) == 0:
+        return pd.DataFrame(columns=ADJUSTED_RATINGS_COLUMNS)
+
+    counting = team_counting_stats(df_with_opponents)
+    games = pd.concat([
+        pd.DataFrame({
+            'season': df_with_opponents['Season'].astype(int),
+            'teamcode': df_with_opponents['Team'].astype(str),
+            'opponent': df_with_opponents['opponent_team'].astype(str),
+            'home': np.where(pd.to_numeric(df_with_opponents['Home'], errors='coerce') == 1, 1.0, -1.0),
+            'points': counting['points'],
+            'opp_points': counting['opp_points'],
+        }, index=df_with_opponents.index),
+        ratings_from_totals(counting, 1)[['possessions', 'opp_possessions', 'efficiency_o']],
+    ], axis=1)
+    games = games[games['possessions'] > 0]
+
+    ratings = []
+    for season, season_games in games.groupby('season'):
+        teams = np.unique(season_games[['teamcode', 'opponent']].to_numpy())
+        team_index = np.searchsorted(teams, season_games['teamcode'].to_numpy())
+        opp_index = np.searchsorted(teams, season_games['opponent'].to_numpy())
+        league, home_advantage, offense, defense = solve_adjusted_efficiencies(
+            team_index, opp_index, season_games['home'].to_numpy(), season_games['efficiency_o'].to_numpy(),
+            season_games['possessions'].to_numpy(), len(teams), ridge
+        )
+
+        totals = season_games.groupby('teamcode')[['points', 'opp_points', 'possessions', 'opp_possessions']].sum()
+        adj_net = offense - defense
+        season_ratings = pd.DataFrame({
+            'season': season,
+            'teamcode': teams,
+            'games_played': np.bincount(team_index, minlength=len(teams)),
+            'efficiency_o': (totals['points'] / totals['possessions'] * 100).reindex(teams).to_numpy(),
+            'efficiency_d': (totals['opp_points'] / totals['opp_possessions'] * 100).reindex(teams).to_numpy(),
+            'adj_efficiency_o': league + offense,
+            'adj_efficiency_d': league + defense,
+            'adj_net_rating': adj_net,
+            # Mean adjusted net rating of the opponents faced, once per game
+            'strength_of_schedule': np.bincount(team_index, weights=adj_net[opp_index], minlength=len(teams))
+                                    / np.maximum(np.bincount(team_index, minlength=len(teams)), 1),
+            'home_advantage': home_advantage,
+        })
+        # Opponents whose own rows were dropped are only fitted, not published
+        ratings.append(season_ratings[season_ratings['games_played'] > 0])
+
+    ratings = pd.concat(ratings, ignore_index=True)
+    ratings['net_rating'] = ratings['efficiency_o'] - ratings['efficiency_d']
+    ratings['rank_adj_net_rating'] = ratings.groupby('season')['adj_net_rating'].rank(method='min', ascending=False).astype(int)
+    return ratings[ADJUSTED_RATINGS_COLUMNS].sort_values(['season', 'rank_adj_net_rating'], ignore_index=True)
+
+def insert_adjusted_team_ratings_to_db(ratings_df, competition, write_strategy='values', **write_options):
+    """
+    Insert opponent-adjusted team ratings, replacing the seasons present in the data
+    """
+    if ratings_df.empty:
+        print(f"No adjusted team ratings to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"team_adjusted_ratings_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            teamcode VARCHAR(10) NOT NULL,
+            games_played INTEGER,
+            efficiency_o DECIMAL(6,2),
+            efficiency_d DECIMAL(6,2),
+            net_rating DECIMAL(6,2),
+            adj_efficiency_o DECIMAL(6,2),
+            adj_efficiency_d DECIMAL(6,2),
+            adj_net_rating DECIMAL(6,2),
+            strength_of_schedule DECIMAL(6,2),
+            home_advantage DECIMAL(6,2),
+            rank_adj_net_rating INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(season, teamcode)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(ratings_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        rows = dataframe_to_tuples(ratings_df.round(2), ADJUSTED_RATINGS_COLUMNS)
+        write_stats = upsert_rows(
+            conn, cursor, table_name, ADJUSTED_RATINGS_COLUMNS, rows, ['season', 'teamcode'],
+            strategy=write_strategy, extra_updates=['updated_at = CURRENT_TIMESTAMP'], **write_options
+        )
+        print(f"Upserted {write_stats['rows']} team ratings into {table_name}")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error inserting adjusted team ratings: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+ELO_INITIAL = 1500.0
+ELO_K = 20.0
+# Elo points added to the home team's rating when computing the expected result
+ELO_HOME_ADVANTAGE = 60.0
+# Share of a team's distance from the mean it gives back before each new season
+ELO_SEASON_REGRESSION = 0.25
+# Final Four games are played at a neutral venue
+ELO_NEUTRAL_PHASES = ['FF']
+
+ELO_HISTORY_COLUMNS = [
+    'season', 'gamecode', 'phase', 'round', 'game_date', 'teamcode', 'team', 'opponentcode', 'location',
+    'team_score', 'opponent_score', 'win_probability', 'rating_before', 'rating_after', 'opponent_rating_before',
+]
+
+ELO_CURRENT_COLUMNS = ['teamcode', 'team', 'season', 'rating', 'games_played', 'last_gamecode', 'last_game_date']
+
+def elo_games(team_records_df):
+    """
+    One row per played game from the home team's side, in the order the games were played
+    """
+    games = team_records_df[
+        (team_records_df['Location'] == 'Home')
+        & team_records_df['Team_Score'].notna() & team_records_df['Opponent_Score'].notna()
+        & ((team_records_df['Team_Score'] > 0) | (team_records_df['Opponent_Score'] > 0))
+    ]
+    games = pd.DataFrame({
+        'season': games['Season'].astype(int),
+        'gamecode': games['Gamecode'].astype(str),
+        'phase': games['Phase'].astype(str),
+        'round': games['Round'].astype(int),
+        'game_date': games['Date'].astype(str),
+        'home_code': games['TeamCode'].astype(str),
+        'home_team': games['Team'].astype(str),
+        'away_code': games['OpponentCode'].astype(str),
+        'away_team': games['Opponent'].astype(str),
+        'home_score': games['Team_Score'].astype(int),
+        'away_score': games['Opponent_Score'].astype(int),
+    })
+    return games.sort_values(['season', 'game_date', 'round', 'gamecode'], ignore_index=True)
+
+def elo_state(rows):
+    """
+    Elo state for apply_elo from database rows laid out like ELO_CURRENT_COLUMNS. Ratings come back
+    from DECIMAL columns as Decimal and are converted so they mix with the float arithmetic.
+    """
+    return {
+        teamcode: {'team': team, 'season': int(season), 'rating': float(rating), 'games_played': int(games_played),
+                   'last_gamecode': last_gamecode, 'last_game_date': last_game_date}
+        for teamcode, team, season, rating, games_played, last_gamecode, last_game_date in rows
+    }
+
+def season_start_rating(rating):
+    """
+    A rating carried into a new season, giving back ELO_SEASON_REGRESSION of its distance from the mean
+    """
+    return ELO_INITIAL + (rating - ELO_INITIAL) * (1 - ELO_SEASON_REGRESSION)
+
+def mov_multiplier(margin, winner_rating_diff):
+    """
+    Scale of an update by margin of victory, damped when the favourite wins so ratings of
+    strong teams do not run away
+    """
+    return (abs(margin) + 3) ** 0.8 / (7.5 + 0.006 * winner_rating_diff)
+
+def apply_elo(games_df, state=None):
+    """
+    Apply games in order to the Elo state {teamcode: {'team', 'season', 'rating', 'games_played',
+    'last_gamecode', 'last_game_date'}}, updated in place. Ratings regress toward the mean on a
+    team's first game of a new season. Returns the rating history, two rows per game.
+    """
+    state = {} if state is None else state
+    history = []
+    for game in games_df.itertuples(index=False):
+        ratings = []
+        for code, team in ((game.home_code, game.home_team), (game.away_code, game.away_team)):
+            entry = state.setdefault(code, {'team': team, 'season': game.season, 'rating': ELO_INITIAL,
+                                            'games_played': 0, 'last_gamecode': None, 'last_game_date': None})
+            if entry['season'] < game.season:
+                entry['rating'] = season_start_rating(entry['rating'])
+                entry['season'] = game.season
+                entry['games_played'] = 0
+            ratings.append(entry['rating'])
+        home_rating, away_rating = ratings
+
+        home_edge = 0.0 if game.phase in ELO_NEUTRAL_PHASES else ELO_HOME_ADVANTAGE
+        rating_diff = home_rating + home_edge - away_rating
+        expected_home = 1 / (1 + 10 ** (-rating_diff / 400))
+        margin = game.home_score - game.away_score
+        actual_home = 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+        change = ELO_K * mov_multiplier(margin, rating_diff if margin > 0 else -rating_diff) * (actual_home - expected_home)
+
+        sides = (
+            (game.home_code, game.home_team, game.away_code, 'Home', game.home_score, game.away_score,
+             expected_home, home_rating, away_rating, change),
+            (game.away_code, game.away_team, game.home_code, 'Away', game.away_score, game.home_score,
+             1 - expected_home, away_rating, home_rating, -change),
+        )
+        for code, team, opponent, location, score, opp_score, probability, before, opp_before, delta in sides:
+            state[code].update(team=team, rating=before + delta, games_played=state[code]['games_played'] + 1,
+                               last_gamecode=game.gamecode, last_game_date=game.game_date)
+            history.append((game.season, game.gamecode, game.phase, game.round, game.game_date, code, team, opponent,
+                            location, score, opp_score, probability, before, before + delta, opp_before))
+
+    return pd.DataFrame(history, columns=ELO_HISTORY_COLUMNS)
+
+def get_elo_ratings(competition, season):
+    """
+    Get every team's rating from the elo_ratings table as it stands going into further games
+    of season: ratings last updated in an earlier season are regressed like apply_elo would
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT to_regclass(%s)", (f"elo_ratings_{competition}",))
+        if cursor.fetchone()[0] is None:
+            return {}
+        cursor.execute(f"SELECT teamcode, season, rating FROM elo_ratings_{competition}")
+        return {
+            teamcode: float(rating) if rating_season >= season else season_start_rating(float(rating))
+            for teamcode, rating_season, rating in cursor.fetchall()
+        }
+    finally:
+        cursor.close()
+        conn.close()
+
+def update_elo_ratings(team_records_df, competition, rebuild=False, write_strategy='values', **write_options):
+    """
+    Apply the played games of team_records_df that are not yet in elo_history_{competition}
+    to the stored ratings in elo_ratings_{competition}. With rebuild=True the history from
+    the first season in team_records_df onwards is dropped and its games are replayed from
+    the ratings the earlier history ends with, which picks up late and corrected games.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    history_table = f"elo_history_{competition}"
+    current_table = f"elo_ratings_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {history_table} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            gamecode TEXT NOT NULL,
+            phase TEXT,
+            round INTEGER,
+            game_date TEXT,
+            teamcode TEXT NOT NULL,
+            team TEXT,
+            opponentcode TEXT,
+            location TEXT,
+            team_score INTEGER,
+            opponent_score INTEGER,
+            win_probability DECIMAL(5,4),
+            rating_before DECIMAL(7,2),
+            rating_after DECIMAL(7,2),
+            opponent_rating_before DECIMAL(7,2),
+            UNIQUE(season, gamecode, teamcode)
+        );
+        """)
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {current_table} (
+            teamcode TEXT PRIMARY KEY,
+            team TEXT,
+            season INTEGER,
+            rating DOUBLE PRECISION,
+            games_played INTEGER,
+            last_gamecode TEXT,
+            last_game_date TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        conn.commit()
+
+        games = elo_games(team_records_df)
+        if games.empty:
+            print(f"No played {competition} games to rate")
+            return
+
+        if rebuild:
+            first_season, last_season = int(games['season'].min()), int(games['season'].max())
+            cursor.execute(f"SELECT MAX(season) FROM {history_table}")
+            rated_until = cursor.fetchone()[0]
+            if rated_until is not None and rated_until > last_season:
+                raise ValueError(f"{history_table} has games up to {rated_until}; "
+                                 f"rebuild from {first_season} with every later season included")
+            cursor.execute(f"DELETE FROM {history_table} WHERE season >= %s", (first_season,))
+            # Every team's rating after its last game applied before the rebuilt seasons
+            cursor.execute(f"""
+                SELECT DISTINCT ON (teamcode) teamcode, team, season, rating_after,
+                    COUNT(*) OVER (PARTITION BY teamcode, season), gamecode, game_date
+                FROM {history_table}
+                ORDER BY teamcode, id DESC
+            """)
+            state = elo_state(cursor.fetchall())
+            cursor.execute(f"DELETE FROM {current_table}")
+            print(f"Reset Elo ratings for {competition} from {first_season}, replaying from {len(state)} earlier ratings")
+        else:
+            seasons_str = ','.join(map(str, sorted(games['season'].unique())))
+            cursor.execute(f"SELECT season, gamecode FROM {history_table} WHERE season IN ({seasons_str}) GROUP BY season, gamecode")
+            rated_games = set(cursor.fetchall())
+            games = games[~pd.Series(list(zip(games['season'], games['gamecode'])), index=games.index).isin(rated_games)]
+            cursor.execute(f"SELECT {', '.join(ELO_CURRENT_COLUMNS)} FROM {current_table}")
+            state = elo_state(cursor.fetchall())
+
+        if games.empty:
+            conn.commit()
+            print(f"{current_table} is already up to date")
+            return
+
+        latest = max((entry['season'], entry['last_game_date'] or '') for entry in state.values()) if state else None
+        if latest and (games['season'].iloc[0], games['game_date'].iloc[0]) < latest:
+            print(f"Warning: {competition} games before {latest[1]} arrived late and are applied after the rated ones; "
+                  f"rebuild to replay them in order")
+
+        history = apply_elo(games, state)
+        # A rebuild emptied the ratings table, so teams absent from the replayed seasons are written back too
+        changed = sorted(state) if rebuild else sorted(set(history['teamcode']))
+        current = pd.DataFrame(
+            [(code, *(state[code][col] for col in ELO_CURRENT_COLUMNS[1:])) for code in changed],
+            columns=ELO_CURRENT_COLUMNS
+        )
+
+        # History and ratings are committed together so a failed run leaves both as they were,
+        # whatever the write strategy
+        execute_values(
+            cursor,
+            f"INSERT INTO {history_table} ({', '.join(ELO_HISTORY_COLUMNS)}) VALUES %s",
+            dataframe_to_tuples(history.round(4), ELO_HISTORY_COLUMNS)
+        )
+        write_stats = upsert_rows(
+            conn, cursor, current_table, ELO_CURRENT_COLUMNS, dataframe_to_tuples(current, ELO_CURRENT_COLUMNS),
+            ['teamcode'], strategy=write_strategy,
+            extra_updates=['updated_at = CURRENT_TIMESTAMP'], commit=False, **write_options
+        )
+        conn.commit()
+        print(f"Applied {len(history) // 2} games to the Elo ratings of {len(current)} {competition} teams")
+
+        print(f"\nTop 5 {competition} teams by Elo:")
+        for _, row in current.nlargest(5, 'rating').iterrows():
+            print(f"{row['team']} ({row['teamcode']}): {row['rating']:.0f}")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error updating Elo ratings for {competition}: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
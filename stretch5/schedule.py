@@ -0,0 +1,588 @@
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from .db import dataframe_to_tuples, get_connection
+from .tiebreaks import head_to_head_matrices, rank_with_tiebreaks
+from .writes import upsert_rows
+
+def create_team_records_dataset_euroleague(df):
+    """
+    Create a dataset for EuroLeague where each row represents a team's game with their cumulative record
+    """
+    all_team_records = []
+    all_teams = set(df['local.club.name'].unique()).union(df['road.club.name'].unique())
+
+    phase_order = {'RS': 0,'TS' :1, 'PI': 2, 'PO': 3, 'FF': 4}
+
+    for team in all_teams:
+        team_games = df[(df['local.club.name'] == team) | (df['road.club.name'] == team)].copy()
+        team_games['PhaseOrder'] = team_games['Phase'].map(phase_order)
+        team_games = team_games.sort_values(['Season', 'PhaseOrder', 'Round', 'localDate'])
+
+        for season, season_games in team_games.groupby('Season'):
+            wins = 0
+            losses = 0
+            current_phase_group = None
+
+            for idx, game in season_games.iterrows():
+                if game['Phase'] in ['RS','TS']:
+                    phase_group = 'RS'
+                elif game['Phase'] in ['PI', 'PO', 'FF']:
+                    phase_group = 'Playoffs'
+                else:
+                    phase_group = game['Phase']
+
+                if current_phase_group != phase_group:
+                    current_phase_group = phase_group
+                    wins = 0
+                    losses = 0
+
+                if game['local.club.name'] == team:
+                    location = 'Home'
+                    team_score = game['local.score']
+                    opponent_score = game['road.score']
+                    opponent = game['road.club.name']
+                    team_code = game['local.club.code']
+                    team_image = game['local.club.images.crest']
+                    opponent_code = game['road.club.code']
+                    opponent_image = game['road.club.images.crest']
+                else:
+                    location = 'Away'
+                    team_score = game['road.score']
+                    opponent_score = game['local.score']
+                    opponent = game['local.club.name']
+                    team_code = game['road.club.code']
+                    team_image = game['road.club.images.crest']
+                    opponent_code = game['local.club.code']
+                    opponent_image = game['local.club.images.crest']
+
+                if team_score > opponent_score:
+                    result = 'Win'
+                    wins += 1
+                elif team_score < opponent_score:
+                    result = 'Loss'
+                    losses += 1
+                else:
+                    result = 'Draw'
+
+                record = f"{wins}-{losses}"
+
+                all_team_records.append({
+                    'Team': team,
+                    'TeamCode': team_code,
+                    'TeamImage': team_image,
+                    'Date': game['localDate'],
+                    'Opponent': opponent,
+                    'OpponentCode': opponent_code,
+                    'OpponentImage': opponent_image,
+                    'Round': game['Round'],
+                    'Result': result,
+                    'Location': location,
+                    'Record': record,
+                    'Team_Score': team_score,
+                    'Opponent_Score': opponent_score,
+                    'Gamecode': game['Gamecode'],
+                    'Season': game['Season'],
+                    'Phase': game['Phase'],
+                    'PhaseGroup': phase_group
+                })
+
+    team_records_df = pd.DataFrame(all_team_records)
+    team_records_df = team_records_df.sort_values(['Team', 'Season', 'PhaseGroup', 'Round', 'Date'])
+
+    return team_records_df
+
+def create_team_records_dataset_eurocup(df):
+    """
+    Create a dataset for EuroCup where each row represents a team's game with their cumulative record
+    """
+    all_team_records = []
+    all_teams = set(df['local.club.name'].unique()).union(df['road.club.name'].unique())
+
+    phase_order = {'RS': 0,'TS':1, '8F': 2, '4F': 3}
+
+    for team in all_teams:
+        team_games = df[(df['local.club.name'] == team) | (df['road.club.name'] == team)].copy()
+        team_games['PhaseOrder'] = team_games['Phase'].map(phase_order)
+        team_games = team_games.sort_values(['Season', 'PhaseOrder', 'Round', 'localDate'])
+
+        for season, season_games in team_games.groupby('Season'):
+            wins = 0
+            losses = 0
+            current_phase_group = None
+
+            for idx, game in season_games.iterrows():
+                if game['Phase'] in ['RS','TS']:
+                    phase_group = 'RS'
+                elif game['Phase'] in ['8F', '4F']:
+                    phase_group = 'Playoffs'
+                else:
+                    phase_group = game['Phase']
+
+                if current_phase_group != phase_group:
+                    current_phase_group = phase_group
+                    wins = 0
+                    losses = 0
+
+                if game['local.club.name'] == team:
+                    location = 'Home'
+                    team_score = game['local.score']
+                    opponent_score = game['road.score']
+                    opponent = game['road.club.name']
+                    team_code = game['local.club.code']
+                    team_image = game['local.club.images.crest']
+                    opponent_code = game['road.club.code']
+                    opponent_image = game['road.club.images.crest']
+                else:
+                    location = 'Away'
+                    team_score = game['road.score']
+                    opponent_score = game['local.score']
+                    opponent = game['local.club.name']
+                    team_code = game['road.club.code']
+                    team_image = game['road.club.images.crest']
+                    opponent_code = game['local.club.code']
+                    opponent_image = game['local.club.images.crest']
+
+                if team_score > opponent_score:
+                    result = 'Win'
+                    wins += 1
+                elif team_score < opponent_score:
+                    result = 'Loss'
+                    losses += 1
+                else:
+                    result = 'Draw'
+
+                record = f"{wins}-{losses}"
+
+                all_team_records.append({
+                    'Team': team,
+                    'TeamCode': team_code,
+                    'TeamImage': team_image,
+                    'Date': game['localDate'],
+                    'Opponent': opponent,
+                    'OpponentCode': opponent_code,
+                    'OpponentImage': opponent_image,
+                    'Round': game['Round'],
+                    'Result': result,
+                    'Location': location,
+                    'Record': record,
+                    'Team_Score': team_score,
+                    'Opponent_Score': opponent_score,
+                    'Gamecode': game['Gamecode'],
+                    'Season': game['Season'],
+                    'Phase': game['Phase'],
+                    'PhaseGroup': phase_group
+                })
+
+    team_records_df = pd.DataFrame(all_team_records)
+    team_records_df = team_records_df.sort_values(['Team', 'Season', 'PhaseGroup', 'Round', 'Date'])
+
+    return team_records_df
+
+def insert_schedule_results_to_db(team_records_df, competition):
+    """
+    Insert schedule results data into the database
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"schedule_results_{competition}"
+
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                id SERIAL PRIMARY KEY,
+                team TEXT,
+                teamcode TEXT,
+                teamlogo TEXT,
+                game_date TEXT,
+                opponent TEXT,
+                opponentcode TEXT,
+                opponentlogo TEXT,
+                round INTEGER,
+                result TEXT,
+                location TEXT,
+                record TEXT,
+                team_score INTEGER,
+                opponent_score INTEGER,
+                gamecode TEXT,
+                season INTEGER,
+                phase TEXT,
+                UNIQUE(team, gamecode, season)
+            );
+        """)
+        conn.commit()
+
+        seasons_to_process = list(team_records_df['Season'].unique())
+        if seasons_to_process:
+            seasons_str = ','.join(map(str, seasons_to_process))
+            cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+            deleted_count = cursor.rowcount
+            conn.commit()
+            print(f"Deleted {deleted_count} existing records for seasons: {seasons_to_process}")
+
+        def safe_int(val):
+            if pd.isna(val):
+                return None
+            try:
+                return int(val)
+            except (ValueError, TypeError):
+                return None
+
+        data_tuples = []
+        for _, row in team_records_df.iterrows():
+            data_tuples.append((
+                row["Team"],
+                row["TeamCode"],
+                row["TeamImage"],
+                row["Date"],
+                row["Opponent"],
+                row["OpponentCode"],
+                row["OpponentImage"],
+                safe_int(row["Round"]),
+                row["Result"],
+                row["Location"],
+                row["Record"],
+                safe_int(row["Team_Score"]),
+                safe_int(row["Opponent_Score"]),
+                row["Gamecode"],
+                safe_int(row["Season"]),
+                row["Phase"]
+            ))
+
+        insert_query = f"""
+            INSERT INTO {table_name} (
+                team, teamcode, teamlogo, game_date, opponent, opponentcode, opponentlogo,
+                round, result, location, record, team_score, opponent_score, gamecode, season, phase
+            )
+            VALUES %s
+            ON CONFLICT (team, gamecode, season) DO UPDATE SET
+                teamcode = EXCLUDED.teamcode,
+                teamlogo = EXCLUDED.teamlogo,
+                game_date = EXCLUDED.game_date,
+                opponent = EXCLUDED.opponent,
+                opponentcode = EXCLUDED.opponentcode,
+                opponentlogo = EXCLUDED.opponentlogo,
+                round = EXCLUDED.round,
+                result = EXCLUDED.result,
+                location = EXCLUDED.location,
+                record = EXCLUDED.record,
+                team_score = EXCLUDED.team_score,
+                opponent_score = EXCLUDED.opponent_score,
+                phase = EXCLUDED.phase;
+        """
+
+        execute_values(cursor, insert_query, data_tuples)
+        conn.commit()
+
+        print(f"Successfully inserted schedule results for {competition}")
+
+    except Exception as e:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def create_cumulative_standings(team_records_df, competition='euroleague'):
+    """
+    Create cumulative standings for each season (RS phase only)
+    """
+    standings_data = []
+
+    rs_data = team_records_df[team_records_df['Phase'] == 'RS'].copy()
+
+    for (season, team), group in rs_data.groupby(['Season', 'Team']):
+        group = group.sort_values(['Date'])
+
+        team_code = group['TeamCode'].iloc[0]
+        team_logo = group['TeamImage'].iloc[0]
+
+        wins = (group['Result'] == 'Win').sum()
+        losses = (group['Result'] == 'Loss').sum()
+        total_games = wins + losses
+        win_percentage = wins / total_games if total_games > 0 else 0.0
+
+        total_diff = (group['Team_Score'] - group['Opponent_Score']).sum()
+
+        home_games = group[group['Location'] == 'Home']
+        home_wins = (home_games['Result'] == 'Win').sum()
+        home_losses = (home_games['Result'] == 'Loss').sum()
+        home_record = f"{home_wins}-{home_losses}"
+
+        away_games = group[group['Location'] == 'Away']
+        away_wins = (away_games['Result'] == 'Win').sum()
+        away_losses = (away_games['Result'] == 'Loss').sum()
+        away_record = f"{away_wins}-{away_losses}"
+
+        last_10_games = group.tail(10)
+        l10_wins = (last_10_games['Result'] == 'Win').sum()
+        l10_losses = (last_10_games['Result'] == 'Loss').sum()
+        l10_record = f"{l10_wins}-{l10_losses}"
+
+        streak = calculate_streak(group)
+
+        standings_data.append({
+            'Season': season,
+            'Phase': 'RS',
+            'TeamCode': team_code,
+            'Team': team,
+            'TeamLogo': team_logo,
+            'W': wins,
+            'L': losses,
+            'WinPercentage': round(win_percentage, 3),
+            'Diff': total_diff,
+            'Home': home_record,
+            'Away': away_record,
+            'L10': l10_record,
+            'Streak': streak
+        })
+
+    standings_df = pd.DataFrame(standings_data)
+
+    # Teams level on wins are separated by the head-to-head mini-league among them
+    standings_with_position = []
+    for season, group in standings_df.groupby('Season'):
+        group = group.sort_values('TeamCode')
+        season_games = rs_data[rs_data['Season'] == season]
+        teams = group['TeamCode'].astype(str).to_numpy()
+        h2h_wins, h2h_diff = head_to_head_matrices(season_games, teams)
+        points = season_games.groupby('TeamCode')['Team_Score'].sum().reindex(teams, fill_value=0)
+        group['Position'] = rank_with_tiebreaks(
+            group['W'].to_numpy(dtype=float)[None, :], h2h_wins, h2h_diff,
+            group['Diff'].to_numpy(dtype=float)[None, :], points.to_numpy(dtype=float)[None, :]
+        )[0]
+        standings_with_position.append(group.sort_values('Position'))
+
+    final_standings_df = pd.concat(standings_with_position, ignore_index=True)
+
+    return final_standings_df
+
+def calculate_streak(games_df):
+    """
+    Calculate the current win/loss streak for a team
+    """
+    if len(games_df) == 0:
+        return "0"
+
+    recent_results = games_df['Result'].values
+
+    if len(recent_results) == 0:
+        return "0"
+
+    current_result = recent_results[-1]
+    streak_count = 1
+
+    for i in range(len(recent_results) - 2, -1, -1):
+        if recent_results[i] == current_result:
+            streak_count += 1
+        else:
+            break
+
+    if current_result == 'Win':
+        return f"W{streak_count}"
+    elif current_result == 'Loss':
+        return f"L{streak_count}"
+    else:
+        return "0"
+
+def insert_cumulative_standings_to_db(standings_df, competition):
+    """
+    Insert the cumulative standings data into the database
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"cumulative_standings_{competition}"
+
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                id SERIAL PRIMARY KEY,
+                season INTEGER,
+                phase TEXT,
+                position INTEGER,
+                teamcode TEXT,
+                name TEXT,
+                teamlogo TEXT,
+                w INTEGER,
+                l INTEGER,
+                win_percent REAL,
+                diff INTEGER,
+                home TEXT,
+                away TEXT,
+                l10 TEXT,
+                streak TEXT,
+                UNIQUE(season, phase, teamcode)
+            );
+        """)
+        conn.commit()
+
+        seasons_to_process = list(standings_df['Season'].unique())
+        if seasons_to_process:
+            seasons_str = ','.join(map(str, seasons_to_process))
+            cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+            deleted_count = cursor.rowcount
+            conn.commit()
+            print(f"Deleted {deleted_count} existing records for seasons: {seasons_to_process}")
+
+        def safe_int(val):
+            if pd.isna(val):
+                return None
+            try:
+                return int(val)
+            except (ValueError, TypeError):
+                return None
+
+        def safe_float(val):
+            if pd.isna(val):
+                return None
+            try:
+                return float(val)
+            except (ValueError, TypeError):
+                return None
+
+        data_tuples = []
+        for _, row in standings_df.iterrows():
+            data_tuples.append((
+                safe_int(row["Season"]),
+                row["Phase"],
+                safe_int(row["Position"]),
+                row["TeamCode"],
+                row["Team"],
+                row["TeamLogo"],
+                safe_int(row["W"]),
+                safe_int(row["L"]),
+                safe_float(row["WinPercentage"]),
+                safe_int(row["Diff"]),
+                row["Home"],
+                row["Away"],
+                row["L10"],
+                row["Streak"]
+            ))
+
+        insert_query = f"""
+            INSERT INTO {table_name} (
+                season, phase, position, teamcode, name, teamlogo,
+                w, l, win_percent, diff, home, away, l10, streak
+            )
+            VALUES %s
+            ON CONFLICT (season, phase, teamcode) DO UPDATE SET
+                position = EXCLUDED.position,
+                name = EXCLUDED.name,
+                teamlogo = EXCLUDED.teamlogo,
+                w = EXCLUDED.w,
+                l = EXCLUDED.l,
+                win_percent = EXCLUDED.win_percent,
+                diff = EXCLUDED.diff,
+                home = EXCLUDED.home,
+                away = EXCLUDED.away,
+                l10 = EXCLUDED.l10,
+                streak = EXCLUDED.streak;
+        """
+
+        execute_values(cursor, insert_query, data_tuples)
+        conn.commit()
+
+        print(f"Successfully inserted cumulative standings for {competition}")
+
+    except Exception as e:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+HEAD_TO_HEAD_COLUMNS = [
+    'season', 'phase', 'teamcode', 'opponentcode', 'team', 'opponent', 'games', 'wins', 'losses',
+    'points_for', 'points_against', 'avg_margin',
+]
+
+def calculate_head_to_head(team_records_df):
+    """
+    Record and average margin of every team against every opponent it met, per season and
+    phase group ('RS', 'Playoffs') plus an 'All' rollup, from one grouped sum over the team records
+    """
+    if team_records_df.empty:
+        return pd.DataFrame(columns=HEAD_TO_HEAD_COLUMNS)
+
+    games = pd.DataFrame({
+        'season': team_records_df['Season'].astype(int),
+        'phase': team_records_df['PhaseGroup'].astype(str),
+        'teamcode': team_records_df['TeamCode'].astype(str),
+        'opponentcode': team_records_df['OpponentCode'].astype(str),
+        'team': team_records_df['Team'].astype(str),
+        'opponent': team_records_df['Opponent'].astype(str),
+        'games': 1,
+        'wins': (team_records_df['Result'] == 'Win').astype(int),
+        'losses': (team_records_df['Result'] == 'Loss').astype(int),
+        'points_for': pd.to_numeric(team_records_df['Team_Score'], errors='coerce').fillna(0).astype(int),
+        'points_against': pd.to_numeric(team_records_df['Opponent_Score'], errors='coerce').fillna(0).astype(int),
+    })
+    sums = ['games', 'wins', 'losses', 'points_for', 'points_against']
+    keys = ['season', 'phase', 'teamcode', 'opponentcode']
+    by_phase = games.groupby(keys, as_index=False).agg(
+        team=('team', 'last'), opponent=('opponent', 'last'), **{col: (col, 'sum') for col in sums}
+    )
+    # The rollup adds up the phase rows instead of regrouping the games
+    rollup = by_phase.groupby(['season', 'teamcode', 'opponentcode'], as_index=False).agg(
+        team=('team', 'last'), opponent=('opponent', 'last'), **{col: (col, 'sum') for col in sums}
+    ).assign(phase='All')
+
+    head_to_head = pd.concat([by_phase, rollup], ignore_index=True)
+    head_to_head['avg_margin'] = (head_to_head['points_for'] - head_to_head['points_against']) / head_to_head['games']
+    return head_to_head[HEAD_TO_HEAD_COLUMNS].sort_values(keys, ignore_index=True)
+
+def insert_head_to_head_to_db(head_to_head_df, competition, write_strategy='values', **write_options):
+    """
+    Insert the head-to-head records, replacing the seasons present in the data
+    """
+    if head_to_head_df.empty:
+        print(f"No head-to-head records to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"head_to_head_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            season INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            teamcode TEXT NOT NULL,
+            opponentcode TEXT NOT NULL,
+            team TEXT,
+            opponent TEXT,
+            games SMALLINT,
+            wins SMALLINT,
+            losses SMALLINT,
+            points_for INTEGER,
+            points_against INTEGER,
+            avg_margin DECIMAL(5,2),
+            PRIMARY KEY (season, teamcode, opponentcode, phase)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(head_to_head_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        rows = dataframe_to_tuples(head_to_head_df.round(2), HEAD_TO_HEAD_COLUMNS)
+        write_stats = upsert_rows(
+            conn, cursor, table_name, HEAD_TO_HEAD_COLUMNS, rows, ['season', 'teamcode', 'opponentcode', 'phase'],
+            strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} team/opponent rows into {table_name}")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error inserting head-to-head records: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
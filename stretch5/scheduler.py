@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .instrumentation import span
+from .stages import FETCHES, STAGE_DEPENDENCIES, STAGES
+
+def build_stage_graph(stages, competitions):
+    """
+    Build the run graph as {(competition, node): [upstream nodes]}. Only the selected stages
+    are scheduled; the fetches they read from are added automatically, while unselected
+    upstream stages are left out rather than re-run.
+    """
+    graph = {}
+    for competition in competitions:
+        for stage in stages:
+            upstream = [dep for dep in STAGE_DEPENDENCIES[stage] if dep in FETCHES or dep in stages]
+            graph[(competition, stage)] = [(competition, dep) for dep in upstream]
+            for dep in upstream:
+                if dep in FETCHES:
+                    graph[(competition, dep)] = []
+    return graph
+
+def critical_path(graph, runs):
+    """
+    Walk back from the last node to finish, at each step following the upstream node that
+    finished last (the one the node was actually waiting on)
+    """
+    finished = [node for node in graph if runs[node]['end'] is not None]
+    if not finished:
+        return []
+    path = [max(finished, key=lambda node: runs[node]['end'])]
+    while True:
+        upstream = [dep for dep in graph[path[-1]] if runs[dep]['end'] is not None]
+        if not upstream:
+            break
+        path.append(max(upstream, key=lambda node: runs[node]['end']))
+    return path[::-1]
+
+def run_stage_graph(graph, contexts, workers=4):
+    """
+    Run every node once its upstream nodes have completed, with up to `workers` running
+    at a time. Nodes downstream of a failure are skipped. Returns per-node run records
+    and the critical path of the run.
+    """
+    start = time.perf_counter()
+    runs = {node: {'status': 'pending', 'start': None, 'end': None, 'error': None} for node in graph}
+    downstream = {node: [] for node in graph}
+    for node, upstream in graph.items():
+        for dep in upstream:
+            downstream[dep].append(node)
+    waiting = {node: len(upstream) for node, upstream in graph.items()}
+
+    def run_node(node):
+        competition, name = node
+        runs[node]['start'] = time.perf_counter() - start
+        try:
+            with span(name, competition=competition):
+                (FETCHES.get(name) or STAGES[name])(contexts[competition])
+        finally:
+            runs[node]['end'] = time.perf_counter() - start
+
+    def skip_downstream(node):
+        for child in downstream[node]:
+            if runs[child]['status'] == 'pending':
+                runs[child]['status'] = 'skipped'
+                print(f"- Skipping {child[1]} for {child[0]}: {node[1]} did not complete")
+                skip_downstream(child)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+
+        def submit_ready(nodes):
+            for node in nodes:
+                if waiting[node] == 0 and runs[node]['status'] == 'pending':
+                    runs[node]['status'] = 'running'
+                    running[executor.submit(run_node, node)] = node
+
+        submit_ready(graph)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                competition, name = node
+                error = future.exception()
+                if error is None:
+                    runs[node]['status'] = 'ok'
+                    print(f"✓ Completed {name} for {competition} ({runs[node]['end'] - runs[node]['start']:.1f}s)")
+                    for child in downstream[node]:
+                        waiting[child] -= 1
+                    submit_ready(downstream[node])
+                else:
+                    runs[node]['status'] = 'failed'
+                    runs[node]['error'] = str(error)
+                    print(f"✗ Failed {name} for {competition}: {error}")
+                    skip_downstream(node)
+
+    return runs, critical_path(graph, runs)
@@ -0,0 +1,166 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import factorize_groups
+from .db import get_connection
+from .shots import COURT_PARAMS
+from .writes import upsert_rows
+
+# Bump whenever the bounds, cell size or encoding change so readers can tell grids apart.
+# Version 1: 25 cm cells over the COURT_PARAMS bounds, row-major from (court_min_x, court_min_y),
+# counts as zlib-compressed little-endian uint32. Shots outside the bounds land in the edge cells.
+GRID_VERSION = 1
+GRID_CELL_SIZE = 25
+GRID_ENCODING = 'zlib-u32le'
+
+SHOT_DENSITY_COLUMNS = [
+    'season', 'level', 'entity_id', 'entity_name', 'version', 'encoding', 'cell_size', 'nx', 'ny',
+    'min_x', 'min_y', 'attempts', 'makes', 'attempts_grid', 'makes_grid',
+]
+
+def grid_shape(court_params=COURT_PARAMS, cell_size=GRID_CELL_SIZE):
+    nx = int(np.ceil((court_params['court_max_x'] - court_params['court_min_x']) / cell_size))
+    ny = int(np.ceil((court_params['court_max_y'] - court_params['court_min_y']) / cell_size))
+    return nx, ny
+
+def shot_cells(shot_data_df, court_params=COURT_PARAMS, cell_size=GRID_CELL_SIZE):
+    """
+    Flat grid cell of every shot, -1 for shots without coordinates
+    """
+    nx, ny = grid_shape(court_params, cell_size)
+    x = pd.to_numeric(shot_data_df['COORD_X'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    y = pd.to_numeric(shot_data_df['COORD_Y'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(x) | np.isnan(y)
+    ix = np.clip(np.floor((np.nan_to_num(x) - court_params['court_min_x']) / cell_size), 0, nx - 1).astype(np.int64)
+    iy = np.clip(np.floor((np.nan_to_num(y) - court_params['court_min_y']) / cell_size), 0, ny - 1).astype(np.int64)
+    return np.where(missing, -1, iy * nx + ix)
+
+def encode_grid(counts):
+    return zlib.compress(np.ascontiguousarray(counts, dtype='<u4').tobytes())
+
+def decode_grid(blob, nx, ny):
+    """
+    Counts grid of shape (ny, nx) from a stored blob
+    """
+    return np.frombuffer(zlib.decompress(bytes(blob)), dtype='<u4').reshape(ny, nx)
+
+def _grids(keys, cells, made, n_cells):
+    # One bincount over (group, cell) for all groups of a season
+    group_index, n_groups = factorize_groups(keys)
+    placed = cells >= 0
+    flat = group_index[placed] * n_cells + cells[placed]
+    attempts = np.bincount(flat, minlength=n_groups * n_cells).reshape(n_groups, n_cells)
+    makes = np.bincount(flat, weights=made[placed], minlength=n_groups * n_cells).reshape(n_groups, n_cells)
+    return group_index, attempts, makes.astype(np.int64)
+
+def calculate_shot_density_grids(shot_data_df, court_params=COURT_PARAMS, cell_size=GRID_CELL_SIZE):
+    """
+    Attempts and makes histograms over the court for every player-season, team-season and
+    league-season, one row per grid with the counts encoded as compact blobs
+    """
+    nx, ny = grid_shape(court_params, cell_size)
+    n_cells = nx * ny
+    levels = {
+        'player': ('ID_PLAYER', 'PLAYER'),
+        'team': ('TEAM', 'TEAM'),
+        'league': (None, None),
+    }
+    rows = []
+    # Season by season, so the dense (groups x cells) arrays stay small
+    for season, season_df in shot_data_df.groupby('Season', observed=True):
+        cells = shot_cells(season_df, court_params, cell_size)
+        made = season_df['made'].to_numpy(dtype=np.float64)
+        for level, (id_column, name_column) in levels.items():
+            if id_column:
+                ids = season_df[id_column].astype(str).to_numpy()
+                names = season_df[name_column].astype(str).to_numpy()
+            else:
+                ids = names = np.full(len(season_df), 'League', dtype=object)
+            group_index, attempts, makes = _grids([ids], cells, made, n_cells)
+            firsts = np.unique(group_index, return_index=True)[1]
+            for group, first in enumerate(firsts):
+                rows.append({
+                    'season': int(season),
+                    'level': level,
+                    'entity_id': ids[first],
+                    'entity_name': names[first],
+                    'version': GRID_VERSION,
+                    'encoding': GRID_ENCODING,
+                    'cell_size': cell_size,
+                    'nx': nx,
+                    'ny': ny,
+                    'min_x': court_params['court_min_x'],
+                    'min_y': court_params['court_min_y'],
+                    'attempts': int(attempts[group].sum()),
+                    'makes': int(makes[group].sum()),
+                    'attempts_grid': encode_grid(attempts[group]),
+                    'makes_grid': encode_grid(makes[group]),
+                })
+    return pd.DataFrame(rows, columns=SHOT_DENSITY_COLUMNS)
+
+def insert_shot_density_grids_to_db(grids_df, competition, write_strategy='values', **write_options):
+    """
+    Insert shot density grids for a competition, replacing the seasons present in the data
+    """
+    if grids_df.empty:
+        print(f"No shot density grids to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"shot_density_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            level TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            entity_name TEXT,
+            version INTEGER NOT NULL,
+            encoding TEXT NOT NULL,
+            cell_size REAL,
+            nx INTEGER,
+            ny INTEGER,
+            min_x REAL,
+            min_y REAL,
+            attempts INTEGER,
+            makes INTEGER,
+            attempts_grid BYTEA,
+            makes_grid BYTEA,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(season, level, entity_id)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(grids_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        # Plain tuples, with bytes wrapped so psycopg2 sends them as bytea
+        rows = [
+            tuple(memoryview(value) if isinstance(value, bytes) else value for value in row)
+            for row in grids_df[SHOT_DENSITY_COLUMNS].itertuples(index=False, name=None)
+        ]
+        write_stats = upsert_rows(
+            conn, cursor, table_name, SHOT_DENSITY_COLUMNS, rows, ['season', 'level', 'entity_id'],
+            strategy=write_strategy, extra_updates=['updated_at = CURRENT_TIMESTAMP'], **write_options
+        )
+        blob_kb = (grids_df['attempts_grid'].map(len).sum() + grids_df['makes_grid'].map(len).sum()) / 1024
+        print(f"Upserted {write_stats['rows']} grids ({blob_kb:.0f} KB of counts) into {table_name}")
+        print(f"\n✓ Shot density grids for {competition} inserted successfully!")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during database operation for shot density grids: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
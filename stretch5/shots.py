@@ -0,0 +1,632 @@
+import math
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from .db import dataframe_to_tuples, get_connection
+from .streaming import iter_chunks, stream_upsert
+from .writes import upsert_rows
+
+# Court Parameters (from JavaScript's findCourtParameters)
+COURT_PARAMS = {
+    'basket_x': 0,
+    'basket_y': 0,
+    'three_point_radius': 675,
+    'corner_line_x': 660,
+    'corner_intersection_y': 157.5,
+    'restricted_area_radius': 125,
+    'baseline_y': -100,
+    'paint_width': 490,
+    'paint_height': 580,
+    'free_throw_distance': 580,
+    'free_throw_circle_radius': 180,
+    'court_min_x': -750,
+    'court_max_x': 750,
+    'court_min_y': -100,
+    'court_max_y': 850,
+}
+
+def classify_shots_py(data_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Filters out free throws and adds 'made' status to the DataFrame.
+    """
+    filtered_df = data_df[
+        ~(
+            data_df['ID_ACTION'].str.lower().str.contains("ft", na=False) |
+            data_df['ID_ACTION'].str.lower().str.contains("free", na=False) |
+            data_df['ACTION'].str.lower().str.contains("free throw", na=False) |
+            data_df['ACTION'].str.lower().str.contains("ft", na=False)
+        )
+    ].copy()
+
+    filtered_df['made'] = filtered_df['POINTS'].apply(lambda p: 1 if p > 0 else 0)
+    return filtered_df
+
+def classify_zones_py(shot_data_row, court_params):
+    """
+    Classifies a single shot into one of the 11 specified zones.
+    """
+    x = shot_data_row['COORD_X']
+    y = shot_data_row['COORD_Y']
+
+    if pd.isna(x) or pd.isna(y):
+        return "Unknown"
+
+    basket_x = court_params['basket_x']
+    basket_y = court_params['basket_y']
+    three_point_radius = court_params['three_point_radius']
+    corner_line_x = court_params['corner_line_x']
+    corner_intersection_y = court_params['corner_intersection_y']
+    restricted_area_radius = court_params['restricted_area_radius']
+
+    distance = math.sqrt((x - basket_x)**2 + (y - basket_y)**2)
+    angle = math.degrees(math.atan2(x - basket_x, y - basket_y))
+
+    bin_zone = "Other"
+
+    is_in_corner_3_zone = abs(x) >= corner_line_x and y <= corner_intersection_y
+    is_in_arc_3_zone = distance >= three_point_radius and y > corner_intersection_y
+    is_actually_3pt_location = is_in_corner_3_zone or is_in_arc_3_zone
+
+    if is_actually_3pt_location:
+        if is_in_corner_3_zone:
+            bin_zone = "corner 3 left" if x < 0 else "right corner 3"
+        else:
+            if angle < -30:
+                bin_zone = "right side 3"
+            elif angle > 30:
+                bin_zone = "left side 3"
+            else:
+                bin_zone = "top 3"
+    else:
+        if distance <= restricted_area_radius:
+            bin_zone = "at the rim"
+        elif distance <= 300:
+            if x < -50:
+                bin_zone = "short 2pt left"
+            elif x > 50:
+                bin_zone = "short 2pt right"
+            else:
+                bin_zone = "short 2pt center"
+        else:
+            if x < -50:
+                bin_zone = "mid 2pt left"
+            elif x > 50:
+                bin_zone = "mid 2pt right"
+            else:
+                bin_zone = "mid 2pt center"
+
+    return bin_zone
+
+SHOT_DATA_COLUMNS = [
+    'season', 'phase', 'round', 'gamecode', 'num_anot', 'team', 'id_player', 'player',
+    'id_action', 'action', 'points', 'coord_x', 'coord_y', 'zone', 'bin', 'fastbreak',
+    'second_chance', 'points_off_turnover', 'minute', 'console', 'points_a',
+    'points_b', 'utc',
+]
+
+def create_shot_data_table(cursor, table_name):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        id SERIAL PRIMARY KEY,
+        season INTEGER,
+        phase TEXT,
+        round INTEGER,
+        gamecode TEXT,
+        num_anot INTEGER,
+        team TEXT,
+        id_player TEXT,
+        player TEXT,
+        id_action TEXT,
+        action TEXT,
+        points INTEGER,
+        coord_x INTEGER,
+        coord_y INTEGER,
+        zone TEXT,
+        bin TEXT,
+        fastbreak INTEGER,
+        second_chance INTEGER,
+        points_off_turnover INTEGER,
+        minute INTEGER,
+        console TEXT,
+        points_a INTEGER,
+        points_b INTEGER,
+        utc TEXT,
+        UNIQUE(id_player, gamecode, season, num_anot)
+    );
+    """)
+
+def shot_data_rows(shot_data_df):
+    """
+    Database tuples (in SHOT_DATA_COLUMNS order) for classified shots
+    """
+    # Helper functions
+    def safe_int(val):
+        if pd.isna(val):
+            return None
+        try:
+            return int(val)
+        except (ValueError, TypeError):
+            return None
+
+    def safe_str(val):
+        if pd.isna(val):
+            return None
+        return str(val)
+
+    # Build data tuples
+    data_tuples = []
+    for _, row in shot_data_df.iterrows():
+        data_tuples.append((
+            safe_int(row["Season"]),
+            safe_str(row["Phase"]),
+            safe_int(row["Round"]),
+            safe_str(row["Gamecode"]),
+            safe_int(row["NUM_ANOT"]),
+            safe_str(row["TEAM"]),
+            safe_str(row["ID_PLAYER"]),
+            safe_str(row["PLAYER"]),
+            safe_str(row["ID_ACTION"]),
+            safe_str(row["ACTION"]),
+            safe_int(row["POINTS"]),
+            safe_int(row["COORD_X"]),
+            safe_int(row["COORD_Y"]),
+            safe_str(row["ZONE"]) if "ZONE" in row else None,
+            safe_str(row["Bin"]),
+            safe_int(row["FASTBREAK"]),
+            safe_int(row["SECOND_CHANCE"]),
+            safe_int(row["POINTS_OFF_TURNOVER"]),
+            safe_int(row["MINUTE"]),
+            safe_str(row["CONSOLE"]),
+            safe_int(row["POINTS_A"]),
+            safe_int(row["POINTS_B"]),
+            safe_str(row["UTC"])
+        ))
+    return data_tuples
+
+def insert_shot_data_to_db(shot_data_df, competition, write_strategy='values', **write_options):
+    """
+    Insert shot data into the database for a specific competition.
+    Only deletes and re-inserts the seasons present in the data.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"shot_data_{competition}"
+
+    try:
+        print(f"\n=== Processing {table_name} ===")
+        print(f"Local DataFrame has {len(shot_data_df)} rows")
+
+        # Check for duplicates
+        duplicates = shot_data_df.groupby(['ID_PLAYER', 'Gamecode', 'Season', 'NUM_ANOT'], observed=True).size()
+        duplicates = duplicates[duplicates > 1]
+        if len(duplicates) > 0:
+            print(f"Warning: Found {len(duplicates)} duplicate player-gamecode-season-annotation combinations")
+
+        # Create table if not exists
+        create_shot_data_table(cursor, table_name)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        # Delete only the seasons being loaded
+        seasons_to_process = list(shot_data_df['Season'].unique())
+        if seasons_to_process:
+            seasons_str = ','.join(map(str, seasons_to_process))
+            cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+            deleted_count = cursor.rowcount
+            conn.commit()
+            print(f"Deleted {deleted_count} existing records for seasons: {seasons_to_process}")
+
+        # Build data tuples
+        data_tuples = shot_data_rows(shot_data_df)
+
+        print(f"Prepared {len(data_tuples)} tuples for insertion")
+
+        # Upsert with the selected write strategy
+        write_stats = upsert_rows(
+            conn, cursor, table_name, SHOT_DATA_COLUMNS, data_tuples,
+            ['id_player', 'gamecode', 'season', 'num_anot'],
+            strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} rows in {write_stats['transactions']} transactions "
+              f"({write_stats['transaction_s']:.2f}s)")
+
+        # Verify final count
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        after_count = cursor.fetchone()[0]
+        print(f"Total rows in {table_name}: {after_count}")
+
+        # Show bin distribution
+        cursor.execute(f"""
+            SELECT bin, COUNT(*) as count
+            FROM {table_name}
+            WHERE season IN ({seasons_str})
+            GROUP BY bin
+            ORDER BY count DESC;
+        """)
+        bin_stats = cursor.fetchall()
+        print(f"\nShot Bin distribution for seasons {seasons_to_process} in {table_name}:")
+        for bin_name, count in bin_stats:
+            print(f"  {bin_name}: {count}")
+
+        print(f"\n✓ Shot data for {competition} inserted successfully!")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during database operation: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def stream_shot_data_to_db(frames, competition, chunk_size=50, chunk_by='game', max_pending=2,
+                           write_strategy='values', **write_options):
+    """
+    Write classified shots from an iterable of frames (e.g. one season at a time) in chunks
+    of chunk_size games or rows, each chunk committed on its own.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"shot_data_{competition}"
+
+    try:
+        print(f"\n=== Streaming {table_name} ===")
+        create_shot_data_table(cursor, table_name)
+        conn.commit()
+
+        write_stats = stream_upsert(
+            conn, cursor, table_name, SHOT_DATA_COLUMNS, ['id_player', 'gamecode', 'season', 'num_anot'],
+            iter_chunks(frames, chunk_size, chunk_by), shot_data_rows,
+            max_pending=max_pending, strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} rows in {write_stats['chunks']} chunks and "
+              f"{write_stats['transactions']} transactions ({write_stats['transaction_s']:.2f}s)")
+
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        print(f"Total rows in {table_name}: {cursor.fetchone()[0]}")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during streamed write to {table_name}: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def calculate_league_averages(shot_data_df):
+    """
+    League shots, makes, FG% and points per shot for every season and bin
+    """
+    league_averages = shot_data_df.groupby(['Season', 'Bin'], observed=True).agg(
+        total_shots=('made', 'size'),
+        made_shots=('made', 'sum'),
+        total_points=('POINTS', 'sum')
+    ).reset_index()
+
+    league_averages['shot_percentage'] = (league_averages['made_shots'] / league_averages['total_shots']).fillna(0)
+    league_averages['points_per_shot'] = (league_averages['total_points'] / league_averages['total_shots']).fillna(0)
+    return league_averages
+
+def insert_league_averages_to_db(league_averages: pd.DataFrame, competition: str):
+    """
+    Inserts the league averages for shot zones from calculate_league_averages into the database.
+    Only deletes and re-inserts the seasons present in the data.
+    """
+    if league_averages.empty:
+        print(f"No shot data to process for {competition} league averages.")
+        return
+
+    print(f"\nCalculated League Averages for {competition}:")
+    print(f"Total average rows to insert: {len(league_averages)}")
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"shot_data_{competition}_averages"
+
+    try:
+        # Create table if not exists
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            bin TEXT NOT NULL,
+            total_shots INTEGER,
+            made_shots INTEGER,
+            shot_percentage REAL,
+            UNIQUE(season, bin)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        # Delete only the seasons being loaded
+        seasons_to_process = list(league_averages['Season'].unique())
+        if seasons_to_process:
+            seasons_str = ','.join(map(str, seasons_to_process))
+            cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+            deleted_count = cursor.rowcount
+            conn.commit()
+            print(f"Deleted {deleted_count} existing records for seasons: {seasons_to_process}")
+
+        # Prepare data for insertion
+        data_tuples = []
+        for _, row in league_averages.iterrows():
+            data_tuples.append((
+                row["Season"],
+                row["Bin"],
+                row["total_shots"],
+                row["made_shots"],
+                row["shot_percentage"]
+            ))
+
+        print(f"Prepared {len(data_tuples)} tuples for insertion into {table_name}")
+
+        # Insert with conflict resolution
+        insert_query = f"""
+        INSERT INTO {table_name} (
+            season, bin, total_shots, made_shots, shot_percentage
+        ) VALUES %s
+        ON CONFLICT (season, bin) DO UPDATE SET
+            total_shots = EXCLUDED.total_shots,
+            made_shots = EXCLUDED.made_shots,
+            shot_percentage = EXCLUDED.shot_percentage;
+        """
+
+        execute_values(cursor, insert_query, data_tuples)
+        rows_affected = cursor.rowcount
+        conn.commit()
+
+        print(f"Insert operation affected {rows_affected} rows in {table_name}")
+
+        # Verify data
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        after_count = cursor.fetchone()[0]
+        print(f"Total rows in {table_name}: {after_count}")
+
+        # Show sample data
+        cursor.execute(f"""
+            SELECT season, bin, total_shots, made_shots, shot_percentage
+            FROM {table_name}
+            WHERE season IN ({seasons_str})
+            ORDER BY bin
+            LIMIT 10;
+        """)
+        sample_data = cursor.fetchall()
+        print(f"\nSample data for seasons {seasons_to_process} from {table_name}:")
+        for row in sample_data:
+            print(f"  Season: {row[0]}, Bin: {row[1]}, Total: {row[2]}, Made: {row[3]}, %: {row[4]:.4f}")
+
+        print(f"\n✓ League averages for {competition} inserted successfully!")
+
+    except Exception as e:
+        print(f"Error during database operation for averages: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+SHOT_ZONE_COLUMNS = [
+    'season', 'phase', 'team', 'player_id', 'player', 'bin', 'attempts', 'makes', 'points',
+    'shot_percentage', 'points_per_shot', 'league_attempts', 'league_makes', 'league_percentage',
+    'pct_vs_league',
+]
+
+def calculate_shot_zone_aggregates(shot_data_df):
+    """
+    Attempts, makes and points per season, phase, team, player and bin, with a 'Total'
+    player row per team, a 'League' team row and an 'All' phase, each compared to the
+    league percentage of the same season, phase and bin
+    """
+    player_zones = shot_data_df.groupby(['Season', 'Phase', 'TEAM', 'ID_PLAYER', 'Bin'], observed=True).agg(
+        attempts=('made', 'size'),
+        makes=('made', 'sum'),
+        points=('POINTS', 'sum'),
+        player=('PLAYER', 'first'),
+    ).reset_index()
+    # Everything below works on the few thousand aggregate rows, not on the shots
+    keys = ['Phase', 'TEAM', 'ID_PLAYER', 'PLAYER', 'Bin']
+    player_zones = player_zones.rename(columns={'player': 'PLAYER'})
+    player_zones[keys] = player_zones[keys].astype(str)
+    player_zones['Season'] = player_zones['Season'].astype(int)
+
+    counts = ['attempts', 'makes', 'points']
+    player_zones = pd.concat([
+        player_zones,
+        player_zones.groupby(['Season', 'TEAM', 'ID_PLAYER', 'PLAYER', 'Bin'], as_index=False)[counts].sum().assign(Phase='All'),
+    ], ignore_index=True)
+    team_zones = player_zones.groupby(['Season', 'Phase', 'TEAM', 'Bin'], as_index=False)[counts].sum()
+    team_zones = team_zones.assign(ID_PLAYER='Total', PLAYER='Total')
+    league_zones = team_zones.groupby(['Season', 'Phase', 'Bin'], as_index=False)[counts].sum()
+    zones = pd.concat([player_zones, team_zones, league_zones.assign(TEAM='League', ID_PLAYER='Total', PLAYER='League')],
+                      ignore_index=True)
+
+    league = league_zones.rename(columns={'attempts': 'league_attempts', 'makes': 'league_makes'})
+    league['league_percentage'] = league['league_makes'] / league['league_attempts']
+    zones = zones.merge(league.drop(columns='points'), on=['Season', 'Phase', 'Bin'], how='left')
+
+    zones['shot_percentage'] = zones['makes'] / zones['attempts']
+    zones['points_per_shot'] = zones['points'] / zones['attempts']
+    zones['pct_vs_league'] = zones['shot_percentage'] - zones['league_percentage']
+    return zones.rename(columns={
+        'Season': 'season', 'Phase': 'phase', 'TEAM': 'team', 'ID_PLAYER': 'player_id', 'PLAYER': 'player', 'Bin': 'bin',
+    })[SHOT_ZONE_COLUMNS]
+
+def insert_shot_zone_aggregates_to_db(zones_df, competition, write_strategy='values', **write_options):
+    """
+    Insert shot zone aggregates for a competition, replacing the seasons present in the data
+    """
+    if zones_df.empty:
+        print(f"No shot zone aggregates to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"shot_zone_aggregates_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            team TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            player TEXT,
+            bin TEXT NOT NULL,
+            attempts INTEGER,
+            makes INTEGER,
+            points INTEGER,
+            shot_percentage REAL,
+            points_per_shot REAL,
+            league_attempts INTEGER,
+            league_makes INTEGER,
+            league_percentage REAL,
+            pct_vs_league REAL,
+            UNIQUE(season, phase, team, player_id, bin)
+        );
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_team ON {table_name}(season, team, phase)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_player ON {table_name}(season, player_id, phase)")
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(zones_df['season'].unique())
+        seasons_str = ','.join(map(str, seasons_to_process))
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        write_stats = upsert_rows(
+            conn, cursor, table_name, SHOT_ZONE_COLUMNS, dataframe_to_tuples(zones_df, SHOT_ZONE_COLUMNS),
+            ['season', 'phase', 'team', 'player_id', 'bin'], strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} shot zone rows into {table_name} "
+              f"({write_stats['transaction_s']:.2f}s)")
+        print(f"\n✓ Shot zone aggregates for {competition} inserted successfully!")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during database operation for shot zone aggregates: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+SHOT_QUALITY_COLUMNS = [
+    'season', 'team', 'player_id', 'player', 'shots', 'makes', 'points', 'expected_makes',
+    'expected_points', 'makes_over_expected', 'points_over_expected', 'expected_points_per_shot',
+    'points_over_expected_per_shot',
+]
+
+def league_rate_lookup(league_averages, shot_data_df):
+    """
+    Row of league_averages for every shot's (season, bin), -1 where the league has none
+    """
+    index = pd.MultiIndex.from_arrays([league_averages['Season'].astype(int), league_averages['Bin'].astype(str)])
+    keys = pd.MultiIndex.from_arrays([shot_data_df['Season'].astype(int), shot_data_df['Bin'].astype(str)])
+    return index.get_indexer(keys)
+
+def calculate_shot_quality(shot_data_df, league_averages=None):
+    """
+    Expected makes and points of every shot from its (season, bin) league FG% and points
+    per shot, summed per season, team and player with a 'Total' row per team
+    """
+    if league_averages is None:
+        league_averages = calculate_league_averages(shot_data_df)
+
+    rows = league_rate_lookup(league_averages, shot_data_df)
+    found = rows >= 0
+    shots = pd.DataFrame({
+        'season': shot_data_df['Season'].astype(int).to_numpy(),
+        'team': shot_data_df['TEAM'].astype(str).to_numpy(),
+        'player_id': shot_data_df['ID_PLAYER'].astype(str).to_numpy(),
+        'player': shot_data_df['PLAYER'].astype(str).to_numpy(),
+        'shots': 1,
+        'makes': shot_data_df['made'].to_numpy(),
+        'points': shot_data_df['POINTS'].to_numpy(dtype=float),
+        'expected_makes': np.where(found, league_averages['shot_percentage'].to_numpy()[rows], np.nan),
+        'expected_points': np.where(found, league_averages['points_per_shot'].to_numpy()[rows], np.nan),
+    })
+
+    sums = ['shots', 'makes', 'points', 'expected_makes', 'expected_points']
+    players = shots.groupby(['season', 'team', 'player_id'], as_index=False).agg(
+        player=('player', 'first'), **{col: (col, 'sum') for col in sums}
+    )
+    teams = shots.groupby(['season', 'team'], as_index=False)[sums].sum().assign(player_id='Total', player='Total')
+    quality = pd.concat([players, teams], ignore_index=True)
+
+    quality['makes_over_expected'] = quality['makes'] - quality['expected_makes']
+    quality['points_over_expected'] = quality['points'] - quality['expected_points']
+    quality['expected_points_per_shot'] = quality['expected_points'] / quality['shots']
+    quality['points_over_expected_per_shot'] = quality['points_over_expected'] / quality['shots']
+    return quality[SHOT_QUALITY_COLUMNS]
+
+def insert_shot_quality_to_db(quality_df, competition, write_strategy='values', **write_options):
+    """
+    Insert shot quality per player and team for a competition, replacing the seasons present in the data
+    """
+    if quality_df.empty:
+        print(f"No shot quality rows to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"shot_quality_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            team TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            player TEXT,
+            shots INTEGER,
+            makes INTEGER,
+            points INTEGER,
+            expected_makes REAL,
+            expected_points REAL,
+            makes_over_expected REAL,
+            points_over_expected REAL,
+            expected_points_per_shot REAL,
+            points_over_expected_per_shot REAL,
+            UNIQUE(season, team, player_id)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(quality_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        write_stats = upsert_rows(
+            conn, cursor, table_name, SHOT_QUALITY_COLUMNS, dataframe_to_tuples(quality_df, SHOT_QUALITY_COLUMNS),
+            ['season', 'team', 'player_id'], strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} shot quality rows into {table_name}")
+
+        best = quality_df[(quality_df['player_id'] != 'Total') & (quality_df['shots'] >= 50)]
+        print("\nTop shot-making over expectation (50+ shots):")
+        for row in best.nlargest(5, 'points_over_expected').itertuples():
+            print(f"  {row.player} ({row.team}, {row.season}): {row.points_over_expected:+.1f} pts "
+                  f"on {row.shots} shots ({row.points_over_expected_per_shot:+.3f}/shot)")
+        print(f"\n✓ Shot quality for {competition} inserted successfully!")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during database operation for shot quality: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,321 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .db import dataframe_to_tuples, get_connection
+from .ratings import ELO_HOME_ADVANTAGE, ELO_INITIAL
+from .tiebreaks import head_to_head_matrices, rank_with_tiebreaks
+from .writes import upsert_rows
+
+SEASON_SIMULATIONS = 20000
+
+# Elo points per point of expected margin, and the spread of single game margins around it
+ELO_POINTS_PER_MARGIN = 28.0
+MARGIN_SD = 12.0
+
+# Simulated tables ranked at once, bounding the (tables, teams, teams) head-to-head arrays
+RANK_BLOCK = 4096
+
+# Per competition: regular season spots straight into the playoffs (per group), the play-in
+# positions, the bracket order of the seeds (group letter and position) and the venues of
+# each knockout round's games: True at the better seed, False at the other team, None neutral.
+# EuroCup's two groups are found from who plays whom; the bracket crosses them.
+COMPETITION_FORMATS = {
+    'euroleague': {
+        'direct_spots': 6,
+        'play_in': (7, 10),
+        'bracket': [(0, 1), (0, 8), (0, 4), (0, 5), (0, 2), (0, 7), (0, 3), (0, 6)],
+        'rounds': [[True, True, False, False, True], [None], [None]],
+    },
+    'eurocup': {
+        'direct_spots': 8,
+        'play_in': None,
+        'bracket': [
+            (0, 1), (1, 8), (1, 4), (0, 5), (1, 2), (0, 7), (0, 3), (1, 6),
+            (1, 1), (0, 8), (0, 4), (1, 5), (0, 2), (1, 7), (1, 3), (0, 6),
+        ],
+        'rounds': [[True], [True], [True], [True, False, True]],
+    },
+}
+
+SEASON_SIMULATION_COLUMNS = [
+    'season', 'teamcode', 'team', 'simulations', 'wins', 'losses', 'remaining_games', 'expected_wins',
+    'expected_losses', 'avg_position', 'direct_playoff_odds', 'play_in_odds', 'playoff_odds',
+    'final_four_odds', 'champion_odds',
+]
+
+def remaining_games(schedule_df, team_records_df):
+    """
+    Regular season games of a get_gamecodes_season frame that have not been played yet.
+    The API's played flag is not reliable (it is cast from the strings 'true' and 'false'),
+    so games with no score or already in the team records count as played.
+    """
+    played_codes = set(team_records_df['Gamecode'].astype(str))
+    unplayed = (
+        (schedule_df['Phase'] == 'RS')
+        & (~schedule_df['played'].astype(bool) | (schedule_df['homescore'] + schedule_df['awayscore'] == 0))
+        & ~schedule_df['gameCode'].astype(str).isin(played_codes)
+    )
+    return pd.DataFrame({
+        'gamecode': schedule_df.loc[unplayed, 'gameCode'].astype(str),
+        'round': schedule_df.loc[unplayed, 'Round'].astype(int),
+        'home_code': schedule_df.loc[unplayed, 'homecode'].astype(str),
+        'home_team': schedule_df.loc[unplayed, 'hometeam'].astype(str),
+        'away_code': schedule_df.loc[unplayed, 'awaycode'].astype(str),
+        'away_team': schedule_df.loc[unplayed, 'awayteam'].astype(str),
+    }).reset_index(drop=True)
+
+def schedule_groups(home_index, away_index, n_teams):
+    """
+    Group number of every team: teams linked by any regular season game share a group
+    """
+    group = np.arange(n_teams)
+    for home, away in zip(home_index, away_index):
+        a, b = group[home], group[away]
+        if a != b:
+            group[group == max(a, b)] = min(a, b)
+    return np.unique(group, return_inverse=True)[1]
+
+def home_win_probability(home_rating, away_rating, neutral=False):
+    edge = 0.0 if neutral else ELO_HOME_ADVANTAGE
+    return 1 / (1 + 10 ** (-(home_rating + edge - away_rating) / 400))
+
+def play_series(high, low, ratings, venues, rng):
+    """
+    Winners of series between the better seeds high and the others low, (simulations,) arrays
+    of team numbers, playing every game in venues. The majority of all games decides the
+    series, which is the same as first to a majority.
+    """
+    high_wins = np.zeros(len(high), dtype=np.int64)
+    for venue in venues:
+        if venue is None:
+            p_high = home_win_probability(ratings[high], ratings[low], neutral=True)
+        elif venue:
+            p_high = home_win_probability(ratings[high], ratings[low])
+        else:
+            p_high = 1 - home_win_probability(ratings[low], ratings[high])
+        high_wins += rng.random(len(high)) < p_high
+    return np.where(high_wins * 2 > len(venues), high, low)
+
+def _simulate_chunk(inputs, n_sims, seed):
+    rng = np.random.default_rng(seed)
+    ratings = inputs['ratings']
+    fmt = COMPETITION_FORMATS[inputs['competition']]
+    home, away, group = inputs['home_index'], inputs['away_index'], inputs['group']
+    n_teams = len(ratings)
+    rows = np.arange(n_sims)[:, None]
+
+    # Every remaining game of every simulation at once: margins around the Elo spread
+    spread = (ratings[home] + ELO_HOME_ADVANTAGE - ratings[away]) / ELO_POINTS_PER_MARGIN
+    margins = spread + MARGIN_SD * rng.standard_normal((n_sims, len(home)))
+    home_won = (margins > 0).astype(np.float64)
+    # (games, teams) incidence of the home and away sides turns the tallies into two matrix products
+    home_games = np.zeros((len(home), n_teams))
+    home_games[np.arange(len(home)), home] = 1
+    away_games = np.zeros((len(away), n_teams))
+    away_games[np.arange(len(away)), away] = 1
+    wins = inputs['wins'] + home_won @ home_games + (1 - home_won) @ away_games
+    diff = inputs['diff'] + margins @ (home_games - away_games)
+
+    # Same for the flattened head-to-head matrices, one (home, away) and one (away, home) cell per game
+    home_pairs = np.zeros((len(home), n_teams * n_teams))
+    home_pairs[np.arange(len(home)), home * n_teams + away] = 1
+    away_pairs = np.zeros((len(home), n_teams * n_teams))
+    away_pairs[np.arange(len(home)), away * n_teams + home] = 1
+    positions = np.empty((n_sims, n_teams), dtype=np.int64)
+    for start in range(0, n_sims, RANK_BLOCK):
+        block = slice(start, start + RANK_BLOCK)
+        h2h_wins = inputs['h2h_wins'].ravel() + home_won[block] @ home_pairs + (1 - home_won[block]) @ away_pairs
+        h2h_diff = inputs['h2h_diff'].ravel() + margins[block] @ (home_pairs - away_pairs)
+        n_block = len(h2h_wins)
+        # Points scored only break ties the margins leave, so the played games' totals serve
+        positions[block] = rank_with_tiebreaks(
+            wins[block], h2h_wins.reshape(n_block, n_teams, n_teams), h2h_diff.reshape(n_block, n_teams, n_teams),
+            diff[block], np.tile(inputs['points'], (n_block, 1)), group
+        )
+    # Seeds across groups: position, then wins and point difference
+    seed_rank = np.argsort(np.argsort(positions * 1e12 - (wins * 1e6 + diff), axis=1), axis=1)
+
+    # Team number at each (group, position) of every simulation, -1 for positions no team holds
+    last_position = max([position for _, position in fmt['bracket']] + list(fmt['play_in'] or []))
+    slot = np.full((n_sims, max(group.max() + 1, 2), max(n_teams, last_position) + 1), -1)
+    slot[rows, group[None, :], positions] = np.arange(n_teams)[None, :]
+    if fmt['play_in'] and (slot[:, 0, fmt['play_in'][0]:fmt['play_in'][1] + 1] >= 0).all():
+        first, last = fmt['play_in']
+        s7, s8, s9, s10 = (slot[:, 0, position] for position in range(first, last + 1))
+        winner_a = play_series(s7, s8, ratings, [True], rng)
+        loser_a = np.where(winner_a == s7, s8, s7)
+        winner_b = play_series(s9, s10, ratings, [True], rng)
+        winner_c = play_series(loser_a, winner_b, ratings, [True], rng)
+        slot[:, 0, first], slot[:, 0, first + 1] = winner_a, winner_c
+
+    counts = {
+        'wins': wins.sum(axis=0),
+        'position': positions.sum(axis=0),
+        'direct': (positions <= fmt['direct_spots']).sum(axis=0),
+        'play_in': np.zeros(n_teams),
+        'playoffs': np.zeros(n_teams),
+        'final_four': np.zeros(n_teams),
+        'champion': np.zeros(n_teams),
+    }
+    if fmt['play_in']:
+        counts['play_in'] = ((positions >= fmt['play_in'][0]) & (positions <= fmt['play_in'][1])).sum(axis=0)
+
+    bracket = np.column_stack([slot[:, g, position] for g, position in fmt['bracket']])
+    if (bracket < 0).any():
+        # Groups smaller than the bracket (or fewer groups than the format has): the postseason
+        # odds are unknown rather than 0
+        counts.update(playoffs=None, final_four=None, champion=None)
+        return counts
+    counts['playoffs'] = np.bincount(bracket.ravel(), minlength=n_teams)
+    for venues in fmt['rounds']:
+        if bracket.shape[1] == 4:
+            counts['final_four'] = np.bincount(bracket.ravel(), minlength=n_teams)
+        a, b = bracket[:, 0::2], bracket[:, 1::2]
+        a_better = np.take_along_axis(seed_rank, a, axis=1) < np.take_along_axis(seed_rank, b, axis=1)
+        high, low = np.where(a_better, a, b), np.where(a_better, b, a)
+        bracket = play_series(high.ravel(), low.ravel(), ratings, venues, rng).reshape(high.shape)
+    counts['champion'] = np.bincount(bracket.ravel(), minlength=n_teams)
+    return counts
+
+def simulate_season(team_records_df, remaining_df, competition, season, ratings,
+                    simulations=SEASON_SIMULATIONS, workers=1, seed=None):
+    """
+    Play out the rest of a regular season and the postseason simulations times, vectorized
+    across simulations, and return every team's odds. ratings maps team codes to Elo
+    ratings. With workers > 1 the simulations are split over a process pool. The postseason
+    odds are NaN when the groups found do not fit the competition's bracket.
+    """
+    played = team_records_df[(team_records_df['Season'] == season) & (team_records_df['Phase'] == 'RS')]
+    names = dict(zip(played['TeamCode'].astype(str), played['Team'].astype(str)))
+    for code_col, name_col in (('home_code', 'home_team'), ('away_code', 'away_team')):
+        for code, name in zip(remaining_df[code_col], remaining_df[name_col]):
+            names.setdefault(code, name)
+    teams = np.array(sorted(names))
+    if len(teams) == 0:
+        return pd.DataFrame(columns=SEASON_SIMULATION_COLUMNS)
+
+    team_index = np.searchsorted(teams, played['TeamCode'].astype(str).to_numpy())
+    opp_index = np.searchsorted(teams, played['OpponentCode'].astype(str).to_numpy())
+    home_index = np.searchsorted(teams, remaining_df['home_code'].to_numpy())
+    away_index = np.searchsorted(teams, remaining_df['away_code'].to_numpy())
+    played_wins = np.bincount(team_index, weights=(played['Result'] == 'Win').to_numpy(), minlength=len(teams))
+    played_losses = np.bincount(team_index, weights=(played['Result'] == 'Loss').to_numpy(), minlength=len(teams))
+    h2h_wins, h2h_diff = head_to_head_matrices(played, teams)
+    inputs = {
+        'competition': competition,
+        'ratings': np.array([ratings.get(code, ELO_INITIAL) for code in teams], dtype=np.float64),
+        'wins': played_wins,
+        'diff': np.bincount(team_index, weights=(played['Team_Score'] - played['Opponent_Score']).to_numpy(dtype=float),
+                            minlength=len(teams)),
+        'points': np.bincount(team_index, weights=played['Team_Score'].to_numpy(dtype=float), minlength=len(teams)),
+        'h2h_wins': h2h_wins,
+        'h2h_diff': h2h_diff,
+        'home_index': home_index,
+        'away_index': away_index,
+        'group': schedule_groups(np.concatenate([team_index, home_index]), np.concatenate([opp_index, away_index]), len(teams)),
+    }
+
+    chunk_sizes = [len(chunk) for chunk in np.array_split(np.arange(simulations), max(workers, 1)) if len(chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    if workers > 1:
+        # Stages run on scheduler threads, and forking a threaded process can deadlock the child
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_simulate_chunk, [inputs] * len(chunk_sizes), chunk_sizes, seeds))
+    else:
+        results = [_simulate_chunk(inputs, n_sims, chunk_seed) for n_sims, chunk_seed in zip(chunk_sizes, seeds)]
+    totals = {
+        key: None if results[0][key] is None else sum(result[key] for result in results)
+        for key in results[0]
+    }
+    if totals['champion'] is None:
+        sizes = np.bincount(inputs['group'])
+        print(f"Warning: {competition} groups of {sizes.tolist()} teams do not fit its playoff bracket, "
+              f"leaving the playoff, Final Four and champion odds empty")
+    postseason = lambda key: np.full(len(teams), np.nan) if totals[key] is None else totals[key] / simulations * 100
+
+    remaining = np.bincount(np.concatenate([home_index, away_index]), minlength=len(teams))
+    odds = pd.DataFrame({
+        'season': season,
+        'teamcode': teams,
+        'team': [names[code] for code in teams],
+        'simulations': simulations,
+        'wins': played_wins.astype(int),
+        'losses': played_losses.astype(int),
+        'remaining_games': remaining,
+        'expected_wins': totals['wins'] / simulations,
+        'avg_position': totals['position'] / simulations,
+        'direct_playoff_odds': totals['direct'] / simulations * 100,
+        'play_in_odds': totals['play_in'] / simulations * 100,
+        'playoff_odds': postseason('playoffs'),
+        'final_four_odds': postseason('final_four'),
+        'champion_odds': postseason('champion'),
+    })
+    odds['expected_losses'] = odds['wins'] + odds['losses'] + odds['remaining_games'] - odds['expected_wins']
+    return odds[SEASON_SIMULATION_COLUMNS].sort_values('avg_position', ignore_index=True)
+
+def insert_season_simulation_to_db(odds_df, competition, write_strategy='values', **write_options):
+    """
+    Insert simulated season odds, replacing the seasons present in the data
+    """
+    if odds_df.empty:
+        print(f"No season simulation to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"season_simulation_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            teamcode TEXT NOT NULL,
+            team TEXT,
+            simulations INTEGER,
+            wins INTEGER,
+            losses INTEGER,
+            remaining_games INTEGER,
+            expected_wins DECIMAL(5,2),
+            expected_losses DECIMAL(5,2),
+            avg_position DECIMAL(5,2),
+            direct_playoff_odds DECIMAL(5,2),
+            play_in_odds DECIMAL(5,2),
+            playoff_odds DECIMAL(5,2),
+            final_four_odds DECIMAL(5,2),
+            champion_odds DECIMAL(5,2),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(season, teamcode)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(odds_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        rows = dataframe_to_tuples(odds_df.round(2), SEASON_SIMULATION_COLUMNS)
+        write_stats = upsert_rows(
+            conn, cursor, table_name, SEASON_SIMULATION_COLUMNS, rows, ['season', 'teamcode'],
+            strategy=write_strategy, extra_updates=['updated_at = CURRENT_TIMESTAMP'], **write_options
+        )
+        print(f"Upserted odds for {write_stats['rows']} teams into {table_name}")
+
+        print(f"\nPlayoff odds in {competition} after {odds_df['simulations'].iloc[0]} simulations:")
+        for _, row in odds_df.head(10).iterrows():
+            print(f"{row['team']} ({row['wins']}-{row['losses']}): playoffs {row['playoff_odds']:.1f}%, "
+                  f"Final Four {row['final_four_odds']:.1f}%, champion {row['champion_odds']:.1f}%")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error inserting season simulation: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,212 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from .db import get_connection
+from .shot_density import grid_shape, shot_cells
+from .shots import COURT_PARAMS
+from .writes import upsert_rows
+
+# Bump whenever the stored layout changes; indexes of another version are rebuilt, not read
+SPATIAL_INDEX_VERSION = 1
+SPATIAL_CELL_SIZE = 50
+
+# Shot columns kept in the index to answer queries without going back to the shot table
+INDEX_COLUMNS = ['ID_PLAYER', 'PLAYER', 'TEAM', 'Gamecode', 'NUM_ANOT', 'Bin', 'made', 'POINTS']
+
+class ShotSpatialIndex:
+    """
+    Uniform grid over the court for one competition-season. Shots are sorted by grid cell,
+    so every query reads one contiguous slice per grid row of its bounding box and only
+    tests the exact shape on those candidates. Queries return positions into frame().
+    """
+
+    def __init__(self, x, y, cell_starts, columns, season, cell_size, min_x, min_y, nx, ny):
+        self.x = x
+        self.y = y
+        self.cell_starts = cell_starts
+        self.columns = columns
+        self.season = season
+        self.cell_size = cell_size
+        self.min_x = min_x
+        self.min_y = min_y
+        self.nx = nx
+        self.ny = ny
+
+    @classmethod
+    def build(cls, shot_data_df, season, cell_size=SPATIAL_CELL_SIZE, court_params=COURT_PARAMS):
+        """
+        Index the shots of one season that have coordinates
+        """
+        nx, ny = grid_shape(court_params, cell_size)
+        cells = shot_cells(shot_data_df, court_params, cell_size)
+        placed = np.flatnonzero(cells >= 0)
+        order = placed[np.argsort(cells[placed], kind='stable')]
+        columns = {
+            col: shot_data_df[col].to_numpy()[order].astype(np.int32 if col in ('made', 'POINTS', 'NUM_ANOT') else str)
+            for col in INDEX_COLUMNS if col in shot_data_df.columns
+        }
+        return cls(
+            pd.to_numeric(shot_data_df['COORD_X']).to_numpy(dtype=np.float32, na_value=np.nan)[order],
+            pd.to_numeric(shot_data_df['COORD_Y']).to_numpy(dtype=np.float32, na_value=np.nan)[order],
+            np.searchsorted(cells[order], np.arange(nx * ny + 1)).astype(np.int32),
+            columns, season, cell_size, court_params['court_min_x'], court_params['court_min_y'], nx, ny
+        )
+
+    def __len__(self):
+        return len(self.x)
+
+    def _cell_range(self, value, origin, n):
+        return int(np.clip(np.floor((value - origin) / self.cell_size), 0, n - 1))
+
+    def _candidates(self, min_x, min_y, max_x, max_y):
+        ix0, ix1 = self._cell_range(min_x, self.min_x, self.nx), self._cell_range(max_x, self.min_x, self.nx)
+        iy0, iy1 = self._cell_range(min_y, self.min_y, self.ny), self._cell_range(max_y, self.min_y, self.ny)
+        rows = np.arange(iy0, iy1 + 1) * self.nx
+        starts = self.cell_starts[rows + ix0]
+        ends = self.cell_starts[rows + ix1 + 1]
+        if len(starts) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+
+    def _filter_bins(self, positions, bins):
+        if bins is None:
+            return positions
+        return positions[np.isin(self.columns['Bin'][positions], list(bins))]
+
+    def radius(self, x, y, r, bins=None):
+        """
+        Shots within r (court units) of (x, y)
+        """
+        positions = self._candidates(x - r, y - r, x + r, y + r)
+        positions = positions[(self.x[positions] - x) ** 2 + (self.y[positions] - y) ** 2 <= r * r]
+        return self._filter_bins(positions, bins)
+
+    def rect(self, min_x, min_y, max_x, max_y, bins=None):
+        """
+        Shots inside the axis-aligned rectangle, edges included
+        """
+        positions = self._candidates(min_x, min_y, max_x, max_y)
+        xs, ys = self.x[positions], self.y[positions]
+        positions = positions[(xs >= min_x) & (xs <= max_x) & (ys >= min_y) & (ys <= max_y)]
+        return self._filter_bins(positions, bins)
+
+    def polygon(self, vertices, bins=None):
+        """
+        Shots inside a simple polygon given as [(x, y), ...] (even-odd rule)
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        positions = self._candidates(*vertices.min(axis=0), *vertices.max(axis=0))
+        xs, ys = self.x[positions].astype(np.float64), self.y[positions].astype(np.float64)
+        inside = np.zeros(len(positions), dtype=bool)
+        for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+            crosses = (y0 > ys) != (y1 > ys)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                at_x = x0 + (ys - y0) * (x1 - x0) / (y1 - y0)
+            inside ^= crosses & (xs < at_x)
+        return self._filter_bins(positions[inside], bins)
+
+    def frame(self, positions=None):
+        """
+        The indexed shots (or those at positions) as a DataFrame
+        """
+        positions = slice(None) if positions is None else positions
+        return pd.DataFrame({
+            'Season': self.season,
+            'COORD_X': self.x[positions],
+            'COORD_Y': self.y[positions],
+            **{col: values[positions] for col, values in self.columns.items()},
+        })
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer, x=self.x, y=self.y, cell_starts=self.cell_starts,
+            meta=np.array([self.season, self.cell_size, self.min_x, self.min_y, self.nx, self.ny], dtype=np.float64),
+            **{f"col_{col}": values for col, values in self.columns.items()}
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob):
+        data = np.load(io.BytesIO(bytes(blob)), allow_pickle=False)
+        season, cell_size, min_x, min_y, nx, ny = data['meta']
+        return cls(
+            data['x'], data['y'], data['cell_starts'],
+            {name[4:]: data[name] for name in data.files if name.startswith('col_')},
+            int(season), cell_size, min_x, min_y, int(nx), int(ny)
+        )
+
+def build_spatial_indexes(shot_data_df, cell_size=SPATIAL_CELL_SIZE):
+    """
+    One spatial index per season of a competition's classified shots
+    """
+    return {
+        int(season): ShotSpatialIndex.build(season_df, int(season), cell_size)
+        for season, season_df in shot_data_df.groupby('Season', observed=True)
+    }
+
+def insert_spatial_indexes_to_db(indexes, competition, write_strategy='values', **write_options):
+    """
+    Store each season's serialised index next to the shot table, replacing those seasons
+    """
+    if not indexes:
+        print(f"No spatial indexes to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"shot_spatial_index_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            season INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            cell_size REAL,
+            shots INTEGER,
+            index_data BYTEA,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        conn.commit()
+
+        rows = [
+            (season, SPATIAL_INDEX_VERSION, index.cell_size, len(index), memoryview(index.to_bytes()))
+            for season, index in sorted(indexes.items())
+        ]
+        write_stats = upsert_rows(
+            conn, cursor, table_name, ['season', 'version', 'cell_size', 'shots', 'index_data'], rows, ['season'],
+            strategy=write_strategy, extra_updates=['updated_at = CURRENT_TIMESTAMP'], **write_options
+        )
+        size_kb = sum(len(row[4]) for row in rows) / 1024
+        print(f"Stored spatial indexes for seasons {sorted(indexes)} in {table_name} ({size_kb:.0f} KB)")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error during database operation for spatial indexes: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def load_spatial_index(competition, season):
+    """
+    Read a season's stored index, or None when it is missing or of another version
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT version, index_data FROM shot_spatial_index_{competition} WHERE season = %s", (season,)
+        )
+        row = cursor.fetchone()
+        if row is None or row[0] != SPATIAL_INDEX_VERSION:
+            return None
+        return ShotSpatialIndex.from_bytes(row[1])
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import re
+import threading
+import time
+
+import psycopg2.extensions
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_NULL = re.compile(r"\b(?:NULL|TRUE|FALSE)\b", re.IGNORECASE)
+_GROUP = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_GROUPS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE = re.compile(r"\s+")
+
+EXPLAINABLE = ('select', 'with', 'insert', 'update', 'delete')
+
+def fingerprint(sql):
+    """
+    Normalise a statement so executions that differ only in literals (including every
+    execute_values page and IN list) share one fingerprint
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', errors='replace')
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _NULL.sub('?', sql)
+    sql = _GROUP.sub('(?)', sql)
+    sql = _GROUPS.sub('(?)', sql)
+    return _SPACE.sub(' ', sql).strip().rstrip(';')
+
+class SqlTrace:
+    """
+    Per-run statement statistics keyed by fingerprint, with an optional JSON-lines log of
+    every statement and EXPLAIN (ANALYZE, BUFFERS) captured once per fingerprint for
+    statements slower than explain_over seconds
+    """
+
+    def __init__(self, log_path=None, explain_over=None):
+        self.log_path = log_path
+        self.explain_over = explain_over
+        self.statements = {}
+        self._lock = threading.Lock()
+        self._log = open(log_path, 'a') if log_path else None
+
+    def record(self, cursor, sql, duration, rows, sent, span_path=None):
+        text = fingerprint(sql)
+        statement_id = hashlib.md5(text.encode()).hexdigest()[:12]
+        with self._lock:
+            stats = self.statements.setdefault(statement_id, {
+                'fingerprint': text[:500],
+                'calls': 0,
+                'total_s': 0.0,
+                'max_s': 0.0,
+                'rows': 0,
+                'bytes_sent': 0,
+                'explain': None,
+            })
+            stats['calls'] += 1
+            stats['total_s'] += duration
+            stats['max_s'] = max(stats['max_s'], duration)
+            stats['rows'] += rows
+            stats['bytes_sent'] += sent
+            explain = (self.explain_over is not None and duration >= self.explain_over and stats['explain'] is None)
+            if explain:
+                stats['explain'] = 'pending'
+            if self._log:
+                self._log.write(json.dumps({
+                    'at': time.time(), 'statement_id': statement_id, 'span': span_path,
+                    'duration_s': round(duration, 6), 'rows': rows, 'bytes_sent': sent,
+                    'fingerprint': text[:200],
+                }) + '\n')
+        if explain:
+            # A failed EXPLAIN is noted in the trace, never raised into the statement's caller
+            try:
+                plan = explain_statement(cursor.connection, sql)
+            except Exception as e:
+                print(f"Could not capture EXPLAIN for statement {statement_id}: {e}")
+                plan = f"EXPLAIN failed: {e}"
+            with self._lock:
+                stats['explain'] = plan
+
+    def top(self, n=20):
+        with self._lock:
+            ranked = sorted(self.statements.items(), key=lambda item: item[1]['total_s'], reverse=True)[:n]
+        return [
+            {'statement_id': statement_id, **stats, 'total_s': round(stats['total_s'], 4), 'max_s': round(stats['max_s'], 4)}
+            for statement_id, stats in ranked
+        ]
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+def explain_statement(conn, sql):
+    """
+    Re-run a statement under EXPLAIN (ANALYZE, BUFFERS) inside a savepoint that is rolled
+    back, so writes are not applied twice. Returns the plan text, or None when the
+    statement cannot be explained safely.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', errors='replace')
+    verb = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ''
+    if verb not in EXPLAINABLE:
+        return None
+    # Outside a transaction block there is nothing to roll back to, so only reads are explained
+    if conn.autocommit and verb not in ('select', 'with'):
+        return None
+    # An aborted transaction accepts no further statements, not even a savepoint
+    if conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        return None
+
+    cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+    try:
+        if not conn.autocommit:
+            cursor.execute("SAVEPOINT stretch5_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+            return '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            return f"EXPLAIN failed: {e}"
+        finally:
+            if not conn.autocommit:
+                cursor.execute("ROLLBACK TO SAVEPOINT stretch5_explain")
+                cursor.execute("RELEASE SAVEPOINT stretch5_explain")
+    finally:
+        cursor.close()
@@ -0,0 +1,476 @@
+import threading
+from collections import OrderedDict
+
+from euroleague_api.boxscore_data import BoxScoreData
+from euroleague_api.game_stats import GameStats
+from euroleague_api.shot_data import ShotData
+
+from .dtypes import frame_memory_mb, optimize_dtypes
+from .instrumentation import measured, span
+from .game_logs import insert_euroleague_game_logs_to_db, prepare_game_logs, stream_game_logs_to_db
+from .player_advanced import calculate_player_advanced_stats, insert_player_advanced_stats_to_db
+from .player_form import update_player_form
+from .player_stats import update_player_stats_incremental
+from .ratings import (
+    calculate_adjusted_team_ratings,
+    get_elo_ratings,
+    insert_adjusted_team_ratings_to_db,
+    update_elo_ratings,
+)
+from .schedule import (
+    calculate_head_to_head,
+    create_cumulative_standings,
+    create_team_records_dataset_eurocup,
+    create_team_records_dataset_euroleague,
+    insert_cumulative_standings_to_db,
+    insert_head_to_head_to_db,
+    insert_schedule_results_to_db,
+)
+from .shot_density import calculate_shot_density_grids, insert_shot_density_grids_to_db
+from .simulation import SEASON_SIMULATIONS, insert_season_simulation_to_db, remaining_games, simulate_season
+from .spatial import build_spatial_indexes, insert_spatial_indexes_to_db
+from .shots import (
+    COURT_PARAMS,
+    calculate_league_averages,
+    calculate_shot_quality,
+    calculate_shot_zone_aggregates,
+    classify_shots_py,
+    classify_zones_py,
+    insert_league_averages_to_db,
+    insert_shot_data_to_db,
+    insert_shot_quality_to_db,
+    insert_shot_zone_aggregates_to_db,
+    stream_shot_data_to_db,
+)
+from .team_stats import (
+    calculate_advanced_team_stats,
+    calculate_team_game_stats,
+    calculate_team_ratings_timeline,
+    get_team_logos_from_schedule,
+    insert_team_advanced_stats_to_db,
+    insert_team_game_stats_to_db,
+    insert_team_ratings_timeline_to_db,
+    match_opponents,
+)
+
+COMPETITION_CODES = {
+    'euroleague': 'E',
+    'eurocup': 'U',
+}
+
+# Seasons of each dataset kept for other streaming stages to reuse. Stages running in
+# parallel on the same season share one fetch; older seasons are dropped so memory does
+# not grow with the season range.
+SEASON_CACHE_SIZE = 2
+
+BATCH_SOURCE_LABELS = {
+    'boxscores': 'boxscores',
+    'classified_shots': 'shot data',
+}
+
+TEAM_RECORDS_BUILDERS = {
+    'euroleague': create_team_records_dataset_euroleague,
+    'eurocup': create_team_records_dataset_eurocup,
+}
+
+class RunContext:
+    """
+    Data for one competition and set of seasons. Each dataset is fetched or built the first
+    time a stage asks for it, so a run only pays for what its stages touch.
+    """
+
+    def __init__(self, competition, seasons, player_stats_mode='incremental', write_strategy=None, lean_dtypes=True,
+                 chunk_size=None, chunk_by='game', simulations=SEASON_SIMULATIONS, simulation_workers=1):
+        self.competition = competition
+        self.code = COMPETITION_CODES[competition]
+        self.seasons = sorted(seasons)
+        self.player_stats_mode = player_stats_mode
+        self.lean_dtypes = lean_dtypes
+        # None keeps each table's own default write strategy
+        self.write_options = {'write_strategy': write_strategy} if write_strategy else {}
+        # With a chunk size the boxscore and shot stages run one season at a time
+        self.chunk_size = chunk_size
+        self.chunk_by = chunk_by
+        self.simulations = simulations
+        self.simulation_workers = simulation_workers
+        self._cache = {}
+        self._season_cache = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, name, build):
+        # One lock per dataset so stages running in parallel share a single fetch
+        # without serialising unrelated fetches
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._cache:
+                self._cache[name] = build()
+        return self._cache[name]
+
+    def _fetch(self, name, fetch, dtypes=None, seasons=None):
+        seasons = seasons or self.seasons
+        with span(f"fetch_{name}", competition=self.competition) as current:
+            df = fetch(seasons[0], seasons[-1])
+            if not df.empty:
+                df = df[df['Season'].isin(seasons)]
+            current.rows_out = len(df)
+            if dtypes and self.lean_dtypes and not df.empty:
+                raw_mb = frame_memory_mb(df)
+                df = optimize_dtypes(df, dtypes)
+                current.extra.update(raw_mb=round(raw_mb, 1), lean_mb=round(frame_memory_mb(df), 1))
+                print(f"{self.competition} {name}: {raw_mb:.1f} MB -> {current.extra['lean_mb']:.1f} MB with lean dtypes")
+        return df
+
+    def _season_cached(self, name, season, build):
+        key = (name, season)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            with self._lock:
+                if key in self._season_cache:
+                    self._season_cache.move_to_end(key)
+                    return self._season_cache[key]
+            df = build()
+            with self._lock:
+                self._season_cache[key] = df
+                cached = [cached_key for cached_key in self._season_cache if cached_key[0] == name]
+                for stale in cached[:-SEASON_CACHE_SIZE]:
+                    del self._season_cache[stale]
+        return df
+
+    def game_reports(self):
+        return self._cached('game_reports', lambda: self._fetch(
+            'game_reports', GameStats(self.code).get_game_reports_range_seasons
+        ))
+
+    def team_records(self):
+        return self._cached('team_records', lambda: measured(TEAM_RECORDS_BUILDERS[self.competition], self.game_reports()))
+
+    def season_schedule(self):
+        # Every game of the latest season, played or not, for the season simulation
+        return self._cached('season_schedule', lambda: measured(
+            GameStats(self.code).get_gamecodes_season, self.seasons[-1]
+        ))
+
+    def boxscores(self):
+        return self._cached('boxscores', lambda: self._fetch(
+            'boxscores', BoxScoreData(competition=self.code).get_player_boxscore_stats_multiple_seasons, 'boxscores'
+        ))
+
+    def team_games(self):
+        # Every team Total row paired with its opponent's, shared by the team stats stages
+        return self._cached('team_games', lambda: measured(match_opponents, self.boxscores()))
+
+    def game_logs(self):
+        return self._cached('game_logs', lambda: measured(prepare_game_logs, self.boxscores()))
+
+    def shots(self):
+        return self._cached('shots', lambda: self._fetch(
+            'shots', ShotData(competition=self.code).get_game_shot_data_multiple_seasons, 'shots'
+        ))
+
+    def _classify(self, shot_data):
+        if shot_data.empty:
+            return shot_data
+        shot_data = measured(classify_shots_py, shot_data)
+        with span('classify_zones_py', competition=self.competition, rows_in=len(shot_data)) as current:
+            shot_data['Bin'] = shot_data.apply(lambda row: classify_zones_py(row, COURT_PARAMS), axis=1)
+            current.rows_out = len(shot_data)
+        print(f"Processed {len(shot_data)} {self.competition} shots")
+        return shot_data
+
+    def classified_shots(self):
+        return self._cached('classified_shots', lambda: self._classify(self.shots()))
+
+    def league_shot_averages(self):
+        # (season, bin) league rates, the lookup table for expected points
+        return self._cached('league_shot_averages', lambda: measured(calculate_league_averages, self.classified_shots()))
+
+    def batches(self, *names):
+        """
+        Yield a tuple of the named datasets (boxscores, team_games, game_logs, classified_shots,
+        league_shot_averages) per batch. That is every season at once, or with a chunk size one
+        season at a time, newest first, so a backfill holds a season in memory rather than all
+        of them. Batches whose boxscores or shots are empty are skipped.
+        """
+        source = 'classified_shots' if {'classified_shots', 'league_shot_averages'} & set(names) else 'boxscores'
+        for seasons, get in self._batch_sources():
+            if get(source).empty:
+                print(f"No {self.competition} {BATCH_SOURCE_LABELS[source]} retrieved for seasons {seasons}")
+                continue
+            yield tuple(get(name) for name in names)
+
+    def _batch_sources(self):
+        if not self.chunk_size:
+            yield self.seasons, lambda name: getattr(self, name)()
+            return
+
+        sequence_offsets = {}
+        for season in sorted(self.seasons, reverse=True):
+            frames = {}
+
+            def get(name):
+                if name not in frames:
+                    if name == 'boxscores':
+                        frames[name] = self._season_cached(name, season, lambda: self._fetch(
+                            name, BoxScoreData(competition=self.code).get_player_boxscore_stats_multiple_seasons,
+                            'boxscores', [season]
+                        ))
+                    elif name == 'team_games':
+                        frames[name] = measured(match_opponents, get('boxscores'))
+                    elif name == 'game_logs':
+                        # Offsets carried from the newer seasons keep GameSequence as in a full run
+                        frames[name] = measured(prepare_game_logs, get('boxscores'), sequence_offsets)
+                    elif name == 'classified_shots':
+                        frames[name] = self._season_cached(name, season, lambda: self._classify(self._fetch(
+                            'shots', ShotData(competition=self.code).get_game_shot_data_multiple_seasons,
+                            'shots', [season]
+                        )))
+                    elif name == 'league_shot_averages':
+                        frames[name] = measured(calculate_league_averages, get('classified_shots'))
+                    else:
+                        raise ValueError(f"Unknown dataset {name!r}")
+                return frames[name]
+
+            yield [season], get
+
+    def season_game_logs(self):
+        for (game_logs,) in self.batches('game_logs'):
+            yield game_logs
+
+    def season_classified_shots(self):
+        for (shot_data,) in self.batches('classified_shots'):
+            yield shot_data
+
+def fetch_game_reports(ctx):
+    print(f"Fetched {len(ctx.game_reports())} {ctx.competition} game reports")
+
+def fetch_boxscores(ctx):
+    if ctx.chunk_size:
+        print(f"Streaming {ctx.competition} boxscores per season; each stage reads them one season at a time")
+        return
+    print(f"Fetched {len(ctx.boxscores())} {ctx.competition} boxscore rows")
+
+def fetch_shots(ctx):
+    if ctx.chunk_size:
+        print(f"Streaming {ctx.competition} shots per season; each stage reads them one season at a time")
+        return
+    print(f"Fetched {len(ctx.shots())} {ctx.competition} shots")
+
+def run_schedule_results(ctx):
+    if ctx.game_reports().empty:
+        print(f"No {ctx.competition} game reports for seasons {ctx.seasons}")
+        return
+    measured(insert_schedule_results_to_db, ctx.team_records(), ctx.competition)
+
+def run_standings(ctx):
+    if ctx.game_reports().empty:
+        print(f"No {ctx.competition} game reports for seasons {ctx.seasons}")
+        return
+    standings = measured(create_cumulative_standings, ctx.team_records(), ctx.competition)
+    measured(insert_cumulative_standings_to_db, standings, ctx.competition)
+
+def run_head_to_head(ctx):
+    if ctx.game_reports().empty:
+        print(f"No {ctx.competition} game reports for seasons {ctx.seasons}")
+        return
+    head_to_head = measured(calculate_head_to_head, ctx.team_records())
+    measured(insert_head_to_head_to_db, head_to_head, ctx.competition, **ctx.write_options)
+
+def run_elo(ctx):
+    if ctx.game_reports().empty:
+        print(f"No {ctx.competition} game reports for seasons {ctx.seasons}")
+        return
+    measured(update_elo_ratings, ctx.team_records(), ctx.competition, ctx.player_stats_mode == 'rebuild',
+             **ctx.write_options)
+
+def run_season_simulation(ctx):
+    if ctx.game_reports().empty:
+        print(f"No {ctx.competition} game reports for seasons {ctx.seasons}")
+        return
+    season = ctx.seasons[-1]
+    remaining = measured(remaining_games, ctx.season_schedule(), ctx.team_records())
+    if remaining.empty:
+        print(f"The {season} {ctx.competition} regular season is complete, keeping the last simulated odds")
+        return
+    # Team strengths are the published Elo ratings, so the odds agree with elo_ratings_{competition}
+    ratings = measured(get_elo_ratings, ctx.competition, season)
+    if not ratings:
+        raise ValueError(f"No stored {ctx.competition} Elo ratings to simulate with; run the elo stage first")
+    odds = measured(simulate_season, ctx.team_records(), remaining, ctx.competition, season, ratings,
+                    ctx.simulations, ctx.simulation_workers)
+    measured(insert_season_simulation_to_db, odds, ctx.competition, **ctx.write_options)
+
+def run_team_advanced_stats(ctx):
+    team_logos = measured(get_team_logos_from_schedule, ctx.competition)
+    for boxscores, team_games in ctx.batches('boxscores', 'team_games'):
+        stats_df = measured(calculate_advanced_team_stats, boxscores, ctx.competition, team_logos, team_games)
+        if stats_df is None:
+            print(f"No team game data found for {ctx.competition}!")
+            continue
+        measured(insert_team_advanced_stats_to_db, stats_df, ctx.competition, **ctx.write_options)
+
+def run_team_game_stats(ctx):
+    team_logos = measured(get_team_logos_from_schedule, ctx.competition)
+    for (team_games,) in ctx.batches('team_games'):
+        if team_games.empty:
+            print(f"No team game data found for {ctx.competition}!")
+            continue
+        game_stats = measured(calculate_team_game_stats, team_games, ctx.competition, team_logos)
+        measured(insert_team_game_stats_to_db, game_stats, ctx.competition, **ctx.write_options)
+
+def run_team_timeline(ctx):
+    for (team_games,) in ctx.batches('team_games'):
+        if team_games.empty:
+            print(f"No team game data found for {ctx.competition}!")
+            continue
+        timeline = measured(calculate_team_ratings_timeline, team_games)
+        measured(insert_team_ratings_timeline_to_db, timeline, ctx.competition, **ctx.write_options)
+
+def run_team_adjusted_ratings(ctx):
+    for (team_games,) in ctx.batches('team_games'):
+        if team_games.empty:
+            print(f"No team game data found for {ctx.competition}!")
+            continue
+        ratings = measured(calculate_adjusted_team_ratings, team_games)
+        measured(insert_adjusted_team_ratings_to_db, ratings, ctx.competition, **ctx.write_options)
+
+def run_game_logs(ctx):
+    table_name = f"{ctx.competition}_game_logs"
+    if ctx.chunk_size:
+        measured(stream_game_logs_to_db, ctx.season_game_logs(), table_name, ctx.chunk_size, ctx.chunk_by,
+                 **ctx.write_options)
+        return
+    measured(insert_euroleague_game_logs_to_db, ctx.game_logs(), table_name, **ctx.write_options)
+
+def run_player_stats(ctx):
+    # A rebuild resets the running totals too, so corrected box scores reach later incremental runs
+    for (game_logs,) in ctx.batches('game_logs'):
+        measured(update_player_stats_incremental, game_logs, ctx.competition, ctx.player_stats_mode == 'rebuild')
+
+def run_player_form(ctx):
+    for (game_logs,) in ctx.batches('game_logs'):
+        measured(update_player_form, game_logs, ctx.competition, ctx.player_stats_mode == 'rebuild',
+                 **ctx.write_options)
+
+def run_player_advanced(ctx):
+    for game_logs, team_games in ctx.batches('game_logs', 'team_games'):
+        if team_games.empty:
+            print(f"No team game data found for {ctx.competition}!")
+            continue
+        stats = measured(calculate_player_advanced_stats, game_logs, team_games)
+        measured(insert_player_advanced_stats_to_db, stats, ctx.competition, **ctx.write_options)
+
+def run_shot_data(ctx):
+    if ctx.chunk_size:
+        measured(stream_shot_data_to_db, ctx.season_classified_shots(), ctx.competition, ctx.chunk_size,
+                 ctx.chunk_by, **ctx.write_options)
+        return
+    shot_data = ctx.classified_shots()
+    if shot_data.empty:
+        print(f"No {ctx.competition} shot data retrieved for seasons {ctx.seasons}")
+        return
+    measured(insert_shot_data_to_db, shot_data, ctx.competition, **ctx.write_options)
+
+def run_shot_averages(ctx):
+    # The same cached lookup table shot_quality joins against
+    for (league_averages,) in ctx.batches('league_shot_averages'):
+        measured(insert_league_averages_to_db, league_averages, ctx.competition)
+
+def run_shot_zones(ctx):
+    for (shot_data,) in ctx.batches('classified_shots'):
+        zones = measured(calculate_shot_zone_aggregates, shot_data)
+        measured(insert_shot_zone_aggregates_to_db, zones, ctx.competition, **ctx.write_options)
+
+def run_shot_density(ctx):
+    for (shot_data,) in ctx.batches('classified_shots'):
+        grids = measured(calculate_shot_density_grids, shot_data)
+        measured(insert_shot_density_grids_to_db, grids, ctx.competition, **ctx.write_options)
+
+def run_shot_quality(ctx):
+    for shot_data, league_averages in ctx.batches('classified_shots', 'league_shot_averages'):
+        quality = measured(calculate_shot_quality, shot_data, league_averages)
+        measured(insert_shot_quality_to_db, quality, ctx.competition, **ctx.write_options)
+
+def run_shot_index(ctx):
+    for (shot_data,) in ctx.batches('classified_shots'):
+        indexes = measured(build_spatial_indexes, shot_data)
+        measured(insert_spatial_indexes_to_db, indexes, ctx.competition, **ctx.write_options)
+
+# Stages in the order a full run executes them
+STAGES = {
+    'schedule_results': run_schedule_results,
+    'standings': run_standings,
+    'head_to_head': run_head_to_head,
+    'elo': run_elo,
+    'season_simulation': run_season_simulation,
+    'team_advanced_stats': run_team_advanced_stats,
+    'team_game_stats': run_team_game_stats,
+    'team_timeline': run_team_timeline,
+    'team_adjusted_ratings': run_team_adjusted_ratings,
+    'game_logs': run_game_logs,
+    'player_stats': run_player_stats,
+    'player_form': run_player_form,
+    'player_advanced': run_player_advanced,
+    'shot_data': run_shot_data,
+    'shot_averages': run_shot_averages,
+    'shot_zones': run_shot_zones,
+    'shot_density': run_shot_density,
+    'shot_quality': run_shot_quality,
+    'shot_index': run_shot_index,
+}
+
+# API fetches the stages read from, scheduled as their own nodes so they can run in parallel
+FETCHES = {
+    'game_reports': fetch_game_reports,
+    'boxscores': fetch_boxscores,
+    'shots': fetch_shots,
+}
+
+# Upstream fetches and stages each stage must wait for within a competition.
+# Team logos and incremental player stats read schedule_results back from the database,
+# the season simulation reads the Elo ratings.
+STAGE_DEPENDENCIES = {
+    'schedule_results': ['game_reports'],
+    'standings': ['game_reports', 'schedule_results'],
+    'head_to_head': ['game_reports'],
+    'elo': ['game_reports'],
+    'season_simulation': ['game_reports', 'elo'],
+    'team_advanced_stats': ['boxscores', 'schedule_results'],
+    'team_game_stats': ['boxscores', 'schedule_results'],
+    'team_timeline': ['boxscores'],
+    'team_adjusted_ratings': ['boxscores'],
+    'game_logs': ['boxscores'],
+    'player_stats': ['boxscores', 'game_logs', 'schedule_results'],
+    'player_form': ['boxscores'],
+    'player_advanced': ['boxscores'],
+    'shot_data': ['shots'],
+    'shot_averages': ['shots', 'shot_data'],
+    'shot_zones': ['shots'],
+    'shot_density': ['shots'],
+    'shot_quality': ['shots'],
+    'shot_index': ['shots'],
+}
+
+STAGE_TABLES = {
+    'schedule_results': ['schedule_results_{competition}'],
+    'standings': ['cumulative_standings_{competition}'],
+    'head_to_head': ['head_to_head_{competition}'],
+    'elo': ['elo_history_{competition}', 'elo_ratings_{competition}'],
+    'season_simulation': ['season_simulation_{competition}'],
+    'team_advanced_stats': ['team_advanced_stats_{competition}'],
+    'team_game_stats': ['team_game_stats_{competition}'],
+    'team_timeline': ['team_ratings_timeline_{competition}'],
+    'team_adjusted_ratings': ['team_adjusted_ratings_{competition}'],
+    'game_logs': ['{competition}_game_logs'],
+    'player_stats': ['player_stats_from_gamelogs_{competition}'],
+    'player_form': ['player_form_history_{competition}', 'player_form_current_{competition}'],
+    'player_advanced': ['player_advanced_stats_{competition}'],
+    'shot_data': ['shot_data_{competition}'],
+    'shot_averages': ['shot_data_{competition}_averages'],
+    'shot_zones': ['shot_zone_aggregates_{competition}'],
+    'shot_density': ['shot_density_{competition}'],
+    'shot_quality': ['shot_quality_{competition}'],
+    'shot_index': ['shot_spatial_index_{competition}'],
+}
@@ -0,0 +1,109 @@
+import queue
+import threading
+
+import numpy as np
+
+from .aggregation import factorize_groups
+from .writes import upsert_rows
+
+CHUNK_BY = ('game', 'rows')
+
+_DONE = object()
+
+class _Failed:
+    def __init__(self, error):
+        self.error = error
+
+def iter_chunks(frames, chunk_size, chunk_by='game'):
+    """
+    Split an iterable of frames into chunks of chunk_size games (every row of a game stays
+    in one chunk) or chunk_size rows. Frames are consumed one at a time.
+    """
+    if chunk_by not in CHUNK_BY:
+        raise ValueError(f"Unknown chunking {chunk_by!r}, expected one of {CHUNK_BY}")
+    for df in frames:
+        if df.empty:
+            continue
+        if chunk_by == 'rows':
+            for i in range(0, len(df), chunk_size):
+                yield df.iloc[i:i + chunk_size]
+            continue
+        game_index, n_games = factorize_groups([df['Season'], df['Gamecode']])
+        order = np.argsort(game_index, kind='stable')
+        # First row position (in game order) of every chunk_size-th game
+        starts = np.searchsorted(game_index[order], np.arange(0, n_games, chunk_size))
+        for start, end in zip(starts, list(starts[1:]) + [len(df)]):
+            yield df.iloc[np.sort(order[start:end])]
+
+def bounded_stream(produce, max_pending=2, name='stream'):
+    """
+    Run the generator function produce on a background thread and yield its items. At most
+    max_pending items wait in the queue, so the producer blocks until the consumer catches
+    up. Errors on either side stop both.
+    """
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def work():
+        try:
+            for item in produce():
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failed(e))
+
+    thread = threading.Thread(target=work, name=f"{name}-producer", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+def stream_upsert(conn, cursor, table_name, columns, conflict_columns, chunks, to_rows,
+                  max_pending=2, strategy='values', **write_options):
+    """
+    Upsert a stream of frame chunks, each committed in its own transaction(s). Rows for the
+    next chunks are built on a background thread while the current one is written. The
+    existing rows of a season are deleted in the same transaction as its first chunk, so a
+    failed backfill can simply be re-run. Returns the combined write stats.
+    """
+    def produce():
+        for chunk in chunks:
+            yield sorted(int(season) for season in chunk['Season'].unique()), to_rows(chunk)
+
+    stats = {'strategy': strategy, 'rows': 0, 'chunks': 0, 'transactions': 0,
+             'transaction_s': 0.0, 'lock_hold_s': 0.0, 'seasons': []}
+    for seasons, rows in bounded_stream(produce, max_pending, name=table_name):
+        new_seasons = [season for season in seasons if season not in stats['seasons']]
+        if new_seasons:
+            cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, new_seasons))})")
+            print(f"Deleted {cursor.rowcount} existing records for seasons: {new_seasons}")
+            stats['seasons'] += new_seasons
+        chunk_stats = upsert_rows(conn, cursor, table_name, columns, rows, conflict_columns,
+                                  strategy=strategy, **write_options)
+        stats['rows'] += chunk_stats['rows']
+        stats['chunks'] += 1
+        stats['transactions'] += chunk_stats['transactions']
+        stats['transaction_s'] += chunk_stats['transaction_s']
+        stats['lock_hold_s'] = max(stats['lock_hold_s'], chunk_stats['lock_hold_s'])
+        print(f"Chunk {stats['chunks']}: upserted {chunk_stats['rows']} rows ({stats['rows']} so far)")
+    # A season whose chunks produced no rows still has its delete to commit
+    conn.commit()
+    return stats
@@ -0,0 +1,832 @@
+import numpy as np
+import pandas as pd
+
+from .db import dataframe_to_tuples, get_connection
+from .instrumentation import measured
+from .writes import upsert_rows
+
+def get_team_logos_from_schedule(competition):
+    """
+    Get team logos from the schedule_results table
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(f"""
+            SELECT DISTINCT season, team as teamname, teamcode, teamlogo
+            FROM schedule_results_{competition}
+            ORDER BY season DESC
+        """)
+        results = cursor.fetchall()
+
+        team_logos = {}
+        for season, teamname, teamcode, teamlogo in results:
+            key = (season, teamcode)
+            team_logos[key] = {
+                'teamname': teamname,
+                'teamlogo': teamlogo
+            }
+
+        return team_logos
+    finally:
+        cursor.close()
+        conn.close()
+
+# Opponent columns added to every team game, from the opponent's Total row
+OPPONENT_COLUMNS = {
+    'opp_3pm': 'FieldGoalsMade3',
+    'opp_3pa': 'FieldGoalsAttempted3',
+    'opp_oreb': 'OffensiveRebounds',
+    'opp_dreb': 'DefensiveRebounds',
+    'opp_treb': 'TotalRebounds',
+    'opp_to': 'Turnovers',
+    'opp_ftm': 'FreeThrowsMade',
+    'opp_fta': 'FreeThrowsAttempted',
+    'opp_points': 'Points',
+    'opp_ast': 'Assistances',
+    'opp_stl': 'Steals',
+    'opp_blk': 'BlocksFavour',
+    'opp_pf': 'FoulsCommited',
+}
+
+def match_opponents(boxscore_data):
+    """
+    Pair every team Total row with the Total row of its opponent in the same game
+    """
+    print(f"Raw API data has {len(boxscore_data)} rows")
+
+    team_games = boxscore_data[boxscore_data['Player_ID'] == 'Total']
+    print(f"Found {len(team_games)} team game records")
+
+    if len(team_games) == 0:
+        print("No team game data found!")
+        return pd.DataFrame()
+
+    opponents = pd.DataFrame({
+        'Season': team_games['Season'],
+        'Gamecode': team_games['Gamecode'],
+        'opp_fgm': team_games['FieldGoalsMade2'] + team_games['FieldGoalsMade3'],
+        'opp_fga': team_games['FieldGoalsAttempted2'] + team_games['FieldGoalsAttempted3'],
+        **{opp: team_games[col] for opp, col in OPPONENT_COLUMNS.items()},
+        'opponent_team': team_games['Team'],
+    })
+
+    # One hash join on (season, gamecode) instead of a scan of the whole frame per team game.
+    # The first other team of the game is the opponent, as before.
+    df_with_opponents = team_games.reset_index(names='_row').merge(opponents, on=['Season', 'Gamecode'])
+    df_with_opponents = df_with_opponents[
+        df_with_opponents['Team'].astype(str) != df_with_opponents['opponent_team'].astype(str)
+    ].drop_duplicates('_row')
+    df_with_opponents = df_with_opponents.set_index('_row').rename_axis(None)
+    print(f"Successfully matched {len(df_with_opponents)} games with opponent data")
+
+    return df_with_opponents
+
+# Matched team game columns summed per group; every advanced stat is a ratio of these sums
+ADVANCED_SUM_COLUMNS = [
+    'Points', 'FieldGoalsMade2', 'FieldGoalsAttempted2', 'FieldGoalsMade3', 'FieldGoalsAttempted3',
+    'FreeThrowsMade', 'FreeThrowsAttempted', 'OffensiveRebounds', 'DefensiveRebounds',
+    'Assistances', 'Steals', 'Turnovers', 'BlocksFavour', 'opp_fgm', 'opp_fga', 'opp_3pm', 'opp_3pa',
+    'opp_oreb', 'opp_dreb', 'opp_to', 'opp_ftm', 'opp_fta', 'opp_points', 'opp_ast', 'opp_stl', 'opp_blk'
+]
+
+def calculate_team_advanced_stats(team_games):
+    """
+    Calculate pace, ratings, four factors and shooting splits from a group of matched team games
+    """
+    if len(team_games) == 0:
+        return None
+    sums = {col: pd.to_numeric(team_games[col], errors='coerce').fillna(0).sum() for col in ADVANCED_SUM_COLUMNS}
+    return advanced_stats_from_sums(len(team_games), sums)
+
+def advanced_stats_from_sums(games_played, sums):
+    """
+    The stats of calculate_team_advanced_stats from games played and the ADVANCED_SUM_COLUMNS totals
+    """
+    points = sums['Points']
+    fgm2 = sums['FieldGoalsMade2']
+    fga2 = sums['FieldGoalsAttempted2']
+    fgm3 = sums['FieldGoalsMade3']
+    fga3 = sums['FieldGoalsAttempted3']
+    fgm = fgm2 + fgm3
+    fga = fga2 + fga3
+    ftm = sums['FreeThrowsMade']
+    fta = sums['FreeThrowsAttempted']
+    oreb = sums['OffensiveRebounds']
+    dreb = sums['DefensiveRebounds']
+    ast = sums['Assistances']
+    stl = sums['Steals']
+    to = sums['Turnovers']
+    blk = sums['BlocksFavour']
+
+    opp_points = sums['opp_points']
+    opp_fgm = sums['opp_fgm']
+    opp_fga = sums['opp_fga']
+    opp_3pm = sums['opp_3pm']
+    opp_3pa = sums['opp_3pa']
+    opp_ftm = sums['opp_ftm']
+    opp_fta = sums['opp_fta']
+    opp_oreb = sums['opp_oreb']
+    opp_dreb = sums['opp_dreb']
+    opp_to = sums['opp_to']
+    opp_ast = sums['opp_ast']
+    opp_stl = sums['opp_stl']
+    opp_blk = sums['opp_blk']
+
+    team_poss = fga + 0.4 * fta - 1.07 * (oreb / max(1, oreb + opp_dreb)) * (fga - fgm) + to
+    opp_poss = opp_fga + 0.4 * opp_fta - 1.07 * (opp_oreb / max(1, opp_oreb + dreb)) * (opp_fga - opp_fgm) + opp_to
+
+    avg_total_poss = (team_poss + opp_poss) / games_played if games_played > 0 else 0
+    pace = (200 / 202.2) * avg_total_poss / 2 if avg_total_poss > 0 else 0
+    efficiency_o = (points / team_poss) * 100 if team_poss > 0 else 0
+    efficiency_d = (opp_points / opp_poss) * 100 if opp_poss > 0 else 0
+    net_rating = efficiency_o - efficiency_d
+
+    efgperc_o = ((fgm + 0.5 * fgm3) / fga) * 100 if fga > 0 else 0
+    toratio_o = (to / (fga + to + 0.44 * fta)) * 100 if (fga + to + 0.44 * fta) > 0 else 0
+    orebperc_o = (oreb / (oreb + opp_dreb)) * 100 if (oreb + opp_dreb) > 0 else 0
+    ftrate_o = (fta / fga) * 100 if fga > 0 else 0
+
+    efgperc_d = ((opp_fgm + 0.5 * opp_3pm) / opp_fga) * 100 if opp_fga > 0 else 0
+    toratio_d = (opp_to / (opp_fga + opp_to + 0.44 * opp_fta)) * 100 if (opp_fga + opp_to + 0.44 * opp_fta) > 0 else 0
+    orebperc_d = (opp_oreb / (opp_oreb + dreb)) * 100 if (opp_oreb + dreb) > 0 else 0
+    ftrate_d = (opp_fta / opp_fga) * 100 if opp_fga > 0 else 0
+
+    threeperc_o = (fgm3 / fga3) * 100 if fga3 > 0 else 0
+    threeperc_d = (opp_3pm / opp_3pa) * 100 if opp_3pa > 0 else 0
+    twoperc_o = (fgm2 / fga2) * 100 if fga2 > 0 else 0
+    twoperc_d = ((opp_fgm - opp_3pm) / (opp_fga - opp_3pa)) * 100 if (opp_fga - opp_3pa) > 0 else 0
+    ftperc_o = (ftm / fta) * 100 if fta > 0 else 0
+    ftperc_d = (opp_ftm / opp_fta) * 100 if opp_fta > 0 else 0
+
+    threeattmprate_o = (fga3 / fga) * 100 if fga > 0 else 0
+    threeattmprate_d = (opp_3pa / opp_fga) * 100 if opp_fga > 0 else 0
+    assistperc_o = (ast / fgm) * 100 if fgm > 0 else 0
+    assistperc_d = (opp_ast / opp_fgm) * 100 if opp_fgm > 0 else 0
+    stealperc_o = (stl / opp_poss) * 100 if opp_poss > 0 else 0
+    stealperc_d = (opp_stl / team_poss) * 100 if team_poss > 0 else 0
+    blockperc_o = (opp_blk / fga2) * 100 if fga2 > 0 else 0
+    blockperc_d = (blk / (opp_fga - opp_3pa)) * 100 if (opp_fga - opp_3pa) > 0 else 0
+
+    points2perc_o = ((fgm2 * 2) / points) * 100 if points > 0 else 0
+    points2perc_d = (((opp_fgm - opp_3pm) * 2) / opp_points) * 100 if opp_points > 0 else 0
+    points3perc_o = ((fgm3 * 3) / points) * 100 if points > 0 else 0
+    points3perc_d = ((opp_3pm * 3) / opp_points) * 100 if opp_points > 0 else 0
+    pointsftperc_o = (ftm / points) * 100 if points > 0 else 0
+    pointsftperc_d = (opp_ftm / opp_points) * 100 if opp_points > 0 else 0
+
+    return {
+        'games_played': games_played,
+        'pace': pace,
+        'efficiency_o': efficiency_o,
+        'efficiency_d': efficiency_d,
+        'net_rating': net_rating,
+        'efgperc_o': efgperc_o,
+        'toratio_o': toratio_o,
+        'orebperc_o': orebperc_o,
+        'ftrate_o': ftrate_o,
+        'efgperc_d': efgperc_d,
+        'toratio_d': toratio_d,
+        'orebperc_d': orebperc_d,
+        'ftrate_d': ftrate_d,
+        'threeperc_o': threeperc_o,
+        'twoperc_o': twoperc_o,
+        'ftperc_o': ftperc_o,
+        'threeperc_d': threeperc_d,
+        'twoperc_d': twoperc_d,
+        'ftperc_d': ftperc_d,
+        'threeattmprate_o': threeattmprate_o,
+        'assistperc_o': assistperc_o,
+        'stealperc_o': stealperc_o,
+        'blockperc_o': blockperc_o,
+        'threeattmprate_d': threeattmprate_d,
+        'assistperc_d': assistperc_d,
+        'stealperc_d': stealperc_d,
+        'blockperc_d': blockperc_d,
+        'points2perc_o': points2perc_o,
+        'points3perc_o': points3perc_o,
+        'pointsftperc_o': pointsftperc_o,
+        'points2perc_d': points2perc_d,
+        'points3perc_d': points3perc_d,
+        'pointsftperc_d': pointsftperc_d,
+    }
+
+def map_phases(phases, competition):
+    """
+    Collapse API phase codes into 'RS' and 'Playoffs' for the competition, leaving others as they are
+    """
+    playoff_phases = {
+        'euroleague': ['PI', 'PO', 'FF'],
+        'eurocup': ['2F', '4F', '8F', 'Final'],
+    }
+    if competition not in playoff_phases:
+        return phases
+    phases = phases.astype(object)
+    mapping = {'RS': 'RS', 'TS': 'RS', **{phase: 'Playoffs' for phase in playoff_phases[competition]}}
+    return phases.map(lambda phase: mapping.get(phase, phase))
+
+def calculate_advanced_team_stats(boxscore_data, competition, team_logos, df_with_opponents=None):
+    """
+    Calculate advanced stats and rankings per season, phase and team, plus league averages.
+    Pass df_with_opponents when the matched team games are already at hand.
+    """
+    if df_with_opponents is None:
+        df_with_opponents = measured(match_opponents, boxscore_data)
+    if len(df_with_opponents) == 0:
+        return None
+    df_with_opponents = df_with_opponents.copy()
+
+    df_with_opponents['Phase'] = map_phases(df_with_opponents['Phase'], competition)
+
+    # One pass sums every team's games per phase. The 'All' rows and the league rows add
+    # those sums up, the ratios are taken afterwards.
+    sums = pd.DataFrame({
+        col: pd.to_numeric(df_with_opponents[col], errors='coerce').fillna(0) for col in ADVANCED_SUM_COLUMNS
+    })
+    sums[['Season', 'Phase', 'Team']] = df_with_opponents[['Season', 'Phase', 'Team']]
+    sums['games_played'] = 1
+    team_sums = sums.groupby(['Season', 'Phase', 'Team'], observed=True).sum().reset_index()
+    team_sums = pd.concat([
+        team_sums,
+        team_sums.drop(columns='Phase').groupby(['Season', 'Team'], observed=True).sum().reset_index().assign(Phase='All'),
+    ], ignore_index=True)
+    league_sums = team_sums.drop(columns='Team').groupby(['Season', 'Phase'], observed=True).sum().reset_index()
+
+    league_stats_list = []
+    for row in league_sums.to_dict('records'):
+        print(f"Processing League Averages - {row['Season']} - {row['Phase']} ({row['games_played']} games)")
+        league_stats_list.append({
+            'season': row['Season'],
+            'phase': row['Phase'],
+            'teamcode': 'League',
+            'teamname': 'League Averages',
+            'teamlogo': '',
+            **advanced_stats_from_sums(row['games_played'], row)
+        })
+
+    team_stats_list = []
+    for row in team_sums.sort_values(['Season', 'Phase', 'Team']).to_dict('records'):
+        season, phase, team = row['Season'], row['Phase'], row['Team']
+        print(f"Processing {team} - {season} - {phase} ({row['games_played']} games)")
+        team_info = team_logos.get((season, team), {})
+        team_stats_list.append({
+            'season': season,
+            'phase': phase,
+            'teamcode': team,
+            'teamname': team_info.get('teamname', team),
+            'teamlogo': team_info.get('teamlogo', ''),
+            **advanced_stats_from_sums(row['games_played'], row)
+        })
+
+    all_stats_list = team_stats_list + league_stats_list
+    print(f"Calculated stats for {len(team_stats_list)} team/season/phase combinations")
+    print(f"Calculated league averages for {len(league_stats_list)} season/phase combinations")
+
+    print(f"Calculating rankings for {competition}...")
+    stats_to_rank = [
+        ('pace', False), ('efficiency_o', False), ('efficiency_d', True), ('net_rating', False),
+        ('efgperc_o', False), ('efgperc_d', True), ('toratio_o', True), ('toratio_d', False),
+        ('orebperc_o', False), ('orebperc_d', True), ('ftrate_o', False), ('ftrate_d', True),
+        ('threeperc_o', False), ('threeperc_d', True), ('twoperc_o', False), ('twoperc_d', True),
+        ('ftperc_o', False), ('ftperc_d', True), ('threeattmprate_o', False), ('threeattmprate_d', True),
+        ('assistperc_o', False), ('assistperc_d', True), ('stealperc_o', False), ('stealperc_d', False),
+        ('blockperc_o', False), ('blockperc_d', False), ('points2perc_o', False), ('points2perc_d', True),
+        ('points3perc_o', False), ('points3perc_d', True), ('pointsftperc_o', False), ('pointsftperc_d', True)
+    ]
+
+    stats_df = pd.DataFrame(all_stats_list)
+
+    for (season, phase), group in stats_df.groupby(['season', 'phase']):
+        team_only_group = group[group['teamcode'] != 'League']
+        for stat, ascending in stats_to_rank:
+            if stat in team_only_group.columns:
+                ranks = team_only_group[stat].rank(method='min', ascending=ascending)
+                team_mask = (stats_df['season'] == season) & (stats_df['phase'] == phase) & (stats_df['teamcode'] != 'League')
+                stats_df.loc[team_mask, f'rank_{stat}'] = ranks
+                league_mask = (stats_df['season'] == season) & (stats_df['phase'] == phase) & (stats_df['teamcode'] == 'League')
+                stats_df.loc[league_mask, f'rank_{stat}'] = None
+
+    return stats_df
+
+TEAM_ADVANCED_STATS_COLUMNS = [
+    'season', 'phase', 'teamcode', 'teamname', 'teamlogo', 'games_played', 'pace',
+    'efficiency_o', 'efficiency_d', 'net_rating', 'efgperc_o', 'toratio_o', 'orebperc_o',
+    'ftrate_o', 'efgperc_d', 'toratio_d', 'orebperc_d', 'ftrate_d', 'threeperc_o', 'twoperc_o',
+    'ftperc_o', 'threeperc_d', 'twoperc_d', 'ftperc_d', 'threeattmprate_o', 'assistperc_o',
+    'stealperc_o', 'blockperc_o', 'threeattmprate_d', 'assistperc_d', 'stealperc_d',
+    'blockperc_d', 'points2perc_o', 'points3perc_o', 'pointsftperc_o', 'points2perc_d',
+    'points3perc_d', 'pointsftperc_d', 'rank_pace', 'rank_efficiency_o', 'rank_efficiency_d',
+    'rank_net_rating', 'rank_efgperc_o', 'rank_efgperc_d', 'rank_toratio_o', 'rank_toratio_d',
+    'rank_orebperc_o', 'rank_orebperc_d', 'rank_ftrate_o', 'rank_ftrate_d', 'rank_threeperc_o',
+    'rank_threeperc_d', 'rank_twoperc_o', 'rank_twoperc_d', 'rank_ftperc_o', 'rank_ftperc_d',
+    'rank_threeattmprate_o', 'rank_threeattmprate_d', 'rank_assistperc_o', 'rank_stealperc_o',
+    'rank_blockperc_o', 'rank_assistperc_d', 'rank_stealperc_d', 'rank_blockperc_d',
+    'rank_points2perc_o', 'rank_points2perc_d', 'rank_points3perc_o', 'rank_points3perc_d',
+    'rank_pointsftperc_o', 'rank_pointsftperc_d',
+]
+
+def insert_team_advanced_stats_to_db(stats_df, competition, write_strategy='batched', **write_options):
+    """
+    Insert calculated advanced team stats into the database
+    """
+    conn = get_connection(
+        max_retries=3,
+        connect_timeout=30,
+        keepalives_idle=30,
+        keepalives_interval=10,
+        keepalives_count=5
+    )
+    conn.autocommit = False
+    cursor = conn.cursor()
+
+    try:
+        team_stats_list = stats_df.to_dict('records')
+
+        table_name = f"team_advanced_stats_{competition}"
+        print(f"Creating/updating {table_name} table...")
+
+        try:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name} (
+                    id SERIAL PRIMARY KEY,
+                    season INTEGER NOT NULL,
+                    phase VARCHAR(10) NOT NULL,
+                    teamcode VARCHAR(10) NOT NULL,
+                    teamname VARCHAR(100) NOT NULL,
+                    teamlogo TEXT,
+                    games_played INTEGER DEFAULT 0,
+                    pace DECIMAL(6,2) DEFAULT 0,
+                    efficiency_o DECIMAL(6,2) DEFAULT 0,
+                    efficiency_d DECIMAL(6,2) DEFAULT 0,
+                    net_rating DECIMAL(6,2) DEFAULT 0,
+                    efgperc_o DECIMAL(5,2) DEFAULT 0,
+                    toratio_o DECIMAL(5,2) DEFAULT 0,
+                    orebperc_o DECIMAL(5,2) DEFAULT 0,
+                    ftrate_o DECIMAL(5,2) DEFAULT 0,
+                    efgperc_d DECIMAL(5,2) DEFAULT 0,
+                    toratio_d DECIMAL(5,2) DEFAULT 0,
+                    orebperc_d DECIMAL(5,2) DEFAULT 0,
+                    ftrate_d DECIMAL(5,2) DEFAULT 0,
+                    threeperc_o DECIMAL(5,2) DEFAULT 0,
+                    twoperc_o DECIMAL(5,2) DEFAULT 0,
+                    ftperc_o DECIMAL(5,2) DEFAULT 0,
+                    threeperc_d DECIMAL(5,2) DEFAULT 0,
+                    twoperc_d DECIMAL(5,2) DEFAULT 0,
+                    ftperc_d DECIMAL(5,2) DEFAULT 0,
+                    threeattmprate_o DECIMAL(5,2) DEFAULT 0,
+                    assistperc_o DECIMAL(5,2) DEFAULT 0,
+                    stealperc_o DECIMAL(5,2) DEFAULT 0,
+                    blockperc_o DECIMAL(5,2) DEFAULT 0,
+                    threeattmprate_d DECIMAL(5,2) DEFAULT 0,
+                    assistperc_d DECIMAL(5,2) DEFAULT 0,
+                    stealperc_d DECIMAL(5,2) DEFAULT 0,
+                    blockperc_d DECIMAL(5,2) DEFAULT 0,
+                    points2perc_o DECIMAL(5,2) DEFAULT 0,
+                    points3perc_o DECIMAL(5,2) DEFAULT 0,
+                    pointsftperc_o DECIMAL(5,2) DEFAULT 0,
+                    points2perc_d DECIMAL(5,2) DEFAULT 0,
+                    points3perc_d DECIMAL(5,2) DEFAULT 0,
+                    pointsftperc_d DECIMAL(5,2) DEFAULT 0,
+                    rank_pace INTEGER DEFAULT 0,
+                    rank_efficiency_o INTEGER DEFAULT 0,
+                    rank_efficiency_d INTEGER DEFAULT 0,
+                    rank_net_rating INTEGER DEFAULT 0,
+                    rank_efgperc_o INTEGER DEFAULT 0,
+                    rank_efgperc_d INTEGER DEFAULT 0,
+                    rank_toratio_o INTEGER DEFAULT 0,
+                    rank_toratio_d INTEGER DEFAULT 0,
+                    rank_orebperc_o INTEGER DEFAULT 0,
+                    rank_orebperc_d INTEGER DEFAULT 0,
+                    rank_ftrate_o INTEGER DEFAULT 0,
+                    rank_ftrate_d INTEGER DEFAULT 0,
+                    rank_threeperc_o INTEGER DEFAULT 0,
+                    rank_threeperc_d INTEGER DEFAULT 0,
+                    rank_twoperc_o INTEGER DEFAULT 0,
+                    rank_twoperc_d INTEGER DEFAULT 0,
+                    rank_ftperc_o INTEGER DEFAULT 0,
+                    rank_ftperc_d INTEGER DEFAULT 0,
+                    rank_threeattmprate_o INTEGER DEFAULT 0,
+                    rank_threeattmprate_d INTEGER DEFAULT 0,
+                    rank_assistperc_o INTEGER DEFAULT 0,
+                    rank_stealperc_o INTEGER DEFAULT 0,
+                    rank_blockperc_o INTEGER DEFAULT 0,
+                    rank_assistperc_d INTEGER DEFAULT 0,
+                    rank_stealperc_d INTEGER DEFAULT 0,
+                    rank_blockperc_d INTEGER DEFAULT 0,
+                    rank_points2perc_o INTEGER DEFAULT 0,
+                    rank_points2perc_d INTEGER DEFAULT 0,
+                    rank_points3perc_o INTEGER DEFAULT 0,
+                    rank_points3perc_d INTEGER DEFAULT 0,
+                    rank_pointsftperc_o INTEGER DEFAULT 0,
+                    rank_pointsftperc_d INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(season, phase, teamcode)
+                );
+            """)
+            conn.commit()
+            print(f"Ensured {table_name} table exists")
+
+            seasons_to_process = list(stats_df['season'].unique())
+            if seasons_to_process:
+                seasons_str = ','.join(map(str, seasons_to_process))
+                cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({seasons_str})")
+                deleted_count = cursor.rowcount
+                conn.commit()
+                print(f"Deleted {deleted_count} existing records for seasons: {seasons_to_process}")
+
+            index_queries = [
+                f"CREATE INDEX IF NOT EXISTS idx_{table_name}_season_phase ON {table_name}(season, phase);",
+                f"CREATE INDEX IF NOT EXISTS idx_{table_name}_teamcode ON {table_name}(teamcode);",
+                f"CREATE INDEX IF NOT EXISTS idx_{table_name}_lookup ON {table_name}(season, phase, teamcode);"
+            ]
+            for idx_query in index_queries:
+                try:
+                    cursor.execute(idx_query)
+                    conn.commit()
+                except Exception as e:
+                    print(f"Warning: Could not create index: {e}")
+                    conn.rollback()
+
+        except Exception as e:
+            print(f"Error setting up table: {e}")
+            conn.rollback()
+            raise
+
+        print(f"Inserting calculated data into {table_name}...")
+
+        def safe_value(val, default=0):
+            if pd.isna(val) or val is None:
+                return default
+            return float(val)
+
+        data_tuples = []
+        for stats in team_stats_list:
+            data_tuples.append((
+                int(stats['season']),
+                str(stats['phase']),
+                str(stats['teamcode']),
+                str(stats['teamname']),
+                str(stats.get('teamlogo', '')),
+                int(stats['games_played']),
+                safe_value(stats['pace']),
+                safe_value(stats['efficiency_o']),
+                safe_value(stats['efficiency_d']),
+                safe_value(stats['net_rating']),
+                safe_value(stats['efgperc_o']),
+                safe_value(stats['toratio_o']),
+                safe_value(stats['orebperc_o']),
+                safe_value(stats['ftrate_o']),
+                safe_value(stats['efgperc_d']),
+                safe_value(stats['toratio_d']),
+                safe_value(stats['orebperc_d']),
+                safe_value(stats['ftrate_d']),
+                safe_value(stats['threeperc_o']),
+                safe_value(stats['twoperc_o']),
+                safe_value(stats['ftperc_o']),
+                safe_value(stats['threeperc_d']),
+                safe_value(stats['twoperc_d']),
+                safe_value(stats['ftperc_d']),
+                safe_value(stats['threeattmprate_o']),
+                safe_value(stats['assistperc_o']),
+                safe_value(stats['stealperc_o']),
+                safe_value(stats['blockperc_o']),
+                safe_value(stats['threeattmprate_d']),
+                safe_value(stats['assistperc_d']),
+                safe_value(stats['stealperc_d']),
+                safe_value(stats['blockperc_d']),
+                safe_value(stats['points2perc_o']),
+                safe_value(stats['points3perc_o']),
+                safe_value(stats['pointsftperc_o']),
+                safe_value(stats['points2perc_d']),
+                safe_value(stats['points3perc_d']),
+                safe_value(stats['pointsftperc_d']),
+                int(safe_value(stats.get('rank_pace', 0))),
+                int(safe_value(stats.get('rank_efficiency_o', 0))),
+                int(safe_value(stats.get('rank_efficiency_d', 0))),
+                int(safe_value(stats.get('rank_net_rating', 0))),
+                int(safe_value(stats.get('rank_efgperc_o', 0))),
+                int(safe_value(stats.get('rank_efgperc_d', 0))),
+                int(safe_value(stats.get('rank_toratio_o', 0))),
+                int(safe_value(stats.get('rank_toratio_d', 0))),
+                int(safe_value(stats.get('rank_orebperc_o', 0))),
+                int(safe_value(stats.get('rank_orebperc_d', 0))),
+                int(safe_value(stats.get('rank_ftrate_o', 0))),
+                int(safe_value(stats.get('rank_ftrate_d', 0))),
+                int(safe_value(stats.get('rank_threeperc_o', 0))),
+                int(safe_value(stats.get('rank_threeperc_d', 0))),
+                int(safe_value(stats.get('rank_twoperc_o', 0))),
+                int(safe_value(stats.get('rank_twoperc_d', 0))),
+                int(safe_value(stats.get('rank_ftperc_o', 0))),
+                int(safe_value(stats.get('rank_ftperc_d', 0))),
+                int(safe_value(stats.get('rank_threeattmprate_o', 0))),
+                int(safe_value(stats.get('rank_threeattmprate_d', 0))),
+                int(safe_value(stats.get('rank_assistperc_o', 0))),
+                int(safe_value(stats.get('rank_stealperc_o', 0))),
+                int(safe_value(stats.get('rank_blockperc_o', 0))),
+                int(safe_value(stats.get('rank_assistperc_d', 0))),
+                int(safe_value(stats.get('rank_stealperc_d', 0))),
+                int(safe_value(stats.get('rank_blockperc_d', 0))),
+                int(safe_value(stats.get('rank_points2perc_o', 0))),
+                int(safe_value(stats.get('rank_points2perc_d', 0))),
+                int(safe_value(stats.get('rank_points3perc_o', 0))),
+                int(safe_value(stats.get('rank_points3perc_d', 0))),
+                int(safe_value(stats.get('rank_pointsftperc_o', 0))),
+                int(safe_value(stats.get('rank_pointsftperc_d', 0))),
+            ))
+
+        write_options.setdefault('batch_size', 100)
+        write_stats = upsert_rows(
+            conn, cursor, table_name, TEAM_ADVANCED_STATS_COLUMNS, data_tuples,
+            ['season', 'phase', 'teamcode'],
+            strategy=write_strategy, extra_updates=['updated_at = CURRENT_TIMESTAMP'], **write_options
+        )
+        print(f"Successfully inserted/updated {write_stats['rows']} total rows in {table_name} "
+              f"in {write_stats['transactions']} transactions ({write_stats['transaction_s']:.2f}s)")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error inserting advanced team stats: {e}")
+        try:
+            conn.rollback()
+        except:
+            pass
+        raise
+    finally:
+        try:
+            cursor.close()
+            conn.close()
+        except:
+            pass
+
+TEAM_GAME_STATS_COLUMNS = [
+    'season', 'phase', 'round', 'gamecode', 'teamcode', 'teamname', 'opponent', 'home',
+    'points', 'opp_points', 'possessions', 'opp_possessions', 'pace', 'efficiency_o',
+    'efficiency_d', 'net_rating', 'efgperc_o', 'toratio_o', 'orebperc_o', 'ftrate_o',
+    'efgperc_d', 'toratio_d', 'orebperc_d', 'ftrate_d',
+]
+
+# Summed box score columns the game-level ratings are derived from
+COUNTING_COLUMNS = {
+    'points': ['Points'],
+    'fgm': ['FieldGoalsMade2', 'FieldGoalsMade3'],
+    'fga': ['FieldGoalsAttempted2', 'FieldGoalsAttempted3'],
+    'fgm3': ['FieldGoalsMade3'],
+    'fta': ['FreeThrowsAttempted'],
+    'to': ['Turnovers'],
+    'oreb': ['OffensiveRebounds'],
+    'dreb': ['DefensiveRebounds'],
+    'opp_points': ['opp_points'],
+    'opp_fgm': ['opp_fgm'],
+    'opp_fga': ['opp_fga'],
+    'opp_3pm': ['opp_3pm'],
+    'opp_fta': ['opp_fta'],
+    'opp_to': ['opp_to'],
+    'opp_oreb': ['opp_oreb'],
+    'opp_dreb': ['opp_dreb'],
+}
+
+# Ratings computed from counting totals, with whether a lower value ranks first
+RATING_STATS = [
+    ('pace', False), ('efficiency_o', False), ('efficiency_d', True), ('net_rating', False),
+    ('efgperc_o', False), ('efgperc_d', True), ('toratio_o', True), ('toratio_d', False),
+    ('orebperc_o', False), ('orebperc_d', True), ('ftrate_o', False), ('ftrate_d', True),
+]
+
+def team_counting_stats(df_with_opponents):
+    """
+    The counting columns of matched team games as floats, missing values as 0
+    """
+    return pd.DataFrame({
+        name: sum(pd.to_numeric(df_with_opponents[col], errors='coerce').fillna(0).to_numpy(dtype=float) for col in cols)
+        for name, cols in COUNTING_COLUMNS.items()
+    }, index=df_with_opponents.index)
+
+def ratings_from_totals(totals, games):
+    """
+    Possessions, pace, ratings and four factors from summed counting stats over `games`
+    games, vectorized over rows with the formulas of calculate_team_advanced_stats
+    """
+    def ratio(numerator, denominator, scale=100):
+        # 0 where the denominator is 0, like the season aggregates
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(denominator > 0, numerator / denominator * scale, 0.0)
+
+    t = {name: totals[name].to_numpy(dtype=float) for name in COUNTING_COLUMNS}
+    team_poss = t['fga'] + 0.4 * t['fta'] - 1.07 * (t['oreb'] / np.maximum(1, t['oreb'] + t['opp_dreb'])) * (t['fga'] - t['fgm']) + t['to']
+    opp_poss = t['opp_fga'] + 0.4 * t['opp_fta'] - 1.07 * (t['opp_oreb'] / np.maximum(1, t['opp_oreb'] + t['dreb'])) * (t['opp_fga'] - t['opp_fgm']) + t['opp_to']
+    avg_total_poss = ratio(team_poss + opp_poss, np.asarray(games, dtype=float), scale=1)
+    efficiency_o = ratio(t['points'], team_poss)
+    efficiency_d = ratio(t['opp_points'], opp_poss)
+
+    return pd.DataFrame({
+        'possessions': team_poss,
+        'opp_possessions': opp_poss,
+        'pace': np.where(avg_total_poss > 0, (200 / 202.2) * avg_total_poss / 2, 0.0),
+        'efficiency_o': efficiency_o,
+        'efficiency_d': efficiency_d,
+        'net_rating': efficiency_o - efficiency_d,
+        'efgperc_o': ratio(t['fgm'] + 0.5 * t['fgm3'], t['fga']),
+        'toratio_o': ratio(t['to'], t['fga'] + t['to'] + 0.44 * t['fta']),
+        'orebperc_o': ratio(t['oreb'], t['oreb'] + t['opp_dreb']),
+        'ftrate_o': ratio(t['fta'], t['fga']),
+        'efgperc_d': ratio(t['opp_fgm'] + 0.5 * t['opp_3pm'], t['opp_fga']),
+        'toratio_d': ratio(t['opp_to'], t['opp_fga'] + t['opp_to'] + 0.44 * t['opp_fta']),
+        'orebperc_d': ratio(t['opp_oreb'], t['opp_oreb'] + t['dreb']),
+        'ftrate_d': ratio(t['opp_fta'], t['opp_fga']),
+    }, index=totals.index)
+
+def calculate_team_game_stats(df_with_opponents, competition, team_logos=None):
+    """
+    Possessions, pace, ratings and four factors of every team in every game, computed for
+    all matched team games at once with the same formulas as the season aggregates
+    """
+    if len(df_with_opponents) == 0:
+        return pd.DataFrame(columns=TEAM_GAME_STATS_COLUMNS)
+
+    counting = team_counting_stats(df_with_opponents)
+    teams = df_with_opponents['Team'].astype(str)
+    seasons = df_with_opponents['Season'].astype(int)
+    team_logos = team_logos or {}
+    game_stats = pd.DataFrame({
+        'season': seasons,
+        'phase': map_phases(df_with_opponents['Phase'], competition),
+        'round': df_with_opponents['Round'].astype(int),
+        'gamecode': df_with_opponents['Gamecode'].astype(str),
+        'teamcode': teams,
+        'teamname': [team_logos.get(key, {}).get('teamname', key[1]) for key in zip(seasons, teams)],
+        'opponent': df_with_opponents['opponent_team'].astype(str),
+        'home': pd.to_numeric(df_with_opponents['Home'], errors='coerce').fillna(0).astype(int),
+        'points': counting['points'],
+        'opp_points': counting['opp_points'],
+    }, index=df_with_opponents.index).join(ratings_from_totals(counting, 1))
+    return game_stats[TEAM_GAME_STATS_COLUMNS].sort_values(['season', 'round', 'gamecode', 'teamcode'], ignore_index=True)
+
+def insert_team_game_stats_to_db(game_stats_df, competition, write_strategy='values', **write_options):
+    """
+    Insert one row per team per game, replacing the seasons present in the data
+    """
+    if game_stats_df.empty:
+        print(f"No team game stats to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"team_game_stats_{competition}"
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            phase VARCHAR(10),
+            round INTEGER,
+            gamecode TEXT NOT NULL,
+            teamcode VARCHAR(10) NOT NULL,
+            teamname VARCHAR(100),
+            opponent VARCHAR(10),
+            home INTEGER,
+            points INTEGER,
+            opp_points INTEGER,
+            possessions DECIMAL(6,2),
+            opp_possessions DECIMAL(6,2),
+            pace DECIMAL(6,2),
+            efficiency_o DECIMAL(6,2),
+            efficiency_d DECIMAL(6,2),
+            net_rating DECIMAL(6,2),
+            efgperc_o DECIMAL(5,2),
+            toratio_o DECIMAL(5,2),
+            orebperc_o DECIMAL(5,2),
+            ftrate_o DECIMAL(6,2),
+            efgperc_d DECIMAL(5,2),
+            toratio_d DECIMAL(5,2),
+            orebperc_d DECIMAL(5,2),
+            ftrate_d DECIMAL(6,2),
+            UNIQUE(season, gamecode, teamcode)
+        );
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_team ON {table_name}(season, teamcode, round)")
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(game_stats_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        rows = dataframe_to_tuples(game_stats_df.round(2), TEAM_GAME_STATS_COLUMNS)
+        write_stats = upsert_rows(
+            conn, cursor, table_name, TEAM_GAME_STATS_COLUMNS, rows, ['season', 'gamecode', 'teamcode'],
+            strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} team games into {table_name} ({write_stats['transaction_s']:.2f}s)")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error inserting team game stats: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+TEAM_TIMELINE_COLUMNS = (
+    ['season', 'round', 'teamcode', 'games_played', 'played_round']
+    + [stat for stat, _ in RATING_STATS]
+    + [f'rank_{stat}' for stat, _ in RATING_STATS]
+)
+
+def calculate_team_ratings_timeline(df_with_opponents):
+    """
+    Cumulative ratings and four factors of every team after every regular season round,
+    from running sums of the counting stats per team ordered by round, ranked among the
+    teams after each round. A team that sits out a round keeps its previous totals for
+    that round. Playoff games are left out, so eliminated teams are not ranked against
+    the ones still playing.
+    """
+    df_with_opponents = df_with_opponents[df_with_opponents['Phase'].isin(['RS', 'TS'])]
+    if len(df_with_opponents) == 0:
+        return pd.DataFrame(columns=TEAM_TIMELINE_COLUMNS)
+
+    counting = team_counting_stats(df_with_opponents).assign(games=1)
+    sums = list(counting.columns)
+    per_round = pd.concat([
+        pd.DataFrame({
+            'season': df_with_opponents['Season'].astype(int),
+            'round': df_with_opponents['Round'].astype(int),
+            'teamcode': df_with_opponents['Team'].astype(str),
+        }),
+        counting,
+    ], axis=1).groupby(['season', 'teamcode', 'round'], as_index=False)[sums].sum()
+
+    # Every team of a season at every round of that season
+    grid = per_round[['season', 'round']].drop_duplicates().merge(
+        per_round[['season', 'teamcode']].drop_duplicates(), on='season'
+    )
+    timeline = grid.merge(per_round, on=['season', 'teamcode', 'round'], how='left')
+    timeline['played_round'] = timeline['games'].notna()
+    timeline[sums] = timeline[sums].fillna(0)
+    timeline = timeline.sort_values(['season', 'teamcode', 'round'], ignore_index=True)
+    timeline[sums] = timeline.groupby(['season', 'teamcode'])[sums].cumsum()
+    timeline = timeline[timeline['games'] > 0].reset_index(drop=True)
+
+    timeline = timeline.join(ratings_from_totals(timeline, timeline['games']))
+    timeline['games_played'] = timeline['games'].astype(int)
+    by_round = timeline.groupby(['season', 'round'])
+    for stat, ascending in RATING_STATS:
+        timeline[f'rank_{stat}'] = by_round[stat].rank(method='min', ascending=ascending).astype(int)
+
+    return timeline[TEAM_TIMELINE_COLUMNS].sort_values(['season', 'round', 'rank_net_rating'], ignore_index=True)
+
+def insert_team_ratings_timeline_to_db(timeline_df, competition, write_strategy='values', **write_options):
+    """
+    Insert the round-by-round team ratings, replacing the seasons present in the data
+    """
+    if timeline_df.empty:
+        print(f"No team ratings timeline to insert for {competition}.")
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    table_name = f"team_ratings_timeline_{competition}"
+    rating_columns = ',\n            '.join(
+        [f"{stat} DECIMAL(6,2)" for stat, _ in RATING_STATS] + [f"rank_{stat} INTEGER" for stat, _ in RATING_STATS]
+    )
+
+    try:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id SERIAL PRIMARY KEY,
+            season INTEGER NOT NULL,
+            round INTEGER NOT NULL,
+            teamcode VARCHAR(10) NOT NULL,
+            games_played INTEGER,
+            played_round BOOLEAN,
+            {rating_columns},
+            UNIQUE(season, round, teamcode)
+        );
+        """)
+        conn.commit()
+        print(f"Ensured {table_name} table exists")
+
+        seasons_to_process = sorted(timeline_df['season'].unique())
+        cursor.execute(f"DELETE FROM {table_name} WHERE season IN ({','.join(map(str, seasons_to_process))})")
+        print(f"Deleted {cursor.rowcount} existing records for seasons: {seasons_to_process}")
+
+        rows = dataframe_to_tuples(timeline_df.round(2), TEAM_TIMELINE_COLUMNS)
+        write_stats = upsert_rows(
+            conn, cursor, table_name, TEAM_TIMELINE_COLUMNS, rows, ['season', 'round', 'teamcode'],
+            strategy=write_strategy, **write_options
+        )
+        print(f"Upserted {write_stats['rows']} team-round rows into {table_name} ({write_stats['transaction_s']:.2f}s)")
+        return write_stats
+
+    except Exception as e:
+        print(f"Error inserting team ratings timeline: {e}")
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
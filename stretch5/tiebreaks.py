@@ -0,0 +1,74 @@
+import numpy as np
+
+# Applied in order to teams level on wins. Whenever a criterion separates some of the tied
+# teams, each smaller group still level starts again from the first criterion among itself.
+TIEBREAK_CRITERIA = ('head_to_head_wins', 'head_to_head_diff', 'diff', 'points')
+
+def head_to_head_matrices(team_records_df, teams):
+    """
+    Wins and point difference of every team against every other, as (teams, teams) arrays
+    indexed like teams (sorted team codes), from each team's rows of the team records
+    """
+    team_index = np.searchsorted(teams, team_records_df['TeamCode'].astype(str).to_numpy())
+    opp_index = np.searchsorted(teams, team_records_df['OpponentCode'].astype(str).to_numpy())
+    pairs = team_index * len(teams) + opp_index
+    margins = (team_records_df['Team_Score'] - team_records_df['Opponent_Score']).to_numpy(dtype=float)
+    wins = np.bincount(pairs, weights=(team_records_df['Result'] == 'Win').to_numpy(dtype=float),
+                       minlength=len(teams) ** 2)
+    diff = np.bincount(pairs, weights=margins, minlength=len(teams) ** 2)
+    return wins.reshape(len(teams), len(teams)), diff.reshape(len(teams), len(teams))
+
+def _dense_rank(key):
+    # 0 for the smallest key of each row, equal keys share a rank
+    order = np.argsort(key, axis=1, kind='stable')
+    sorted_key = np.take_along_axis(key, order, axis=1)
+    steps = np.concatenate([np.zeros((len(key), 1), dtype=np.int64), np.cumsum(np.diff(sorted_key, axis=1) != 0, axis=1)], axis=1)
+    ranks = np.empty_like(steps)
+    np.put_along_axis(ranks, order, steps, axis=1)
+    return ranks
+
+def rank_with_tiebreaks(wins, h2h_wins, h2h_diff, diff, points, group=None):
+    """
+    Position of every team within its group, by wins and then TIEBREAK_CRITERIA. Works on a
+    batch of tables at once: wins, diff and points are (tables, teams), the head-to-head
+    matrices (tables, teams, teams) or one (teams, teams) shared by every table, group
+    (teams,). Ties that survive every criterion keep the team order.
+    """
+    n_tables, n_teams = wins.shape
+    group = np.zeros(n_teams, dtype=np.int64) if group is None else np.asarray(group)
+    # Level teams share a label, better teams get lower labels; criterion is the next
+    # criterion each level group will be compared on
+    label = _dense_rank(group[None, :] * 1e6 - wins)
+    criterion = np.zeros((n_tables, n_teams), dtype=np.int64)
+    overall = {'diff': diff, 'points': points}
+    level = label[:, :, None] == label[:, None, :]
+    members = level.sum(axis=2)
+
+    while True:
+        open_groups = (members > 1) & (criterion < len(TIEBREAK_CRITERIA))
+        if not open_groups.any():
+            break
+        values = np.zeros((n_tables, n_teams))
+        for k, name in enumerate(TIEBREAK_CRITERIA):
+            at_k = open_groups & (criterion == k)
+            if not at_k.any():
+                continue
+            if name == 'head_to_head_wins':
+                score = (level * h2h_wins).sum(axis=2)
+            elif name == 'head_to_head_diff':
+                score = (level * h2h_diff).sum(axis=2)
+            else:
+                score = overall[name]
+            values = np.where(at_k, score, values)
+
+        # Values are whole points and wins (or simulated margins), far below the label scale
+        label = _dense_rank(label * 1e9 - values)
+        level = label[:, :, None] == label[:, None, :]
+        new_members = level.sum(axis=2)
+        # A group that split starts over among each part, one that did not moves on
+        criterion = np.where(new_members < members, 0, np.where(open_groups, criterion + 1, criterion))
+        members = new_members
+
+    ranks = _dense_rank(label * float(n_teams) + np.arange(n_teams)[None, :])
+    group_start = np.concatenate([[0], np.cumsum(np.bincount(group))])[group]
+    return ranks - group_start + 1
@@ -0,0 +1,76 @@
+import io
+import time
+
+from psycopg2.extras import execute_values
+
+# 'values'  - execute_values pages in a single transaction
+# 'batched' - execute_values, committing every batch_size rows
+# 'copy'    - COPY into a temporary staging table, then one INSERT ... SELECT merge
+WRITE_STRATEGIES = ('values', 'batched', 'copy')
+
+def _copy_text(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, (bytes, memoryview)):
+        # bytea hex input, with its backslash escaped for the text format
+        return '\\\\x' + bytes(value).hex()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def upsert_rows(conn, cursor, table_name, columns, rows, conflict_columns, strategy='values',
+                page_size=100, batch_size=1000, extra_updates=(), commit=True):
+    """
+    Upsert rows into table_name, overwriting every non-key column on conflict.
+    Returns the number of transactions, total transaction time and the longest time
+    row locks on the target table were held. With commit=False nothing is committed,
+    batches included, so the caller can write several tables in one transaction.
+    """
+    if strategy not in WRITE_STRATEGIES:
+        raise ValueError(f"Unknown write strategy {strategy!r}, expected one of {WRITE_STRATEGIES}")
+
+    column_list = ', '.join(columns)
+    set_clause = ',\n            '.join(
+        [f"{col} = EXCLUDED.{col}" for col in columns if col not in conflict_columns] + list(extra_updates)
+    )
+    on_conflict = f"""
+        ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET
+            {set_clause}
+    """
+    stats = {'strategy': strategy, 'rows': len(rows), 'transactions': 0, 'transaction_s': 0.0, 'lock_hold_s': 0.0}
+
+    def finish(txn_start, lock_start):
+        if commit:
+            conn.commit()
+            stats['transactions'] += 1
+        end = time.perf_counter()
+        stats['transaction_s'] += end - txn_start
+        stats['lock_hold_s'] = max(stats['lock_hold_s'], end - lock_start)
+
+    if strategy == 'copy':
+        staging = f"{table_name}_staging"
+        txn_start = time.perf_counter()
+        cursor.execute(f"""
+            CREATE TEMP TABLE {staging} ON COMMIT DROP AS
+            SELECT {column_list} FROM {table_name} WITH NO DATA
+        """)
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_copy_text(value) for value in row) + '\n')
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN", buffer)
+        # Row locks on the target are only taken from the merge onwards
+        lock_start = time.perf_counter()
+        cursor.execute(f"""
+            INSERT INTO {table_name} ({column_list})
+            SELECT {column_list} FROM {staging}
+            {on_conflict}
+        """)
+        finish(txn_start, lock_start)
+        return stats
+
+    insert_query = f"INSERT INTO {table_name} ({column_list}) VALUES %s {on_conflict}"
+    chunk_size = batch_size if strategy == 'batched' else max(len(rows), 1)
+    for i in range(0, len(rows), chunk_size):
+        txn_start = time.perf_counter()
+        execute_values(cursor, insert_query, rows[i:i + chunk_size], page_size=page_size)
+        finish(txn_start, txn_start)
+    return stats
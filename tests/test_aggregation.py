@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from stretch5.aggregation import factorize_groups, grouped_reduce
+
+def test_factorize_groups_numbers_key_combinations_densely():
+    seasons = np.array([2024, 2025, 2024, 2024, 2025])
+    players = np.array(['P1', 'P1', 'P2', 'P1', 'P1'])
+    group_index, n_groups = factorize_groups([seasons, players])
+
+    assert n_groups == 3
+    assert sorted(set(group_index)) == [0, 1, 2]
+    assert group_index[0] == group_index[3]
+    assert group_index[1] == group_index[4]
+    assert len({group_index[0], group_index[1], group_index[2]}) == 3
+
+def test_factorize_groups_keeps_missing_keys_apart():
+    # ('b', None) used to share a group number with ('a', 'q')
+    group_index, n_groups = factorize_groups([
+        np.array(['a', 'b', 'a', 'a']),
+        np.array(['r', None, 'p', 'q'], dtype=object),
+    ])
+    assert n_groups == 4
+    assert len(set(group_index)) == 4
+
+def test_factorize_groups_empty():
+    group_index, n_groups = factorize_groups([np.array([]), np.array([])])
+    assert len(group_index) == 0
+    assert n_groups == 0
+
+def test_grouped_reduce_matches_pandas_groupby():
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, 7, 500)
+    values = rng.normal(size=(500, 3))
+    group_index, _ = factorize_groups([keys])
+
+    sums, first_rows = grouped_reduce(group_index, values)
+    maxima, _ = grouped_reduce(group_index, values, np.maximum)
+
+    frame = pd.DataFrame(values).assign(key=keys)
+    expected = frame.groupby('key', sort=False)
+    order = keys[first_rows]
+    np.testing.assert_allclose(sums, expected.sum().loc[order].to_numpy())
+    np.testing.assert_allclose(maxima, expected.max().loc[order].to_numpy())
+    # First rows are the first occurrence of each group
+    assert all(first_rows[i] == np.flatnonzero(group_index == group_index[first_rows[i]])[0]
+               for i in range(len(first_rows)))
+
+def test_grouped_reduce_empty():
+    sums, first_rows = grouped_reduce(np.array([], dtype=np.int64), np.zeros((0, 2)))
+    assert sums.shape == (0, 2)
+    assert len(first_rows) == 0
@@ -0,0 +1,27 @@
+import time
+
+import numpy as np
+import pytest
+
+from stretch5 import instrumentation
+from stretch5.instrumentation import span
+
+pytestmark = pytest.mark.skipif(instrumentation._current_rss_mb() is None, reason='needs /proc/self/statm')
+
+def test_peak_covers_memory_freed_before_the_span_ends():
+    with span('allocate_and_free') as outer:
+        with span('inner') as inner:
+            block = np.ones(200 * 1024 * 1024 // 8)
+            time.sleep(10 * instrumentation.RSS_SAMPLE_INTERVAL_S)
+            del block
+        time.sleep(2 * instrumentation.RSS_SAMPLE_INTERVAL_S)
+
+    for record in (outer.record(), inner.record()):
+        assert record['peak_growth_mb'] > 150
+        assert record['peak_rss_mb'] - record['rss_mb'] > 150
+
+def test_sampler_stops_once_no_span_is_open():
+    with span('short'):
+        assert instrumentation._rss_sampler.stop is not None
+    assert instrumentation._rss_sampler.stop is None
+    assert not instrumentation._rss_sampler.spans
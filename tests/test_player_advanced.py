@@ -0,0 +1,33 @@
+import pytest
+
+from benchmarks import generators
+from stretch5.game_logs import prepare_game_logs
+from stretch5.player_advanced import (
+    PLAYER_ADVANCED_MIN_MINUTES,
+    PLAYER_SHARE_COLUMNS,
+    calculate_player_advanced_stats,
+)
+from stretch5.team_stats import match_opponents
+
+@pytest.fixture(scope='module')
+def boxscores():
+    return generators.boxscores(1)
+
+def test_tiny_minutes_players_get_no_share_metrics(boxscores):
+    boxscores = boxscores.copy()
+    # A player on the court for five seconds who still shot twice and turned it over twice
+    row = boxscores.index[boxscores['Player_ID'].notna() & (boxscores['Minutes'] != 'DNP')][0]
+    boxscores.loc[row, ['Player_ID', 'Player', 'Minutes']] = ['PTINY', 'TINY, PLAYER', '00:05']
+    boxscores.loc[row, ['FieldGoalsAttempted2', 'FieldGoalsMade2', 'FieldGoalsAttempted3', 'FieldGoalsMade3',
+                        'Turnovers']] = [2, 1, 0, 0, 2]
+
+    stats = calculate_player_advanced_stats(prepare_game_logs(boxscores), match_opponents(boxscores))
+
+    tiny = stats[stats['player_id'] == 'PTINY']
+    assert len(tiny) == 2
+    assert tiny[PLAYER_SHARE_COLUMNS].isna().all().all()
+    assert (tiny['effective_fg_percentage'] == 50).all()
+
+    regular = stats[stats['total_minutes'] >= PLAYER_ADVANCED_MIN_MINUTES]
+    assert regular[PLAYER_SHARE_COLUMNS].notna().all().all()
+    assert regular['usage_rate'].between(0, 100).all()
@@ -0,0 +1,120 @@
+import pandas as pd
+import pytest
+
+from benchmarks import generators
+from stretch5 import stages
+from stretch5.game_logs import prepare_game_logs
+from stretch5.player_stats import (
+    PLAYER_ADDITIVE_COLUMNS,
+    PLAYER_KEY_COLUMNS,
+    PLAYER_STATS_COLUMNS,
+    aggregate_player_stats,
+    compute_player_totals,
+    derive_player_stats,
+    plan_player_totals_update,
+    season_game_keys,
+)
+
+@pytest.fixture(scope='module')
+def boxscores():
+    return generators.boxscores(1)
+
+@pytest.fixture(scope='module')
+def game_logs(boxscores):
+    return prepare_game_logs(boxscores)
+
+def accumulate(running, delta):
+    # What the ON CONFLICT upsert into player_totals_from_gamelogs_* does with each batch
+    combined = pd.concat([running, delta], ignore_index=True)
+    return combined.groupby(PLAYER_KEY_COLUMNS, as_index=False).agg({
+        'player_name': 'max', 'player_team_name': 'last', 'teamlogo': 'last',
+        **{col: 'sum' for col in PLAYER_ADDITIVE_COLUMNS},
+    })
+
+def test_incremental_totals_match_a_rebuild(game_logs):
+    team_logos = generators.team_logos(game_logs)
+    game_keys = season_game_keys(game_logs)
+    games = sorted(set(game_keys))
+
+    running = None
+    # Uneven batches, like daily runs picking up one or several rounds
+    for start, end in [(0, 1), (1, 40), (40, 41), (41, len(games))]:
+        batch = game_logs[game_keys.isin(games[start:end])]
+        delta = compute_player_totals(batch, team_logos)
+        running = delta if running is None else accumulate(running, delta)
+
+    incremental = derive_player_stats(running).sort_values(PLAYER_KEY_COLUMNS, ignore_index=True)
+    rebuilt = aggregate_player_stats(game_logs, team_logos).sort_values(PLAYER_KEY_COLUMNS, ignore_index=True)
+
+    assert set(rebuilt['phase']) == {'Regular Season', 'Playoffs', 'All'}
+    pd.testing.assert_frame_equal(incremental[PLAYER_STATS_COLUMNS], rebuilt[PLAYER_STATS_COLUMNS], check_dtype=False)
+
+def apply_plan(running, plan):
+    # What update_player_stats_incremental writes to player_totals_from_gamelogs_* for a plan
+    if running is not None and plan['corrected_teams']:
+        teams = pd.Series(list(zip(running['season'], running['player_team_code'])), index=running.index)
+        running = running[~teams.isin(plan['corrected_teams'])]
+    for delta in (plan['totals_delta'], plan['recomputed_totals']):
+        running = delta if running is None else accumulate(running, delta)
+    return running
+
+def test_corrected_box_scores_replace_what_was_applied(game_logs):
+    team_logos = generators.team_logos(game_logs)
+    game_keys = season_game_keys(game_logs)
+    games = sorted(set(game_keys))
+
+    first_run = plan_player_totals_update(game_logs[game_keys.isin(games[:200])], {}, team_logos)
+    running = apply_plan(None, first_run)
+    applied = first_run['checksums']
+    assert len(first_run['new_games']) == 200 and not first_run['corrected_games']
+
+    # The next fetch has one of the applied games corrected: a player's points changed and
+    # another player who was listed by mistake removed
+    corrected = game_logs.copy()
+    game = games[10]
+    players = corrected.index[(game_keys == game) & corrected['Player_ID'].notna() & (corrected['Minutes'] != 'DNP')]
+    corrected.loc[players[0], 'Points'] += 5
+    corrected.loc[players[1], 'Minutes'] = 'DNP'
+
+    second_run = plan_player_totals_update(corrected, applied, team_logos)
+    assert second_run['corrected_games'] == {game}
+    assert second_run['new_games'] == set(games[200:])
+    assert second_run['corrected_teams'] == set(zip(corrected.loc[game_keys == game, 'Season'].astype(int),
+                                                   corrected.loc[game_keys == game, 'Team']))
+    running = apply_plan(running, second_run)
+
+    incremental = derive_player_stats(running).sort_values(PLAYER_KEY_COLUMNS, ignore_index=True)
+    rebuilt = aggregate_player_stats(corrected, team_logos).sort_values(PLAYER_KEY_COLUMNS, ignore_index=True)
+    pd.testing.assert_frame_equal(incremental[PLAYER_STATS_COLUMNS], rebuilt[PLAYER_STATS_COLUMNS], check_dtype=False)
+
+    third_run = plan_player_totals_update(corrected, {**applied, **second_run['checksums']}, team_logos)
+    assert not third_run['new_games'] and not third_run['corrected_games']
+
+def test_games_applied_without_a_checksum_are_recomputed_once(game_logs):
+    team_logos = generators.team_logos(game_logs)
+    applied = {game: None for game in set(season_game_keys(game_logs))}
+
+    plan = plan_player_totals_update(game_logs, applied, team_logos)
+
+    assert plan['corrected_games'] == set(applied) and not plan['new_games']
+    assert plan['totals_delta'].empty
+    assert set(plan['checksums']) == set(applied)
+
+def test_all_rollup_adds_up_the_phases(game_logs):
+    totals = compute_player_totals(game_logs, generators.team_logos(game_logs))
+    keys = ['season', 'player_id', 'player_team_code']
+    phases = totals[totals['phase'] != 'All'].groupby(keys)[PLAYER_ADDITIVE_COLUMNS].sum()
+    rollup = totals[totals['phase'] == 'All'].set_index(keys)[PLAYER_ADDITIVE_COLUMNS]
+    pd.testing.assert_frame_equal(rollup.sort_index(), phases.sort_index(), check_dtype=False)
+
+@pytest.mark.parametrize('mode, rebuild', [('incremental', False), ('rebuild', True)])
+def test_player_stats_stage_resets_running_totals_only_on_rebuild(monkeypatch, boxscores, game_logs, mode, rebuild):
+    calls = []
+    monkeypatch.setattr(stages, 'update_player_stats_incremental', lambda *args: calls.append(args))
+    ctx = stages.RunContext('euroleague', [2025], player_stats_mode=mode)
+    ctx._cache.update(boxscores=boxscores, game_logs=game_logs)
+
+    stages.run_player_stats(ctx)
+
+    assert len(calls) == 1
+    assert calls[0][1:] == ('euroleague', rebuild)
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from benchmarks import generators
+from stretch5.ratings import (
+    ELO_HOME_ADVANTAGE,
+    ELO_INITIAL,
+    ELO_K,
+    apply_elo,
+    elo_games,
+    elo_state,
+    mov_multiplier,
+    season_start_rating,
+)
+from stretch5.schedule import create_team_records_dataset_euroleague
+
+def game(season, gamecode, home, away, home_score, away_score, phase='RS', game_date='2025-10-01'):
+    return {
+        'season': season, 'gamecode': str(gamecode), 'phase': phase, 'round': 1, 'game_date': game_date,
+        'home_code': home, 'home_team': f"{home} name", 'away_code': away, 'away_team': f"{away} name",
+        'home_score': home_score, 'away_score': away_score,
+    }
+
+def test_single_game_update():
+    state = {}
+    history = apply_elo(pd.DataFrame([game(2025, 1, 'AAA', 'BBB', 90, 80)]), state)
+
+    expected_home = 1 / (1 + 10 ** (-ELO_HOME_ADVANTAGE / 400))
+    change = ELO_K * mov_multiplier(10, ELO_HOME_ADVANTAGE) * (1 - expected_home)
+    assert state['AAA']['rating'] == pytest.approx(ELO_INITIAL + change)
+    assert state['BBB']['rating'] == pytest.approx(ELO_INITIAL - change)
+    assert state['AAA']['games_played'] == state['BBB']['games_played'] == 1
+
+    assert list(history['teamcode']) == ['AAA', 'BBB']
+    assert history['win_probability'].sum() == pytest.approx(1)
+    assert list(history['rating_before']) == [ELO_INITIAL, ELO_INITIAL]
+    assert list(history['opponent_rating_before']) == [ELO_INITIAL, ELO_INITIAL]
+
+def test_upset_moves_ratings_further_than_expected_win():
+    favourite_wins, upset = {}, {}
+    apply_elo(pd.DataFrame([game(2025, 1, 'AAA', 'BBB', 85, 80)]), favourite_wins)
+    apply_elo(pd.DataFrame([game(2025, 1, 'AAA', 'BBB', 80, 85)]), upset)
+    assert ELO_INITIAL - upset['AAA']['rating'] > favourite_wins['AAA']['rating'] - ELO_INITIAL
+
+def test_final_four_games_have_no_home_edge():
+    state = {}
+    history = apply_elo(pd.DataFrame([game(2025, 1, 'AAA', 'BBB', 80, 80, phase='FF')]), state)
+    assert history['win_probability'].tolist() == [0.5, 0.5]
+    assert state['AAA']['rating'] == state['BBB']['rating'] == ELO_INITIAL
+
+def test_ratings_regress_on_a_teams_first_game_of_a_new_season():
+    state = {}
+    apply_elo(pd.DataFrame([game(2024, 1, 'AAA', 'BBB', 100, 60)]), state)
+    rating_2024 = state['AAA']['rating']
+
+    history = apply_elo(pd.DataFrame([game(2025, 1, 'AAA', 'CCC', 80, 80, game_date='2025-10-01')]), state)
+    assert history['rating_before'].iloc[0] == pytest.approx(season_start_rating(rating_2024))
+    assert ELO_INITIAL < season_start_rating(rating_2024) < rating_2024
+    assert state['AAA']['season'] == 2025
+    assert state['AAA']['games_played'] == 1
+
+def test_applying_games_in_two_runs_matches_one_replay():
+    games = elo_games(create_team_records_dataset_euroleague(generators.game_reports(2)))
+    replay, incremental = {}, {}
+    full_history = apply_elo(games, replay)
+    split = len(games) // 2 + 7
+    history = pd.concat([apply_elo(games.iloc[:split], incremental), apply_elo(games.iloc[split:], incremental)],
+                        ignore_index=True)
+
+    assert replay.keys() == incremental.keys()
+    for code in replay:
+        assert incremental[code]['rating'] == pytest.approx(replay[code]['rating'])
+        assert incremental[code]['games_played'] == replay[code]['games_played']
+    pd.testing.assert_frame_equal(history, full_history)
+
+def test_state_seeded_from_database_rows_carries_into_a_new_season():
+    # rating_after is DECIMAL(7,2) in elo_history, so a rebuild or resume seeds the state with Decimals
+    rows = [('AAA', 'AAA name', 2024, Decimal('1612.45'), 30, '240', '2025-05-20'),
+            ('BBB', 'BBB name', 2024, Decimal('1401.10'), 30, '240', '2025-05-20')]
+    state = elo_state(rows)
+    history = apply_elo(pd.DataFrame([game(2025, 1, 'AAA', 'BBB', 80, 75)]), state)
+
+    assert history['rating_before'].tolist() == pytest.approx(
+        [season_start_rating(1612.45), season_start_rating(1401.10)])
+    assert isinstance(state['AAA']['rating'], float)
+    assert state['AAA']['season'] == 2025
+    assert state['AAA']['games_played'] == 1
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stretch5.simulation import remaining_games, schedule_groups, simulate_season
+
+REMAINING_COLUMNS = ['gamecode', 'round', 'home_code', 'home_team', 'away_code', 'away_team']
+
+def round_robin(codes, season=2025):
+    """
+    Team records of a completed single round robin in which every team beats the ones after it
+    """
+    rows = []
+    for i, home in enumerate(codes):
+        for away in codes[i + 1:]:
+            gamecode = len(rows) // 2 + 1
+            for team, opponent, result, score, opp_score in ((home, away, 'Win', 90, 80), (away, home, 'Loss', 80, 90)):
+                rows.append({'Season': season, 'Phase': 'RS', 'Gamecode': gamecode, 'TeamCode': team, 'Team': team,
+                             'OpponentCode': opponent, 'Result': result, 'Team_Score': score, 'Opponent_Score': opp_score})
+    return pd.DataFrame(rows)
+
+def odds_by_team(odds, column):
+    return dict(zip(odds['teamcode'], odds[column]))
+
+def test_euroleague_bracket_follows_the_seeds_and_play_in():
+    # Seeds by position, but every worse seed is far stronger, so every game goes to the worse seed
+    codes = [f"T{position:02d}" for position in range(1, 19)]
+    ratings = {code: 1500 + position * 2000 for position, code in enumerate(codes)}
+    odds = simulate_season(round_robin(codes), pd.DataFrame(columns=REMAINING_COLUMNS), 'euroleague', 2025,
+                           ratings, simulations=200, seed=0)
+
+    playoffs = {code for code, value in odds_by_team(odds, 'playoff_odds').items() if value == 100}
+    final_four = {code for code, value in odds_by_team(odds, 'final_four_odds').items() if value == 100}
+    champion = [code for code, value in odds_by_team(odds, 'champion_odds').items() if value == 100]
+
+    assert {code for code, value in odds_by_team(odds, 'direct_playoff_odds').items() if value == 100} == set(codes[:6])
+    assert {code for code, value in odds_by_team(odds, 'play_in_odds').items() if value == 100} == set(codes[6:10])
+    # 8th beats 7th for the 7 seed; 10th beats 9th and then the 7-8 loser for the 8 seed
+    assert playoffs == set(codes[:6]) | {'T08', 'T10'}
+    # 1 v 8, 4 v 5, 2 v 7 and 3 v 6, each won by the lower seed
+    assert final_four == {'T10', 'T05', 'T08', 'T06'}
+    assert champion == ['T10']
+    assert odds['avg_position'].tolist() == list(range(1, 19))
+
+def test_eurocup_groups_are_found_and_crossed_in_the_bracket():
+    group_a, group_b = [f"A{position:02d}" for position in range(1, 11)], [f"B{position:02d}" for position in range(1, 11)]
+    # Better seeds always win; at equal seeds group A is stronger
+    ratings = {code: 1500 - position * 4000 + (2000 if code[0] == 'A' else 0)
+               for group in (group_a, group_b) for position, code in enumerate(group)}
+    records = pd.concat([round_robin(group_a), round_robin(group_b)], ignore_index=True)
+    odds = simulate_season(records, pd.DataFrame(columns=REMAINING_COLUMNS), 'eurocup', 2025, ratings,
+                           simulations=200, seed=0)
+
+    positions = odds_by_team(odds, 'avg_position')
+    assert positions['A01'] == positions['B01'] == 1
+    assert {code for code, value in odds_by_team(odds, 'playoff_odds').items() if value == 100} == \
+        set(group_a[:8] + group_b[:8])
+    # Quarter-finals A1 v B4, B2 v A3, B1 v A4 and A2 v B3
+    assert {code for code, value in odds_by_team(odds, 'final_four_odds').items() if value == 100} == \
+        {'A01', 'B02', 'B01', 'A02'}
+    assert odds_by_team(odds, 'champion_odds')['A01'] == 100
+
+def test_groups_that_do_not_fit_the_bracket_leave_postseason_odds_empty(capsys):
+    codes = [f"T{position:02d}" for position in range(1, 7)]
+    odds = simulate_season(round_robin(codes), pd.DataFrame(columns=REMAINING_COLUMNS), 'euroleague', 2025, {},
+                           simulations=50, seed=0)
+
+    assert odds[['playoff_odds', 'final_four_odds', 'champion_odds']].isna().all().all()
+    assert (odds['direct_playoff_odds'] == 100).all()
+    assert 'do not fit its playoff bracket' in capsys.readouterr().out
+
+def test_odds_add_up_over_the_remaining_games():
+    codes = [f"T{position:02d}" for position in range(1, 19)]
+    records = round_robin(codes)
+    played, rest = records[records['Gamecode'] <= 100], records[(records['Gamecode'] > 100) & (records['Result'] == 'Win')]
+    remaining = pd.DataFrame({'gamecode': rest['Gamecode'].astype(str), 'round': 1,
+                              'home_code': rest['TeamCode'], 'home_team': rest['Team'],
+                              'away_code': rest['OpponentCode'], 'away_team': rest['OpponentCode']})
+    odds = simulate_season(played, remaining, 'euroleague', 2025, {}, simulations=2000, seed=1)
+
+    assert odds['expected_wins'].sum() == pytest.approx(len(records) / 2)
+    assert odds['direct_playoff_odds'].sum() == pytest.approx(600)
+    assert odds['play_in_odds'].sum() == pytest.approx(400)
+    assert odds['playoff_odds'].sum() == pytest.approx(800)
+    assert odds['final_four_odds'].sum() == pytest.approx(400)
+    assert odds['champion_odds'].sum() == pytest.approx(100)
+
+def test_schedule_groups_links_teams_that_play_each_other():
+    group = schedule_groups(np.array([0, 2, 4]), np.array([1, 3, 5]), 6)
+    assert group[0] == group[1] and group[2] == group[3] and group[4] == group[5]
+    assert len(set(group)) == 3
+
+def test_remaining_games_skip_scored_and_recorded_games():
+    schedule = pd.DataFrame({
+        'Phase': ['RS', 'RS', 'RS', 'PO'],
+        'gameCode': [1, 2, 3, 4],
+        'Round': [1, 2, 3, 4],
+        'played': [True, True, True, False],
+        'homescore': [80, 0, 0, 0],
+        'awayscore': [70, 0, 0, 0],
+        'homecode': ['A', 'A', 'B', 'A'],
+        'hometeam': ['A', 'A', 'B', 'A'],
+        'awaycode': ['B', 'B', 'A', 'B'],
+        'awayteam': ['B', 'B', 'A', 'B'],
+    })
+    records = pd.DataFrame({'Gamecode': [3]})
+    assert remaining_games(schedule, records)['gamecode'].tolist() == ['2']
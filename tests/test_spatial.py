@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stretch5.shots import COURT_PARAMS
+from stretch5.spatial import SPATIAL_CELL_SIZE, ShotSpatialIndex, build_spatial_indexes
+
+BINS = ['Restricted Area', 'Paint', 'Mid-Range', 'Three']
+
+@pytest.fixture(scope='module')
+def shots():
+    rng = np.random.default_rng(0)
+    n = 5000
+    x = rng.uniform(COURT_PARAMS['court_min_x'] - 40, COURT_PARAMS['court_max_x'] + 40, n)
+    y = rng.uniform(COURT_PARAMS['court_min_y'] - 40, COURT_PARAMS['court_max_y'] + 40, n)
+    # Shots exactly on grid lines and on the court bounds
+    edge_x = COURT_PARAMS['court_min_x'] + SPATIAL_CELL_SIZE * np.arange(0, 31)
+    edge_y = np.full(len(edge_x), 100.0)
+    x = np.concatenate([x, edge_x, edge_y, [COURT_PARAMS['court_max_x'], np.nan]])
+    y = np.concatenate([y, edge_y, edge_x, [COURT_PARAMS['court_max_y'], 10.0]])
+    return pd.DataFrame({
+        'Season': 2025,
+        'COORD_X': x,
+        'COORD_Y': y,
+        'ID_PLAYER': [f"P{i % 40}" for i in range(len(x))],
+        'Bin': rng.choice(BINS, len(x)),
+        'made': rng.integers(0, 2, len(x)),
+        'POINTS': rng.integers(0, 4, len(x)),
+    })
+
+@pytest.fixture(scope='module')
+def index(shots):
+    return ShotSpatialIndex.build(shots, 2025)
+
+def found(index, positions):
+    # Query results as (x, y, player) rows, comparable with a brute-force pass over the shots
+    frame = index.frame(positions)
+    return sorted(zip(frame['COORD_X'].astype(float), frame['COORD_Y'].astype(float), frame['ID_PLAYER']))
+
+def expected(shots, mask):
+    # Coordinates as stored in the index, so shots on a query edge are compared exactly
+    selected = shots[mask]
+    return sorted(zip(selected['COORD_X'].astype(np.float32).astype(float),
+                      selected['COORD_Y'].astype(np.float32).astype(float), selected['ID_PLAYER']))
+
+def stored_coords(shots):
+    return shots['COORD_X'].astype(np.float32).to_numpy(), shots['COORD_Y'].astype(np.float32).to_numpy()
+
+def test_shots_without_coordinates_are_left_out(shots, index):
+    assert len(index) == shots['COORD_X'].notna().sum()
+
+@pytest.mark.parametrize('x, y, r', [
+    (0, 0, 125),
+    (-750, -100, 200),          # centred on the court corner, mostly outside the bounds
+    (50, 100, 50),              # centre on a cell corner, radius one cell
+    (740, 840, 150),            # reaching past the far bounds
+    (13.7, 421.9, 0.5),
+    (0, 375, 2000),             # the whole court and beyond
+])
+def test_radius_matches_brute_force(shots, index, x, y, r):
+    xs, ys = stored_coords(shots)
+    inside = (xs - np.float32(x)) ** 2 + (ys - np.float32(y)) ** 2 <= np.float32(r) * np.float32(r)
+    assert found(index, index.radius(x, y, r)) == expected(shots, inside)
+
+@pytest.mark.parametrize('bounds', [
+    (-100, 0, 100, 200),        # edges on grid lines, shots on them included
+    (-750, -100, -700, -50),    # the corner cell of the court
+    (-900, -300, -740, 900),    # mostly outside, clipped to the first column of cells
+    (700, 800, 1000, 1000),     # past the far corner
+    (3.3, 57.1, 40.4, 97.2),    # inside a single cell
+    (-2000, -2000, 2000, 2000),
+])
+def test_rect_matches_brute_force(shots, index, bounds):
+    min_x, min_y, max_x, max_y = bounds
+    xs, ys = stored_coords(shots)
+    inside = (xs >= min_x) & (xs <= max_x) & (ys >= min_y) & (ys <= max_y)
+    assert inside.any()
+    assert found(index, index.rect(*bounds)) == expected(shots, inside)
+
+def test_rect_with_no_shots_is_empty(index):
+    assert len(index.rect(2000, 2000, 2100, 2100)) == 0
+
+def test_polygon_matches_brute_force(shots, index):
+    # Triangle with its right angle at the origin. The grid-line shots sit on its edges, where
+    # the even-odd rule may go either way, so only the random shots are compared.
+    xs, ys = stored_coords(shots)
+    random = np.modf(xs)[0] != 0
+    inside = (xs > 0) & (ys > 0) & (xs / 600 + ys / 400 < 1)
+    result = [shot for shot in found(index, index.polygon([(0, 0), (600, 0), (0, 400)])) if shot[0] % 1 != 0]
+    assert result == expected(shots, inside & random)
+
+def test_bins_filter_matches_brute_force(shots, index):
+    xs, ys = stored_coords(shots)
+    inside = (xs ** 2 + ys ** 2 <= 675 ** 2) & shots['Bin'].isin(['Paint', 'Three']).to_numpy()
+    assert found(index, index.radius(0, 0, 675, bins={'Paint', 'Three'})) == expected(shots, inside)
+
+def test_serialised_index_answers_the_same_queries(shots, index):
+    loaded = ShotSpatialIndex.from_bytes(index.to_bytes())
+    assert np.array_equal(loaded.radius(0, 0, 300), index.radius(0, 0, 300))
+    assert np.array_equal(loaded.rect(-100, 0, 100, 200, bins={'Paint'}), index.rect(-100, 0, 100, 200, bins={'Paint'}))
+    pd.testing.assert_frame_equal(loaded.frame(), index.frame())
+
+def test_one_index_per_season(shots):
+    indexes = build_spatial_indexes(pd.concat([shots, shots.assign(Season=2024).iloc[:100]], ignore_index=True))
+    assert sorted(indexes) == [2024, 2025]
+    assert len(indexes[2024]) == 100
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from benchmarks import generators
+from stretch5 import stages
+from stretch5.player_advanced import calculate_player_advanced_stats
+from stretch5.player_form import calculate_player_form
+from stretch5.ratings import calculate_adjusted_team_ratings
+from stretch5.shots import calculate_shot_quality, calculate_shot_zone_aggregates
+from stretch5.team_stats import calculate_team_ratings_timeline
+
+SEASONS = [2023, 2024, 2025]
+
+@pytest.fixture(scope='module')
+def api_frames():
+    return {'boxscores': generators.boxscores(len(SEASONS)), 'shots': generators.shots(len(SEASONS))}
+
+class FakeAPI:
+    """
+    Stands in for the euroleague_api BoxScoreData and ShotData clients, serving synthetic
+    frames and recording every season range fetched
+    """
+
+    def __init__(self, frames, fetches):
+        self.frames = frames
+        self.fetches = fetches
+
+    def __call__(self, competition):
+        return self
+
+    def fetch(self, name, start, end):
+        self.fetches.append((name, (start, end)))
+        df = self.frames[name]
+        return df[df['Season'].between(start, end)].reset_index(drop=True)
+
+    def get_player_boxscore_stats_multiple_seasons(self, start, end):
+        return self.fetch('boxscores', start, end)
+
+    def get_game_shot_data_multiple_seasons(self, start, end):
+        return self.fetch('shots', start, end)
+
+def run_context(monkeypatch, frames, fetches=None, **options):
+    api = FakeAPI(frames, [] if fetches is None else fetches)
+    monkeypatch.setattr(stages, 'BoxScoreData', api)
+    monkeypatch.setattr(stages, 'ShotData', api)
+    return stages.RunContext('euroleague', SEASONS, **options)
+
+def sorted_rows(df):
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+@pytest.mark.parametrize('names, calculate', [
+    (('game_logs',), lambda game_logs: game_logs.drop(columns='SeasonRound')),
+    (('game_logs',), calculate_player_form),
+    (('game_logs', 'team_games'), calculate_player_advanced_stats),
+    (('team_games',), calculate_team_ratings_timeline),
+    (('team_games',), calculate_adjusted_team_ratings),
+    (('classified_shots',), calculate_shot_zone_aggregates),
+    (('classified_shots', 'league_shot_averages'), calculate_shot_quality),
+])
+def test_streamed_seasons_add_up_to_a_full_run(monkeypatch, api_frames, names, calculate):
+    (full,) = [calculate(*batch) for batch in run_context(monkeypatch, api_frames).batches(*names)]
+    streamed = [calculate(*batch) for batch in run_context(monkeypatch, api_frames, chunk_size=50).batches(*names)]
+
+    assert len(streamed) == len(SEASONS)
+    pd.testing.assert_frame_equal(sorted_rows(pd.concat(streamed, ignore_index=True)), sorted_rows(full),
+                                  check_dtype=False, check_categorical=False)
+
+def test_streaming_fetches_one_season_at_a_time_and_keeps_only_the_latest(monkeypatch, api_frames):
+    fetches = []
+    ctx = run_context(monkeypatch, api_frames, fetches, chunk_size=50)
+
+    seasons = [int(game_logs['Season'].iloc[0]) for game_logs, _ in ctx.batches('game_logs', 'team_games')]
+
+    assert seasons == sorted(SEASONS, reverse=True)
+    assert fetches == [('boxscores', (season, season)) for season in seasons]
+    assert 'boxscores' not in ctx._cache and 'game_logs' not in ctx._cache
+    assert list(ctx._season_cache) == [('boxscores', season) for season in seasons[-stages.SEASON_CACHE_SIZE:]]
+
+def test_streaming_skips_seasons_without_data(monkeypatch, api_frames):
+    shots = api_frames['shots']
+    ctx = run_context(monkeypatch, {**api_frames, 'shots': shots[shots['Season'] != 2024]}, chunk_size=50)
+
+    batches = list(ctx.batches('classified_shots', 'league_shot_averages'))
+
+    assert [int(shot_data['Season'].iloc[0]) for shot_data, _ in batches] == [2025, 2023]
+    assert [set(averages['Season']) for _, averages in batches] == [{2025}, {2023}]
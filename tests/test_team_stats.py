@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from benchmarks import generators
+from stretch5.team_stats import (
+    calculate_team_ratings_timeline,
+    match_opponents,
+    ratings_from_totals,
+    team_counting_stats,
+)
+
+@pytest.fixture(scope='module')
+def team_games():
+    return match_opponents(generators.boxscores(1))
+
+def test_timeline_covers_the_regular_season_only(team_games):
+    regular_season = team_games[team_games['Phase'] == 'RS']
+    assert len(regular_season) < len(team_games)
+
+    timeline = calculate_team_ratings_timeline(team_games)
+
+    assert set(timeline['round']) == set(regular_season['Round'].astype(int))
+    assert set(timeline['teamcode']) == set(regular_season['Team'])
+
+    # After the last round every team's running totals are its whole regular season
+    last = timeline[timeline['round'] == timeline['round'].max()].set_index('teamcode').sort_index()
+    totals = team_counting_stats(regular_season).groupby(regular_season['Team'].to_numpy()).sum().sort_index()
+    games = regular_season.groupby('Team').size().sort_index()
+    expected = ratings_from_totals(totals, games.to_numpy())
+    assert (last['games_played'] == games).all()
+    pd.testing.assert_series_equal(last['net_rating'], expected['net_rating'], check_names=False, check_index=False)
+    assert sorted(last['rank_net_rating']) == list(range(1, len(last) + 1))
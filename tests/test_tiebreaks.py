@@ -0,0 +1,47 @@
+import numpy as np
+
+from stretch5.tiebreaks import rank_with_tiebreaks
+
+TEAMS = ['A', 'B', 'C', 'D']
+
+def circular_tie(margins, overall_diff, points=(0, 0, 0, 0)):
+    """
+    A beats B, B beats C and C beats A by the given margins; D is a game clear of them.
+    Returns the position of every team.
+    """
+    h2h_wins = np.zeros((4, 4))
+    h2h_diff = np.zeros((4, 4))
+    for (winner, loser), margin in zip([(0, 1), (1, 2), (2, 0)], margins):
+        h2h_wins[winner, loser] = 1
+        h2h_diff[winner, loser] = margin
+        h2h_diff[loser, winner] = -margin
+    wins = np.array([[10, 10, 10, 11]])
+    positions = rank_with_tiebreaks(wins, h2h_wins, h2h_diff, np.array([overall_diff], dtype=float),
+                                    np.array([points], dtype=float))
+    return dict(zip(TEAMS, positions[0]))
+
+def test_circular_tie_is_broken_by_head_to_head_difference():
+    # A +6 -3 = 3, B -6 +3 = -3, C -3 +3 = 0; the overall difference would say otherwise
+    assert circular_tie((6, 3, 3), overall_diff=(-50, 50, 0, 0)) == {'D': 1, 'A': 2, 'C': 3, 'B': 4}
+
+def test_teams_still_level_restart_from_their_own_head_to_head():
+    # A +8 -2 = 6, B -8 +5 = -3, C -5 +2 = -3: A is second, then B and C start over between
+    # themselves, where B's win over C decides it before C's better overall difference
+    assert circular_tie((8, 5, 2), overall_diff=(0, -40, 40, 0)) == {'D': 1, 'A': 2, 'B': 3, 'C': 4}
+
+def test_perfect_circle_falls_back_to_overall_difference_then_points():
+    assert circular_tie((4, 4, 4), overall_diff=(5, 20, 10, 0)) == {'D': 1, 'B': 2, 'C': 3, 'A': 4}
+    assert circular_tie((4, 4, 4), overall_diff=(5, 5, 5, 0), points=(900, 800, 1000, 0)) == \
+        {'D': 1, 'C': 2, 'A': 3, 'B': 4}
+
+def test_ties_surviving_every_criterion_keep_the_team_order():
+    assert circular_tie((4, 4, 4), overall_diff=(5, 5, 5, 0)) == {'D': 1, 'A': 2, 'B': 3, 'C': 4}
+
+def test_batches_rank_each_table_on_its_own_and_positions_restart_per_group():
+    wins = np.array([[3, 1, 2, 0], [0, 1, 2, 3]], dtype=float)
+    zeros = np.zeros((2, 4))
+    positions = rank_with_tiebreaks(wins, np.zeros((4, 4)), np.zeros((4, 4)), zeros, zeros)
+    assert positions.tolist() == [[1, 3, 2, 4], [4, 3, 2, 1]]
+
+    grouped = rank_with_tiebreaks(wins, np.zeros((4, 4)), np.zeros((4, 4)), zeros, zeros, group=np.array([0, 0, 1, 1]))
+    assert grouped.tolist() == [[1, 2, 1, 2], [2, 1, 2, 1]]